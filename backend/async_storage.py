@@ -0,0 +1,225 @@
+"""Async front end for conversation storage.
+
+Backend calls (JSON encoding and disk I/O) run in a bounded thread pool so
+they never block the event loop. Each conversation has at most one writer
+task, which acts as its lock: mutations are applied strictly in order, and
+mutations queued while a write is in flight are applied together in one
+backend write (group commit).
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
+try:
+    from .config import STORAGE_THREADS
+    from .storage_base import Mutation
+    from . import storage
+except ImportError:
+    from config import STORAGE_THREADS
+    from storage_base import Mutation
+    import storage
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class _WriteQueue:
+    """Pending mutations for one conversation and the task writing them."""
+
+    def __init__(self):
+        self.pending: List[Tuple[Mutation, asyncio.Future]] = []
+        self.writer: Optional[asyncio.Task] = None
+
+
+_queues: Dict[str, _WriteQueue] = {}
+
+_stats = {
+    "mutations": 0,
+    "writes": 0,
+}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=STORAGE_THREADS, thread_name_prefix="storage")
+    return _executor
+
+
+async def _run(fn: Callable, *args) -> Any:
+    """Run a blocking storage call in the storage thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+
+
+def _apply_batch(conversation_id: str, mutations: List[Mutation]) -> List[Tuple[bool, Any]]:
+    """
+    Apply a batch in one write; if it fails, retry each mutation alone so one
+    bad mutation doesn't fail the others.
+
+    Returns:
+        (succeeded, result or exception) per mutation
+    """
+    try:
+        return [(True, result) for result in storage.apply_mutations(conversation_id, mutations)]
+    except Exception as e:
+        if len(mutations) == 1:
+            return [(False, e)]
+
+    outcomes = []
+    for mutation in mutations:
+        try:
+            outcomes.append((True, storage.apply_mutations(conversation_id, [mutation])[0]))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
+
+
+async def _drain(conversation_id: str, queue: _WriteQueue):
+    """Write queued mutations until none are left, one batch per backend write."""
+    try:
+        while queue.pending:
+            batch, queue.pending = queue.pending, []
+            _stats["writes"] += 1
+            try:
+                outcomes = await _run(_apply_batch, conversation_id, [mutation for mutation, _ in batch])
+            except Exception as e:
+                outcomes = [(False, e)] * len(batch)
+
+            for (_, future), (succeeded, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if succeeded:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+    finally:
+        queue.writer = None
+        if not queue.pending and _queues.get(conversation_id) is queue:
+            del _queues[conversation_id]
+
+
+async def _mutate(conversation_id: str, operation: str, *args) -> Any:
+    """Queue a mutation behind this conversation's writer and wait for it to be stored."""
+    queue = _queues.get(conversation_id)
+    if queue is None:
+        queue = _queues[conversation_id] = _WriteQueue()
+
+    future = asyncio.get_running_loop().create_future()
+    queue.pending.append(((operation, args), future))
+    _stats["mutations"] += 1
+    if queue.writer is None:
+        queue.writer = asyncio.create_task(_drain(conversation_id, queue))
+
+    # A cancelled caller must not cancel a write other callers share
+    return await asyncio.shield(future)
+
+
+async def call(fn: Callable, *args) -> Any:
+    """Run a blocking storage-layer callable (e.g. an import step) in the storage thread pool."""
+    return await _run(fn, *args)
+
+
+async def create_conversation(conversation_id: str) -> Dict[str, Any]:
+    """Create a new conversation."""
+    return await _run(storage.create_conversation, conversation_id)
+
+
+async def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """Load a conversation, or None if not found."""
+    return await _run(storage.get_conversation, conversation_id)
+
+
+async def get_metadata(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """Get a conversation's metadata (id, created_at, title, message_count) without its messages."""
+    return await _run(storage.get_metadata, conversation_id)
+
+
+async def get_messages(
+    conversation_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    stages: Optional[Tuple[str, ...]] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """Get a range of a conversation's messages (see storage.get_messages)."""
+    return await _run(storage.get_messages, conversation_id, offset, limit, stages)
+
+
+async def search(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Search stored messages (see search_index.SearchIndex.search)."""
+    return await _run(storage.search, query, limit)
+
+
+async def get_leaderboard(mode: Optional[str] = None) -> Dict[str, Any]:
+    """Get model standings across stored conversations (see storage.get_leaderboard)."""
+    return await _run(storage.get_leaderboard, mode)
+
+
+async def list_conversations(
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    order: str = "desc"
+) -> List[Dict[str, Any]]:
+    """List conversation metadata (see storage.list_conversations)."""
+    return await _run(storage.list_conversations, limit, before, order)
+
+
+async def add_user_message(conversation_id: str, content: str):
+    """Add a user message to a conversation."""
+    await _mutate(conversation_id, "add_user_message", content)
+
+
+async def add_assistant_message(
+    conversation_id: str,
+    stage1: List[Dict[str, Any]],
+    stage2: List[Dict[str, Any]],
+    stage3: Dict[str, Any],
+    metadata: Optional[Dict[str, Any]] = None
+) -> int:
+    """Add an assistant message (with the run's metadata, if given) and return its index."""
+    return await _mutate(conversation_id, "add_assistant_message", stage1, stage2, stage3, metadata)
+
+
+async def attach_late_result(
+    conversation_id: str,
+    message_index: int,
+    stage: str,
+    result: Dict[str, Any]
+):
+    """Attach a late stage result to an assistant message."""
+    await _mutate(conversation_id, "attach_late_result", message_index, stage, result)
+
+
+async def update_conversation_title(conversation_id: str, title: str):
+    """Update the title of a conversation."""
+    await _mutate(conversation_id, "update_conversation_title", title)
+
+
+async def close():
+    """Wait for queued writes, then close the backend and the thread pool."""
+    global _executor
+    writers = [queue.writer for queue in _queues.values() if queue.writer is not None]
+    if writers:
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    # Let calls still running in the pool (e.g. a tiering run) finish before closing the backend
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    storage.close()
+
+
+def get_storage_stats() -> Dict[str, Any]:
+    """
+    Get write coalescing counters.
+
+    Returns:
+        Dict with mutations requested, backend writes performed, conversations
+        with queued writes, and the conversation cache counters (None if disabled)
+    """
+    return {
+        **_stats,
+        "coalesced": _stats["mutations"] - _stats["writes"],
+        "backend": storage.get_backend().name,
+        "threads": STORAGE_THREADS,
+        "queued_conversations": len(_queues),
+        "cache": storage.get_cache_stats(),
+    }
@@ -0,0 +1,238 @@
+"""Content-addressed on-disk store for generated images.
+
+Images arrive from OpenRouter as base64 data URLs. They are decoded once,
+written under their SHA-256 (so identical images are stored once), and
+replaced in results by small references that point at /api/images.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+try:
+    from .config import IMAGE_BLOB_DIR, IMAGE_THUMBNAIL_SIZES
+except ImportError:
+    from config import IMAGE_BLOB_DIR, IMAGE_THUMBNAIL_SIZES
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_URL_PREFIX = "/api/images"
+
+DATA_URL_PATTERN = re.compile(r"data:(image/[\w.+-]+);base64,([A-Za-z0-9+/=]+)")
+
+# Blob ids are "<sha256>.<ext>"; anything else is rejected before touching disk
+BLOB_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{1,5}$")
+
+# Raster formats only: blobs are served from the API origin, and an SVG can carry script
+_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+_MIME_TYPES = {ext: mime for mime, ext in _EXTENSIONS.items() if mime != "image/jpg"}
+
+_stats = {
+    "stored": 0,
+    "deduplicated": 0,
+}
+
+
+def _blob_file(blob_id: str) -> str:
+    """Get the on-disk location for a blob (sharded by hash prefix)."""
+    return os.path.join(IMAGE_BLOB_DIR, blob_id[:2], blob_id)
+
+
+def _thumbnail_file(blob_id: str, size: int) -> str:
+    """Get the on-disk location for a cached thumbnail."""
+    return os.path.join(IMAGE_BLOB_DIR, "thumbs", blob_id[:2], f"{blob_id.split('.')[0]}_{size}.png")
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write a file via a temp file so readers never see a partial blob."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def make_reference(blob_id: str, size: int) -> Dict[str, Any]:
+    """
+    Build the reference stored in results in place of an inline image.
+
+    Args:
+        blob_id: Blob identifier ("<sha256>.<ext>")
+        size: Image size in bytes
+
+    Returns:
+        Dict with 'id', 'url', 'thumbnail_url', 'mime_type' and 'bytes'
+    """
+    return {
+        "id": blob_id,
+        "url": f"{IMAGE_URL_PREFIX}/{blob_id}",
+        "thumbnail_url": f"{IMAGE_URL_PREFIX}/{blob_id}/thumbnail",
+        "mime_type": mime_type_for(blob_id),
+        "bytes": size,
+    }
+
+
+def store_bytes(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """
+    Store image bytes, skipping the write if the same content already exists.
+
+    Args:
+        data: Raw image bytes
+        mime_type: MIME type of the image
+
+    Returns:
+        Reference dict (see make_reference)
+
+    Raises:
+        ValueError: If the MIME type is not an allowed raster format
+    """
+    extension = _EXTENSIONS.get(mime_type.lower())
+    if extension is None:
+        raise ValueError(f"Unsupported image type: {mime_type}")
+    blob_id = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+    path = _blob_file(blob_id)
+
+    if os.path.exists(path):
+        _stats["deduplicated"] += 1
+    else:
+        _write_atomic(path, data)
+        _stats["stored"] += 1
+
+    return make_reference(blob_id, len(data))
+
+
+def store_data_url(data_url: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a base64 image data URL and store it.
+
+    Args:
+        data_url: "data:image/...;base64,..." string
+
+    Returns:
+        Reference dict, or None if the URL could not be decoded or is not a
+        raster image (SVG and other types are dropped)
+    """
+    match = DATA_URL_PATTERN.fullmatch(data_url.strip())
+    if not match or match.group(1).lower() not in _EXTENSIONS:
+        return None
+    try:
+        data = base64.b64decode(match.group(2), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return store_bytes(data, match.group(1))
+
+
+def externalize_images(content: Any, images: List[str]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Move inline images out of a model response into the blob store.
+
+    Data URLs embedded in string content are replaced by the blob URL so
+    the text no longer carries the image payload.
+
+    Args:
+        content: Message content (string or list of content blocks)
+        images: Data URLs extracted from the response
+
+    Returns:
+        (content with images replaced, list of image references)
+    """
+    references = []
+    urls = {}
+
+    for data_url in images:
+        if data_url in urls:
+            continue
+        try:
+            reference = store_data_url(data_url)
+        except OSError as e:
+            print(f"Failed to store generated image: {e}")
+            reference = None
+        if reference is not None:
+            urls[data_url] = reference["url"]
+            references.append(reference)
+
+    if isinstance(content, str) and urls:
+        content = DATA_URL_PATTERN.sub(lambda m: urls.get(m.group(0), m.group(0)), content)
+
+    return content, references
+
+
+def mime_type_for(blob_id: str) -> str:
+    """Get the MIME type of a blob from its extension."""
+    return _MIME_TYPES.get(blob_id.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+def get_blob_path(blob_id: str) -> Optional[str]:
+    """
+    Resolve a blob id to its file.
+
+    Args:
+        blob_id: Blob identifier ("<sha256>.<ext>")
+
+    Returns:
+        Path to the blob, or None if the id is invalid or unknown
+    """
+    if not BLOB_ID_PATTERN.match(blob_id):
+        return None
+    path = _blob_file(blob_id)
+    return path if os.path.isfile(path) else None
+
+
+def get_thumbnail_path(blob_id: str, size: int) -> Optional[str]:
+    """
+    Get (generating on first use) a PNG thumbnail for a blob.
+
+    Args:
+        blob_id: Blob identifier
+        size: Longest edge in pixels; must be one of IMAGE_THUMBNAIL_SIZES
+
+    Returns:
+        Path to the thumbnail, or None if Pillow is unavailable, the size is
+        not allowed, or the blob is missing or not a raster image
+    """
+    if not PIL_AVAILABLE or size not in IMAGE_THUMBNAIL_SIZES:
+        return None
+
+    source = get_blob_path(blob_id)
+    if source is None:
+        return None
+
+    path = _thumbnail_file(blob_id, size)
+    if os.path.isfile(path):
+        return path
+
+    try:
+        with Image.open(source) as image:
+            image.thumbnail((size, size))
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+    except (OSError, ValueError) as e:
+        print(f"Failed to generate thumbnail for {blob_id}: {e}")
+        return None
+
+    return path
+
+
+def get_blob_stats() -> Dict[str, Any]:
+    """
+    Get blob store counters.
+
+    Returns:
+        Dict with blobs written, writes skipped by deduplication, and thumbnail support
+    """
+    return {**_stats, "thumbnails_available": PIL_AVAILABLE}
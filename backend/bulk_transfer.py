@@ -0,0 +1,377 @@
+"""Streaming bulk export and import of conversations as NDJSON.
+
+Each line holds one conversation ({"id", "created_at", "title", "messages"}).
+Streams can be gzip- or zstd-compressed (zstd needs the optional
+`zstandard` package). Both directions work one conversation, or one batch,
+at a time, so memory stays bounded however large the store is.
+
+Usage:
+    python -m backend.bulk_transfer export backup.ndjson.gz [--since ...] [--until ...]
+    python -m backend.bulk_transfer import backup.ndjson.gz [--replace]
+"""
+
+import argparse
+import time
+import zlib
+from typing import List, Dict, Any, Optional, Iterator, Callable
+try:
+    from .config import EXPORT_PAGE_SIZE, IMPORT_BATCH_SIZE
+    from .storage_base import StorageBackend, encode_cursor, is_valid_conversation_id, MESSAGE_ROLES
+    from . import serialization
+except ImportError:
+    from config import EXPORT_PAGE_SIZE, IMPORT_BATCH_SIZE
+    from storage_base import StorageBackend, encode_cursor, is_valid_conversation_id, MESSAGE_ROLES
+    import serialization
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+FILE_EXTENSIONS = {"none": ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+MEDIA_TYPES = {"none": "application/x-ndjson", "gzip": "application/gzip", "zstd": "application/zstd"}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Uncompressed bytes collected before a chunk is compressed and yielded
+EXPORT_CHUNK_BYTES = 256 * 1024
+
+# Import errors reported individually (the rest are only counted)
+MAX_REPORTED_ERRORS = 20
+
+_last_runs: Dict[str, Optional[Dict[str, Any]]] = {"export": None, "import": None}
+
+
+def _throughput(stats: Dict[str, Any], start: float) -> Dict[str, Any]:
+    """Add elapsed seconds and per-second rates to transfer counters."""
+    seconds = max(time.monotonic() - start, 1e-9)
+    return {
+        **stats,
+        "seconds": round(seconds, 3),
+        "conversations_per_second": round(stats["conversations"] / seconds, 1),
+        "messages_per_second": round(stats["messages"] / seconds, 1),
+        "mb_per_second": round(stats["bytes"] / seconds / 1e6, 2),
+    }
+
+
+def _compressor(compression: str):
+    """Streaming compressor with compress()/flush(), or None for plain NDJSON."""
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression requires the zstandard package")
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    if compression == "none":
+        return None
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def iter_conversations(
+    backend: StorageBackend,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    page_size: int = EXPORT_PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield stored conversations oldest first, one at a time.
+
+    Args:
+        backend: Storage backend to read
+        since: Only conversations created at or after this ISO timestamp
+        until: Only conversations created before this ISO timestamp
+        page_size: Conversations listed per index query
+
+    Yields:
+        Full conversation dicts
+    """
+    # A bare timestamp is a valid cursor: the page starts at the first conversation created at or after it
+    cursor = since
+    while True:
+        page = backend.list_conversations(page_size, cursor, "asc")
+        for metadata in page:
+            if until and metadata["created_at"] >= until:
+                return
+            messages = backend.get_messages(metadata["id"])
+            if messages is None:
+                continue
+            yield {
+                "id": metadata["id"],
+                "created_at": metadata["created_at"],
+                "title": metadata["title"],
+                "messages": messages,
+            }
+        if len(page) < page_size:
+            return
+        cursor = encode_cursor(page[-1])
+
+
+def export_ndjson(
+    backend: StorageBackend,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    compression: str = "none"
+) -> Iterator[bytes]:
+    """
+    Stream conversations as (optionally compressed) NDJSON.
+
+    Throughput is recorded for get_transfer_stats() when the stream ends.
+
+    Args:
+        backend: Storage backend to read
+        since: Only conversations created at or after this ISO timestamp
+        until: Only conversations created before this ISO timestamp
+        compression: "none", "gzip" or "zstd"
+
+    Yields:
+        Chunks of the output stream
+    """
+    compressor = _compressor(compression)
+    start = time.monotonic()
+    stats = {"conversations": 0, "messages": 0, "bytes": 0, "compressed_bytes": 0}
+
+    def emit(data: bytes) -> bytes:
+        stats["bytes"] += len(data)
+        if compressor is not None:
+            data = compressor.compress(data)
+        stats["compressed_bytes"] += len(data)
+        return data
+
+    buffer: List[bytes] = []
+    buffered = 0
+    for conversation in iter_conversations(backend, since, until):
+        line = serialization.dumpb(conversation) + b"\n"
+        stats["conversations"] += 1
+        stats["messages"] += len(conversation["messages"])
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= EXPORT_CHUNK_BYTES:
+            chunk = emit(b"".join(buffer))
+            buffer, buffered = [], 0
+            if chunk:
+                yield chunk
+
+    tail = emit(b"".join(buffer))
+    if compressor is not None:
+        flushed = compressor.flush()
+        stats["compressed_bytes"] += len(flushed)
+        tail += flushed
+    if tail:
+        yield tail
+
+    result = _throughput({**stats, "compression": compression}, start)
+    _last_runs["export"] = result
+    print(f"Exported conversations: {result}")
+
+
+class NDJSONImporter:
+    """
+    Incremental parser for exported NDJSON, fed one chunk at a time.
+
+    Compression is detected from the first bytes. Complete lines are parsed
+    as they arrive and saved in batches, so only one batch and one partial
+    line are held in memory.
+    """
+
+    def __init__(
+        self,
+        save_batch: Callable[[List[Dict[str, Any]]], None],
+        exists: Callable[[str], bool],
+        replace: bool = False,
+        batch_size: int = IMPORT_BATCH_SIZE
+    ):
+        """
+        Args:
+            save_batch: Stores a list of conversations (e.g. storage.save_conversations)
+            exists: Whether a conversation id is already stored
+            replace: Overwrite existing conversations instead of skipping them
+            batch_size: Conversations per save_batch call
+        """
+        self.save_batch = save_batch
+        self.exists = exists
+        self.replace = replace
+        self.batch_size = batch_size
+
+        self._decompressor = None
+        self._detected = False
+        self._head = b""
+        self._partial = b""
+        self._line_number = 0
+        self._batch: List[Dict[str, Any]] = []
+        self._start = time.monotonic()
+        self.stats = {
+            "conversations": 0,
+            "messages": 0,
+            "skipped": 0,
+            "failed": 0,
+            "bytes": 0,
+            "compression": "none",
+            "errors": [],
+        }
+
+    def _detect(self, data: bytes) -> bytes:
+        """Pick a decompressor from the stream's magic bytes."""
+        self._head += data
+        if len(self._head) < len(ZSTD_MAGIC):
+            return b""
+        data, self._head = self._head, b""
+        self._detected = True
+
+        if data.startswith(GZIP_MAGIC):
+            self.stats["compression"] = "gzip"
+            self._decompressor = zlib.decompressobj(47)
+        elif data.startswith(ZSTD_MAGIC):
+            if not ZSTD_AVAILABLE:
+                raise ValueError("zstd-compressed input requires the zstandard package")
+            self.stats["compression"] = "zstd"
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        return data
+
+    def feed(self, data: bytes):
+        """
+        Consume the next chunk of the (possibly compressed) stream.
+
+        Raises:
+            ValueError: If the stream can't be decompressed
+        """
+        if not self._detected:
+            data = self._detect(data)
+            if not data:
+                return
+        if self._decompressor is not None:
+            try:
+                data = self._decompressor.decompress(data)
+            except Exception as e:
+                raise ValueError(f"corrupt {self.stats['compression']} stream: {e}")
+        self._consume(data)
+
+    def _consume(self, data: bytes):
+        self.stats["bytes"] += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+
+    def _parse_line(self, line: bytes):
+        self._line_number += 1
+        if not line.strip():
+            return
+        try:
+            conversation = serialization.loads(line)
+            missing = [key for key in ("id", "created_at", "messages") if key not in conversation]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+            if not is_valid_conversation_id(conversation["id"]):
+                raise ValueError("id must be a uuid or contain only letters, digits, '-' and '_'")
+            if not isinstance(conversation["messages"], list):
+                raise ValueError("messages is not a list")
+            for position, message in enumerate(conversation["messages"]):
+                if not isinstance(message, dict) or message.get("role") not in MESSAGE_ROLES:
+                    raise ValueError(f"message {position} is not a user or assistant message")
+        except (ValueError, TypeError) as e:
+            self.stats["failed"] += 1
+            if len(self.stats["errors"]) < MAX_REPORTED_ERRORS:
+                self.stats["errors"].append({"line": self._line_number, "error": str(e)})
+            return
+
+        if not self.replace and self.exists(conversation["id"]):
+            self.stats["skipped"] += 1
+            return
+
+        self._batch.append(conversation)
+        if len(self._batch) >= self.batch_size:
+            self._save()
+
+    def _save(self):
+        batch, self._batch = self._batch, []
+        self.save_batch(batch)
+        self.stats["conversations"] += len(batch)
+        self.stats["messages"] += sum(len(conversation["messages"]) for conversation in batch)
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Parse whatever is left and save the last batch.
+
+        Returns:
+            Dict with imported conversations and messages, skipped and failed
+            lines, the first errors, and throughput
+
+        Raises:
+            ValueError: If a compressed stream was truncated
+        """
+        if not self._detected and self._head:
+            data, self._head = self._head, b""
+            self._detected = True
+            self._consume(data)
+        elif self._decompressor is not None:
+            if hasattr(self._decompressor, "flush"):
+                self._consume(self._decompressor.flush())
+            if not getattr(self._decompressor, "eof", True):
+                # Earlier batches are stored; re-importing skips them
+                raise ValueError(f"{self.stats['compression']} stream ended early")
+        if self._partial:
+            self._parse_line(self._partial)
+            self._partial = b""
+        if self._batch:
+            self._save()
+
+        result = _throughput(self.stats, self._start)
+        _last_runs["import"] = {key: value for key, value in result.items() if key != "errors"}
+        print(f"Imported conversations: {_last_runs['import']}")
+        return result
+
+
+def get_transfer_stats() -> Dict[str, Any]:
+    """
+    Get the throughput of the last export and import.
+
+    Returns:
+        Dict with "export" and "import" results (None if not run yet)
+    """
+    return {**_last_runs, "zstd_available": ZSTD_AVAILABLE}
+
+
+if __name__ == "__main__":
+    try:
+        from . import storage
+    except ImportError:
+        import storage
+
+    parser = argparse.ArgumentParser(description="Export or import conversations as NDJSON.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write conversations to a file")
+    export_parser.add_argument("path", help="Output file (compression follows .gz/.zst unless --compression is given)")
+    export_parser.add_argument("--since", help="Only conversations created at or after this ISO timestamp")
+    export_parser.add_argument("--until", help="Only conversations created before this ISO timestamp")
+    export_parser.add_argument("--compression", choices=COMPRESSIONS)
+
+    import_parser = subparsers.add_parser("import", help="Read conversations from a file")
+    import_parser.add_argument("path", help="NDJSON file, optionally gzip or zstd compressed")
+    import_parser.add_argument("--replace", action="store_true", help="Overwrite existing conversations")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            compression = args.compression or (
+                "gzip" if args.path.endswith(".gz") else "zstd" if args.path.endswith(".zst") else "none"
+            )
+            with open(args.path, "wb") as f:
+                for chunk in export_ndjson(storage.get_backend(), args.since, args.until, compression):
+                    f.write(chunk)
+        else:
+            importer = NDJSONImporter(
+                storage.save_conversations,
+                lambda conversation_id: storage.get_metadata(conversation_id) is not None,
+                args.replace
+            )
+            with open(args.path, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    importer.feed(chunk)
+            importer.finish()
+    finally:
+        storage.close()
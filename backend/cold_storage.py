@@ -0,0 +1,132 @@
+"""Compressed cold tier for conversations nobody has touched in a while.
+
+Backends implement StorageBackend.archive_cold(): the JSON backend repacks
+<id>.json into compact, compressed <id>.json.zst (or .json.gz), and the
+SQLite backend compresses the stage payloads of cold conversations in
+place. Reads decompress transparently and the next write makes the
+conversation hot again.
+
+Usage:
+    python -m backend.cold_storage [--days 30]
+"""
+
+import argparse
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+try:
+    from .config import COLD_TIER_AFTER_DAYS
+    from .storage_base import StorageBackend
+except ImportError:
+    from config import COLD_TIER_AFTER_DAYS
+    from storage_base import StorageBackend
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 9
+
+# File suffix written for cold conversations; both are read
+COLD_SUFFIX = ".zst" if ZSTD_AVAILABLE else ".gz"
+COLD_SUFFIXES = (".zst", ".gz")
+
+# Cold conversation files of the JSON backend: <id>.json.zst or <id>.json.gz
+JSON_COLD_SUFFIXES = tuple(f".json{suffix}" for suffix in COLD_SUFFIXES)
+
+_last_run: Optional[Dict[str, Any]] = None
+
+
+def compress(data: bytes) -> bytes:
+    """Compress with zstd if available, gzip otherwise."""
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompress data written by compress() (the format is detected).
+
+    Raises:
+        ValueError: If the data is corrupt, or zstd data is found but
+            zstandard is not installed
+    """
+    if data.startswith(ZSTD_MAGIC):
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd-compressed data requires the zstandard package")
+        try:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"corrupt zstd data: {e}")
+    try:
+        return zlib.decompress(data, 47)
+    except zlib.error as e:
+        raise ValueError(f"corrupt gzip data: {e}")
+
+
+def run_tiering(backend: StorageBackend, older_than_days: float = COLD_TIER_AFTER_DAYS) -> Dict[str, Any]:
+    """
+    Move conversations not modified for older_than_days into the cold tier.
+
+    Args:
+        backend: Storage backend to repack
+        older_than_days: Minimum age of the last modification
+
+    Returns:
+        Dict with repacked conversations, bytes before and after, disk bytes
+        saved, memory freed from the conversation cache, and elapsed seconds
+    """
+    global _last_run
+    start = time.monotonic()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    try:
+        stats = backend.archive_cold(cutoff)
+    except NotImplementedError:
+        stats = {"supported": False, "conversations": 0, "bytes_before": 0, "bytes_after": 0}
+
+    stats.pop("ids", None)
+    result = {
+        "supported": True,
+        "backend": backend.name,
+        "older_than_days": older_than_days,
+        **stats,
+        "disk_bytes_saved": stats["bytes_before"] - stats["bytes_after"],
+        "compression_ratio": round(stats["bytes_before"] / stats["bytes_after"], 2) if stats["bytes_after"] else None,
+        "memory_bytes_freed": stats.get("memory_bytes_freed", 0),
+        "codec": "zstd" if ZSTD_AVAILABLE else "gzip",
+        "seconds": round(time.monotonic() - start, 2),
+    }
+    _last_run = result
+    if result["conversations"]:
+        print(f"Moved conversations to cold storage: {result}")
+    return result
+
+
+def get_cold_storage_stats() -> Optional[Dict[str, Any]]:
+    """Get the result of the last tiering run (None if it hasn't run yet)."""
+    return _last_run
+
+
+if __name__ == "__main__":
+    try:
+        from .config import STORAGE_BACKEND
+        from .storage import create_backend
+    except ImportError:
+        from config import STORAGE_BACKEND
+        from storage import create_backend
+
+    parser = argparse.ArgumentParser(description="Move old conversations into compressed cold storage.")
+    parser.add_argument("--days", type=float, default=COLD_TIER_AFTER_DAYS, help="Minimum days since last modification")
+    parser.add_argument("--backend", default=STORAGE_BACKEND, help="Storage backend to repack")
+    args = parser.parse_args()
+
+    backend = create_backend(args.backend)
+    print(run_tiering(backend, args.days))
+    backend.close()
@@ -14,6 +14,75 @@ OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 # Data directory for conversation storage
 DATA_DIR = "data/conversations"
 
+# Storage backend: "sqlite" (default), "json" (one file per conversation)
+# or "log" (append-only JSONL event log per conversation)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+
+# SQLite database used by the "sqlite" backend
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/council.db")
+
+# Metadata index (JSONL journal) used to list conversations of the "json" backend
+JSON_INDEX_PATH = os.getenv("JSON_INDEX_PATH", "data/conversations.index.jsonl")
+
+# Indent the "json" backend's conversation files (compact by default)
+JSON_STORAGE_PRETTY = os.getenv("JSON_STORAGE_PRETTY", "false").lower() in ("1", "true", "yes")
+
+# Event logs and metadata index used by the "log" backend
+LOG_DATA_DIR = os.getenv("LOG_DATA_DIR", "data/conversation_logs")
+LOG_INDEX_PATH = os.getenv("LOG_INDEX_PATH", "data/conversation_logs.index.jsonl")
+
+# Events appended since the last snapshot before a log is compacted in the background
+LOG_COMPACT_EVENTS = int(os.getenv("LOG_COMPACT_EVENTS", "50"))
+
+# Full-text search index (SQLite FTS5) over stored messages
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "data/search.db")
+
+# Also index every stage 1 response (user messages and stage 3 answers always are)
+SEARCH_INDEX_STAGE1 = os.getenv("SEARCH_INDEX_STAGE1", "false").lower() in ("1", "true", "yes")
+
+# Model leaderboard totals (SQLite), updated as assistant messages are stored
+LEADERBOARD_PATH = os.getenv("LEADERBOARD_PATH", "data/leaderboard.db")
+
+# Conversations listed per index query during an NDJSON export
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+# Conversations written per storage batch during an NDJSON import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "200"))
+
+# Conversations not modified for this many days are repacked into compressed cold storage
+COLD_TIER_AFTER_DAYS = float(os.getenv("COLD_TIER_AFTER_DAYS", "30"))
+
+# Hours between cold-tiering runs in the server (0 disables; python -m backend.cold_storage runs it once)
+COLD_TIER_INTERVAL_HOURS = float(os.getenv("COLD_TIER_INTERVAL_HOURS", "24"))
+
+# Worker threads running storage I/O off the event loop
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS", "4"))
+
+# Memory budget (approximate bytes) of the write-back conversation cache; 0 (the default)
+# disables it. Only enable it when this process is the store's only writer: the cache is
+# not invalidated by other workers' writes, and changes reach the store up to one flush
+# interval after they are acknowledged (a crash in between loses them).
+CONVERSATION_CACHE_MAX_BYTES = int(os.getenv("CONVERSATION_CACHE_MAX_BYTES", "0"))
+
+# Seconds between write-backs of cached conversation changes
+CONVERSATION_CACHE_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_CACHE_FLUSH_INTERVAL", "1.0"))
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Shared HTTP client (connection pool) configuration
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Upper bound on open connections across all hosts
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+
+# Connections kept alive in the pool while idle
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Seconds an idle keep-alive connection is retained
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# Multiplex requests over HTTP/2 when the h2 package is installed
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Council Modes Configuration
 # ═══════════════════════════════════════════════════════════════════════════
@@ -53,6 +122,182 @@ IMAGE_GENERATION_CONFIG = {
     }
 }
 
+# ═══════════════════════════════════════════════════════════════════════════
+# Stage quorum policy (stages 1 and 2)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# A stage advances once `min_responses` models have answered (0 = wait for all),
+# or `soft_deadline` seconds after the first answer (0 = no deadline).
+# Stragglers are either "cancel"led or left to finish in the "background"
+# and attached to the stored message as late results.
+STAGE_QUORUM = {
+    "default": {
+        "min_responses": int(os.getenv("QUORUM_MIN_RESPONSES", "0")),
+        "soft_deadline": float(os.getenv("QUORUM_SOFT_DEADLINE", "0")),
+        "stragglers": os.getenv("QUORUM_STRAGGLERS", "cancel"),
+    },
+    # Per-mode overrides, e.g. to stop a slow reasoning model holding up code mode:
+    # "code": {"min_responses": 3, "soft_deadline": 30.0, "stragglers": "background"},
+}
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Stage 2 peer review
+# ═══════════════════════════════════════════════════════════════════════════
+
+# "full": every judge ranks every response, so review prompts grow as N².
+# "sampled": each judge ranks `size` responses other than its own, spread
+# so every response gets about the same number of reviews; review tokens
+# grow linearly with council size.
+# "auto": "full" for up to `full_max` responses, "sampled" above that.
+#
+# "output": "text" (default) asks for a free-form evaluation ending in a
+# FINAL RANKING list. "json" asks judges for a schema-constrained JSON verdict
+# (a score and a one-sentence rationale per response plus the ordered
+# ranking), capped at `max_tokens` output tokens; not every model honours
+# response_format, so opt in per mode or with STAGE2_OUTPUT=json. JSON
+# verdicts that fail validation fall back to the text parser.
+STAGE2_REVIEW = {
+    "default": {
+        "strategy": os.getenv("STAGE2_REVIEW_STRATEGY", "auto"),
+        "size": int(os.getenv("STAGE2_REVIEW_SIZE", "4")),
+        "full_max": int(os.getenv("STAGE2_FULL_REVIEW_MAX", "8")),
+        "output": os.getenv("STAGE2_OUTPUT", "text"),
+        "max_tokens": int(os.getenv("STAGE2_MAX_TOKENS", "800")),
+        "rationale": os.getenv("STAGE2_RATIONALE", "true").lower() in ("1", "true", "yes"),
+    },
+    # Per-mode overrides, e.g. always sample in image mode:
+    # "image": {"strategy": "sampled", "size": 3},
+    # or structured verdicts for chat:
+    # "chat": {"output": "json"},
+}
+
+# Consensus shortcut: before stage 2, every pair of stage 1 responses is
+# compared (hashed text embeddings, see text_similarity.py). When even the
+# least similar pair scores at least `threshold`, the council already agrees:
+# "single_judge" has only the chairman rank the responses, "skip" goes
+# straight to the chairman, "off" (default) always runs the full review.
+# The similarity is lexical and can't see contradictions ("... is Canberra"
+# vs "... is Sydney" scores about 0.78), so only opt in for modes where
+# answers are long enough to compare, and keep the threshold high.
+STAGE2_CONSENSUS = {
+    "default": {
+        "action": os.getenv("STAGE2_CONSENSUS_ACTION", "off"),
+        "threshold": float(os.getenv("STAGE2_CONSENSUS_THRESHOLD", "0.9")),
+    },
+    # Response text says little about how alike the generated images are
+    "image": {"action": "off"},
+    # Per-mode opt-in, e.g. let the chairman judge near-identical code answers:
+    # "code": {"action": "single_judge", "threshold": 0.95},
+}
+
+# How stage 2 rankings are combined into the aggregate ranking: "mean_rank",
+# "borda", "copeland", "kemeny" or "bradley_terry" (see rank_aggregation.py).
+# "auto" uses mean_rank when every judge ranked every response and
+# bradley_terry for sampled (partial) reviews, where mean positions are
+# skewed by which responses a judge happened to see.
+RANK_AGGREGATION_METHOD = os.getenv("RANK_AGGREGATION_METHOD", "auto")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Adaptive timeouts and hedged requests
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Per-model latency histograms, persisted across restarts
+LATENCY_STATS_PATH = os.getenv("LATENCY_STATS_PATH", "data/latency_stats.json")
+
+# Timeout used until a model has enough latency history
+DEFAULT_MODEL_TIMEOUT = 120.0
+
+# Samples needed before a model's histogram drives its timeout and hedging
+LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", "20"))
+
+# Adaptive timeout = p99 latency x multiplier, clamped to [min, max] seconds
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2.0"))
+ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "20"))
+ADAPTIVE_TIMEOUT_MAX = float(os.getenv("ADAPTIVE_TIMEOUT_MAX", "300"))
+
+# Fire a duplicate request once a call runs past the model's p95 latency
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Hedge to a different model instead of repeating the same one
+HEDGE_BACKUP_MODELS = {
+    # "deepseek/deepseek-r1-distill-qwen-32b": "deepseek/deepseek-r1",
+}
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Per-model circuit breaker and adaptive concurrency (AIMD) limits
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Consecutive failures (5xx, 429, timeouts) that open a model's circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+
+# Seconds an open circuit fails fast before a half-open probe is allowed
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+# Concurrent requests per model: start, floor and ceiling of the AIMD limit
+AIMD_INITIAL_LIMIT = float(os.getenv("AIMD_INITIAL_LIMIT", "8"))
+AIMD_MIN_LIMIT = float(os.getenv("AIMD_MIN_LIMIT", "1"))
+AIMD_MAX_LIMIT = float(os.getenv("AIMD_MAX_LIMIT", "32"))
+
+# Multiplicative decrease applied to the limit on 429 / overload
+AIMD_BACKOFF = float(os.getenv("AIMD_BACKOFF", "0.5"))
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Model response cache
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Cache identical (model, messages, modalities) calls
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Entries kept in the in-memory LRU tier
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+# Seconds a cached response stays valid (both tiers)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+
+# Optional on-disk tier, evicting oldest entries beyond the size cap
+RESPONSE_CACHE_DISK_ENABLED = os.getenv("RESPONSE_CACHE_DISK_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "data/cache/responses")
+RESPONSE_CACHE_DISK_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Modes that always query the models (image generation should vary per run)
+RESPONSE_CACHE_DISABLED_MODES = {"image"}
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Semantic cache for whole council results
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Reuse a stored council result when a near-identical question is asked again
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Modes whose results may be served from the semantic cache
+SEMANTIC_CACHE_MODES = {"chat", "code"}
+
+# Cosine similarity (0-1) of query embeddings required for a hit
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# Seconds a cached council result stays valid
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Entries kept per mode before the oldest are replaced
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "50000"))
+
+# Dimensionality of the hashed query embedding
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "256"))
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Generated image storage
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Content-addressed store for decoded images; results only keep references
+IMAGE_BLOB_DIR = os.getenv("IMAGE_BLOB_DIR", "data/blobs/images")
+
+# Blobs never change for a given hash, so clients may cache them indefinitely
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", str(365 * 24 * 3600)))
+
+# Thumbnail edge lengths (px) the server will generate; requires Pillow
+IMAGE_THUMBNAIL_SIZES = (128, 256, 512)
+IMAGE_THUMBNAIL_DEFAULT_SIZE = 256
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Helper functions to get mode-specific configuration
 # ═══════════════════════════════════════════════════════════════════════════
@@ -77,6 +322,24 @@ def get_chairman_model(mode: str = "chat"):
     else:
         return CHAT_CHAIRMAN_MODEL
 
+def get_quorum_policy(mode: str = "chat"):
+    """Get the stage quorum policy for the specified mode."""
+    policy = dict(STAGE_QUORUM["default"])
+    policy.update(STAGE_QUORUM.get(mode.lower(), {}))
+    return policy
+
+def get_stage2_review_policy(mode: str = "chat"):
+    """Get the stage 2 review policy for the specified mode."""
+    policy = dict(STAGE2_REVIEW["default"])
+    policy.update(STAGE2_REVIEW.get(mode.lower(), {}))
+    return policy
+
+def get_consensus_policy(mode: str = "chat"):
+    """Get the stage 2 consensus shortcut policy for the specified mode."""
+    policy = dict(STAGE2_CONSENSUS["default"])
+    policy.update(STAGE2_CONSENSUS.get(mode.lower(), {}))
+    return policy
+
 # Legacy aliases for backward compatibility
 COUNCIL_MODELS = CHAT_COUNCIL_MODELS
 CHAIRMAN_MODEL = CHAT_CHAIRMAN_MODEL
@@ -0,0 +1,341 @@
+"""Write-back LRU cache of parsed conversations in front of a storage backend."""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+try:
+    from .storage_base import StorageBackend, Mutation, apply_mutation, conversation_metadata, slice_messages
+    from . import serialization
+except ImportError:
+    from storage_base import StorageBackend, Mutation, apply_mutation, conversation_metadata, slice_messages
+    import serialization
+
+
+def _approx_size(value: Any) -> int:
+    """Approximate memory cost of a cached value (its JSON length)."""
+    return len(serialization.dumpb(value, default=str))
+
+
+def _copy_for_update(conversation: Dict[str, Any], mutations: List[Mutation]) -> Dict[str, Any]:
+    """
+    Copy the parts of a conversation that the mutations will modify.
+
+    Cached conversations are handed to readers without copying, so they are
+    never modified in place: mutations are applied to this copy, which then
+    replaces the cached one.
+    """
+    updated = {**conversation, "messages": list(conversation["messages"])}
+    messages = updated["messages"]
+    for operation, args in mutations:
+        if operation == "attach_late_result" and 0 <= args[0] < len(messages):
+            message = dict(messages[args[0]])
+            message["late_results"] = {
+                stage: list(results) for stage, results in message.get("late_results", {}).items()
+            }
+            messages[args[0]] = message
+    return updated
+
+
+class _Entry:
+    """A cached conversation and the mutations not yet written to the backend."""
+
+    def __init__(self, conversation: Dict[str, Any]):
+        self.conversation = conversation
+        self.size = _approx_size(conversation)
+        self.pending: List[Mutation] = []
+        self.flushing = False
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.pending) or self.flushing
+
+
+class CachedStorage(StorageBackend):
+    """
+    Keeps recently used conversations in memory and writes changes back lazily.
+
+    Reads of cached conversations never touch the backend. Mutations are
+    applied to the cached copy and queued; a background thread writes each
+    conversation's queued mutations in one backend.apply_mutations() call
+    every flush_interval seconds, and close() flushes whatever is left.
+
+    The cache is bounded by the approximate size of its entries (their JSON
+    length). Only clean entries are evicted, so the budget can be exceeded
+    briefly until the next flush.
+
+    It assumes this process is the only writer of the store.
+    """
+
+    def __init__(self, backend: StorageBackend, max_bytes: int, flush_interval: float = 1.0):
+        """
+        Args:
+            backend: Backend to read from and write back to
+            max_bytes: Approximate memory budget for cached conversations
+            flush_interval: Seconds between background flushes
+        """
+        self.backend = backend
+        self.name = backend.name
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "flushes": 0,
+            "flushed_mutations": 0,
+            "flush_errors": 0,
+        }
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="conversation-cache-flush", daemon=True)
+        self._flusher.start()
+
+    def _put(self, conversation: Dict[str, Any]) -> _Entry:
+        """Insert or replace a clean entry (lock held)."""
+        old = self._entries.pop(conversation["id"], None)
+        if old is not None:
+            self._bytes -= old.size
+        entry = _Entry(conversation)
+        self._entries[conversation["id"]] = entry
+        self._bytes += entry.size
+        self._trim()
+        return entry
+
+    def _trim(self):
+        """Evict least recently used clean entries until within budget (lock held)."""
+        if self._bytes <= self.max_bytes:
+            return
+        for conversation_id in list(self._entries):
+            entry = self._entries[conversation_id]
+            if entry.dirty:
+                continue
+            del self._entries[conversation_id]
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
+            if self._bytes <= self.max_bytes:
+                return
+
+    def _load(self, conversation_id: str) -> Optional[_Entry]:
+        """Get a cached entry, loading it from the backend on a miss."""
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                self._entries.move_to_end(conversation_id)
+                self._stats["hits"] += 1
+                return entry
+            self._stats["misses"] += 1
+
+        conversation = self.backend.get_conversation(conversation_id)
+        if conversation is None:
+            return None
+
+        with self._lock:
+            # Another thread may have loaded (and modified) it meanwhile
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                entry = self._put(conversation)
+            return entry
+
+    def flush(self) -> int:
+        """
+        Write every conversation's queued mutations to the backend.
+
+        Returns:
+            Number of mutations written
+        """
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                batches = []
+                for conversation_id, entry in self._entries.items():
+                    if entry.pending:
+                        batches.append((conversation_id, entry, entry.pending))
+                        entry.pending = []
+                        entry.flushing = True
+
+            for conversation_id, entry, mutations in batches:
+                try:
+                    self.backend.apply_mutations(conversation_id, mutations)
+                    written += len(mutations)
+                    self._stats["flushes"] += 1
+                except Exception as e:
+                    print(f"Failed to write back conversation {conversation_id}: {e}")
+                    self._stats["flush_errors"] += 1
+                    with self._lock:
+                        entry.pending = mutations + entry.pending
+                finally:
+                    entry.flushing = False
+
+            with self._lock:
+                self._stats["flushed_mutations"] += written
+                self._trim()
+        return written
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Conversation cache flush failed: {e}")
+
+    def create_conversation(self, conversation_id: str) -> Dict[str, Any]:
+        conversation = self.backend.create_conversation(conversation_id)
+        with self._lock:
+            self._put(conversation)
+        return conversation
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._load(conversation_id)
+        return entry.conversation if entry else None
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        self.save_conversations([conversation])
+
+    def save_conversations(self, conversations: List[Dict[str, Any]]):
+        # No flush may be writing the old copies, and no mutation may be
+        # applied to them, until the new contents are stored; mutations
+        # queued for them are superseded and dropped with the entries
+        with self._flush_lock, self._lock:
+            for conversation in conversations:
+                entry = self._entries.pop(conversation["id"], None)
+                if entry is not None:
+                    self._bytes -= entry.size
+            self.backend.save_conversations(conversations)
+
+    def list_conversations(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        page = self.backend.list_conversations(limit, before, order)
+        with self._lock:
+            # Cached copies may hold titles and messages not yet written back
+            return [
+                conversation_metadata(self._entries[meta["id"]].conversation)
+                if meta["id"] in self._entries else meta
+                for meta in page
+            ]
+
+    def get_metadata(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                return conversation_metadata(entry.conversation)
+        return self.backend.get_metadata(conversation_id)
+
+    def get_messages(
+        self,
+        conversation_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        stages: Optional[Tuple[str, ...]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        # Partial reads don't pull the whole conversation into the cache
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                self._entries.move_to_end(conversation_id)
+                self._stats["hits"] += 1
+                return slice_messages(entry.conversation["messages"], offset, limit, stages)
+            self._stats["misses"] += 1
+        return self.backend.get_messages(conversation_id, offset, limit, stages)
+
+    def apply_mutations(self, conversation_id: str, mutations: List[Mutation]) -> List[Any]:
+        """Apply mutations to the cached conversation and queue them for write-back."""
+        if self._load(conversation_id) is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                # Evicted between loading and locking; it was clean, so reload
+                conversation = self.backend.get_conversation(conversation_id)
+                if conversation is None:
+                    raise ValueError(f"Conversation {conversation_id} not found")
+                entry = self._put(conversation)
+
+            updated = _copy_for_update(entry.conversation, mutations)
+            results = [apply_mutation(updated, mutation) for mutation in mutations]
+
+            growth = sum(_approx_size(args) for _, args in mutations)
+            entry.conversation = updated
+            entry.pending.extend(mutations)
+            entry.size += growth
+            self._bytes += growth
+            self._entries.move_to_end(conversation_id)
+            return results
+
+    def add_user_message(self, conversation_id: str, content: str):
+        self.apply_mutations(conversation_id, [("add_user_message", (content,))])
+
+    def add_assistant_message(
+        self,
+        conversation_id: str,
+        stage1: List[Dict[str, Any]],
+        stage2: List[Dict[str, Any]],
+        stage3: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        return self.apply_mutations(
+            conversation_id, [("add_assistant_message", (stage1, stage2, stage3, metadata))]
+        )[0]
+
+    def attach_late_result(
+        self,
+        conversation_id: str,
+        message_index: int,
+        stage: str,
+        result: Dict[str, Any]
+    ):
+        self.apply_mutations(conversation_id, [("attach_late_result", (message_index, stage, result))])
+
+    def update_conversation_title(self, conversation_id: str, title: str):
+        self.apply_mutations(conversation_id, [("update_conversation_title", (title,))])
+
+    def archive_cold(self, cutoff: datetime) -> Dict[str, Any]:
+        """Write back queued changes, repack cold conversations, and drop them from the cache."""
+        self.flush()
+        stats = self.backend.archive_cold(cutoff)
+
+        freed = 0
+        with self._lock:
+            for conversation_id in stats.get("ids", []):
+                entry = self._entries.get(conversation_id)
+                if entry is not None and not entry.dirty:
+                    del self._entries[conversation_id]
+                    self._bytes -= entry.size
+                    freed += entry.size
+        return {**stats, "memory_bytes_freed": freed}
+
+    def close(self):
+        """Stop the flusher, write back everything queued, and close the backend."""
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with hits, misses, hit ratio, entries, approximate bytes
+            used, dirty entries and write-back counters
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "dirty_entries": sum(1 for entry in self._entries.values() if entry.dirty),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -1,20 +1,41 @@
 """3-stage LLM Council orchestration with multi-mode support."""
 
-from typing import List, Dict, Any, Tuple, Optional
+import asyncio
+import random
+import re
+import zlib
+from typing import List, Dict, Any, Tuple, Optional, Callable, AsyncIterator
+
+import numpy as np
+
 try:
-    from .openrouter import query_models_parallel, query_model
+    from .openrouter import query_models_as_completed, query_model, query_model_streaming
     from .config import (
         COUNCIL_MODELS, CHAIRMAN_MODEL,
-        get_council_models, get_chairman_model
+        get_council_models, get_chairman_model, get_quorum_policy,
+        get_stage2_review_policy, get_consensus_policy, RANK_AGGREGATION_METHOD
     )
-    from .web_search import get_search_context
+    from .web_search import get_search_context, needs_web_search
+    from . import resilience
+    from . import semantic_cache
+    from . import rank_aggregation
+    from . import serialization
+    from .response_cache import cache_enabled_for_mode
+    from .text_similarity import pairwise_similarity
 except ImportError:
-    from openrouter import query_models_parallel, query_model
+    from openrouter import query_models_as_completed, query_model, query_model_streaming
     from config import (
         COUNCIL_MODELS, CHAIRMAN_MODEL,
-        get_council_models, get_chairman_model
+        get_council_models, get_chairman_model, get_quorum_policy,
+        get_stage2_review_policy, get_consensus_policy, RANK_AGGREGATION_METHOD
     )
-    from web_search import get_search_context
+    from web_search import get_search_context, needs_web_search
+    import resilience
+    import semantic_cache
+    import rank_aggregation
+    import serialization
+    from response_cache import cache_enabled_for_mode
+    from text_similarity import pairwise_similarity
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -41,117 +62,233 @@ Focus on:
 Generate an image based on the user's description."""
 
 
-async def stage1_collect_responses(
-    user_query: str,
-    search_context: Optional[str] = None,
-    mode: str = "chat",
-    custom_models: Optional[List[str]] = None
-) -> List[Dict[str, Any]]:
+def quorum_options(
+    mode: str,
+    format_result: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    on_straggler: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
     """
-    Stage 1: Collect individual responses from all council models.
+    Build the quorum keyword arguments for query_models_as_completed.
 
     Args:
-        user_query: The user's question
-        search_context: Optional web search results to include
-        mode: Council mode - "chat", "code", or "image"
-        custom_models: Optional list of models to override defaults
+        mode: Council mode used to look up the quorum policy
+        format_result: Turns a (model, response) pair into a stage result
+        on_straggler: Optional callback for late stage results; stragglers are
+            only left running when the policy says "background" and this is given
 
     Returns:
-        List of dicts with 'model', 'response', and optional 'images' keys
+        Dict with min_responses, soft_deadline and on_straggler
     """
-    # Get mode-specific models or use custom models if provided
-    council_models = custom_models if custom_models else get_council_models(mode)
-    enable_image_generation = (mode == "image")
+    policy = get_quorum_policy(mode)
+
+    straggler_callback = None
+    if policy["stragglers"] == "background" and on_straggler is not None:
+        def straggler_callback(model: str, response: Optional[Dict[str, Any]]):
+            if response is not None:
+                on_straggler(format_result(model, response))
+
+    return {
+        "min_responses": policy["min_responses"],
+        "soft_deadline": policy["soft_deadline"],
+        "on_straggler": straggler_callback,
+    }
 
-    # Build the prompt based on mode
-    if mode == "code":
-        system_prompt = CODE_MODE_SYSTEM_PROMPT
-        prompt = f"Code Task:\n\n{user_query}"
-    elif mode == "image":
-        system_prompt = IMAGE_MODE_SYSTEM_PROMPT
-        prompt = f"Image Generation Request:\n\n{user_query}"
+
+def answering_model(model: str, response: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Attribute a response to the model that actually wrote it.
+
+    A hedged request may be answered by a backup model; the council seat it
+    filled is kept as 'hedged_for' so results still sort in council order.
+    """
+    answered_by = response.get('hedged_by', model)
+    if answered_by == model:
+        return {"model": model}
+    return {"model": answered_by, "hedged_for": model}
+
+
+def council_seat(result: Dict[str, Any]) -> str:
+    """The council model whose request produced a stage result."""
+    return result.get('hedged_for', result['model'])
+
+
+def format_stage1_result(model: str, response: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a raw model response as a Stage 1 result."""
+    result = {
+        **answering_model(model, response),
+        "response": response.get('content', '')
+    }
+    # Include images if present (for image mode)
+    if response.get('images'):
+        result['images'] = response['images']
+    return result
+
+
+def format_stage2_result(
+    model: str,
+    response: Dict[str, Any],
+    reviewed: Optional[List[str]] = None,
+    output: str = "text"
+) -> Dict[str, Any]:
+    """
+    Format a raw model response as a Stage 2 ranking.
+
+    A valid JSON verdict is rendered back into the usual evaluation text
+    (ending in a FINAL RANKING list) so stage 3 and the UI read it like any
+    other ranking; its scores are kept alongside.
+
+    Args:
+        model: The judge model
+        response: Raw model response
+        reviewed: Labels the judge was shown, when it reviewed only a sample
+        output: "json" if the judge was asked for a JSON verdict, "text" otherwise
+    """
+    full_text = response.get('content', '')
+    verdict = parse_structured_ranking(full_text, reviewed) if output == "json" else None
+    if verdict is None:
+        result = {
+            **answering_model(model, response),
+            "ranking": full_text,
+            "parsed_ranking": parse_ranking_from_text(full_text, reviewed)
+        }
     else:
-        system_prompt = None
-        # Build the prompt, optionally including search context
-        if search_context:
-            prompt = f"""The following web search results may be helpful for answering the question:
+        result = {
+            **answering_model(model, response),
+            "ranking": format_verdict_text(verdict),
+            "parsed_ranking": verdict["ranking"],
+            "scores": verdict["scores"],
+            "structured": True
+        }
+    if reviewed is not None:
+        result["reviewed"] = reviewed
+    return result
 
-{search_context}
 
----
+def response_label(index: int) -> str:
+    """
+    Anonymous label letters for a response: A..Z, then AA, AB, ... (like spreadsheet columns).
 
-Question: {user_query}
+    Args:
+        index: Zero-based position of the response
+    """
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def assign_reviews(
+    judges: List[str],
+    authors: List[str],
+    size: int,
+    seed: int = 0
+) -> Dict[str, List[int]]:
+    """
+    Pick which responses each judge reviews when reviews are sampled.
 
-Please provide a comprehensive answer, using the search results above if relevant."""
+    Responses are shuffled onto a ring (deterministically for a seed); each
+    judge reviews the `size` responses following its own, and judges without
+    a response of their own start at evenly spaced points. With one judge
+    per author every response is reviewed exactly `size` times, the review
+    graph is connected, and the work grows linearly with the council.
+
+    Args:
+        judges: Judge models
+        authors: Model that wrote each response, in response order
+        size: Responses per judge
+        seed: Shuffle seed (e.g. derived from the query, so retries get the same prompts)
+
+    Returns:
+        Dict mapping each judge to the sorted indices of the responses it reviews
+    """
+    count = len(authors)
+    ring = list(range(count))
+    random.Random(seed).shuffle(ring)
+    ring_position = {index: position for position, index in enumerate(ring)}
+
+    assignments = {}
+    for judge_number, judge in enumerate(judges):
+        if judge in authors:
+            start = ring_position[authors.index(judge)] + 1
+            available = count - 1
         else:
-            prompt = user_query
+            start = judge_number * count // len(judges)
+            available = count
+        assignments[judge] = sorted(
+            ring[(start + step) % count] for step in range(min(size, available))
+        )
+    return assignments
 
-    # Build messages with optional system prompt
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
 
-    # Query all models in parallel
-    responses = await query_models_parallel(
-        council_models,
-        messages,
-        enable_image_generation=enable_image_generation
-    )
+def ranking_response_format(rationale: bool = True) -> Dict[str, Any]:
+    """
+    OpenRouter response_format constraining a judge to a JSON verdict.
 
-    # Format results
-    stage1_results = []
-    for model, response in responses.items():
-        if response is not None:  # Only include successful responses
-            result = {
-                "model": model,
-                "response": response.get('content', '')
-            }
-            # Include images if present (for image mode)
-            if response.get('images'):
-                result['images'] = response['images']
-            stage1_results.append(result)
+    The ranking comes first, so a verdict cut short by max_tokens loses
+    rationales rather than the order.
 
-    return stage1_results
+    Args:
+        rationale: Ask for a one-sentence rationale per response
+    """
+    evaluation = {"label": {"type": "string"}, "score": {"type": "number"}}
+    if rationale:
+        evaluation["rationale"] = {"type": "string"}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "peer_ranking",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "ranking": {"type": "array", "items": {"type": "string"}},
+                    "evaluations": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": evaluation,
+                            "required": list(evaluation),
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["ranking", "evaluations"],
+                "additionalProperties": False
+            }
+        }
+    }
 
 
-async def stage2_collect_rankings(
+def build_ranking_prompt(
     user_query: str,
-    stage1_results: List[Dict[str, Any]],
+    labeled_results: List[Tuple[str, Dict[str, Any]]],
     mode: str = "chat",
-    custom_models: Optional[List[str]] = None
-) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    output: str = "text",
+    rationale: bool = True
+) -> str:
     """
-    Stage 2: Each model ranks the anonymized responses.
+    Build the Stage 2 prompt asking a judge to rank anonymized responses.
 
     Args:
         user_query: The original user query
-        stage1_results: Results from Stage 1
+        labeled_results: (label, stage 1 result) pairs the judge should rank
         mode: Council mode - "chat", "code", or "image"
-        custom_models: Optional list of models to override defaults
+        output: "json" for a JSON verdict (see ranking_response_format), "text" for a
+            written evaluation ending in a FINAL RANKING list
+        rationale: Ask for a one-sentence rationale per response (JSON verdicts only)
 
     Returns:
-        Tuple of (rankings list, label_to_model mapping)
+        The ranking prompt
     """
-    # Get mode-specific models or use custom models if provided
-    council_models = custom_models if custom_models else get_council_models(mode)
-
-    # Create anonymized labels for responses (Response A, Response B, etc.)
-    labels = [chr(65 + i) for i in range(len(stage1_results))]  # A, B, C, ...
-
-    # Create mapping from label to model name
-    label_to_model = {
-        f"Response {label}": result['model']
-        for label, result in zip(labels, stage1_results)
-    }
-
     # Build the response text based on mode
     if mode == "image":
         # For image mode, include both text and image info
         responses_text = "\n\n".join([
             f"Response {label}:\n{result['response']}" +
             (f"\n[Generated {len(result.get('images', []))} image(s)]" if result.get('images') else "")
-            for label, result in zip(labels, stage1_results)
+            for label, result in labeled_results
         ])
         mode_context = "image generation task"
         evaluation_criteria = """
@@ -162,7 +299,7 @@ async def stage2_collect_rankings(
     elif mode == "code":
         responses_text = "\n\n".join([
             f"Response {label}:\n{result['response']}"
-            for label, result in zip(labels, stage1_results)
+            for label, result in labeled_results
         ])
         mode_context = "code generation/review task"
         evaluation_criteria = """
@@ -174,7 +311,7 @@ async def stage2_collect_rankings(
     else:
         responses_text = "\n\n".join([
             f"Response {label}:\n{result['response']}"
-            for label, result in zip(labels, stage1_results)
+            for label, result in labeled_results
         ])
         mode_context = "question"
         evaluation_criteria = """
@@ -183,7 +320,33 @@ async def stage2_collect_rankings(
 - Clarity of explanation
 - Practical usefulness"""
 
-    ranking_prompt = f"""You are evaluating different responses to the following {mode_context}:
+    if output == "json":
+        rationale_field = ', and "rationale" (one short sentence)' if rationale else ""
+        example = [
+            {"label": "Response C", "score": 8, "rationale": "Most complete and correct."},
+            {"label": "Response A", "score": 5, "rationale": "Accurate but shallow."},
+        ]
+        if not rationale:
+            example = [{"label": item["label"], "score": item["score"]} for item in example]
+        example = serialization.dumps({"ranking": ["Response C", "Response A"], "evaluations": example})
+        return f"""You are evaluating different responses to the following {mode_context}:
+
+Question: {user_query}
+
+Here are the responses from different models (anonymized):
+
+{responses_text}
+
+Evaluate each response based on:{evaluation_criteria}
+
+Reply with a JSON object only:
+- "ranking": every response label, best to worst (e.g. ["Response C", "Response A"])
+- "evaluations": one entry per response with "label", "score" (0 to 10){rationale_field}
+
+Example:
+{example}"""
+
+    return f"""You are evaluating different responses to the following {mode_context}:
 
 Question: {user_query}
 
@@ -214,22 +377,267 @@ FINAL RANKING:
 
 Now provide your evaluation and ranking:"""
 
-    messages = [{"role": "user", "content": ranking_prompt}]
 
-    # Get rankings from all council models in parallel
-    responses = await query_models_parallel(council_models, messages)
+def detect_consensus(stage1_results: List[Dict[str, Any]], mode: str = "chat") -> Optional[Dict[str, Any]]:
+    """
+    Measure how closely the Stage 1 responses agree and pick the Stage 2 shortcut.
+
+    Agreement is the lowest cosine similarity over all response pairs, so a
+    single dissenting response keeps the full review.
+
+    Args:
+        stage1_results: Results from Stage 1
+        mode: Council mode used to look up the consensus policy
+
+    Returns:
+        Dict with 'agreement', 'threshold' and 'action' ("none" below the
+        threshold, otherwise the policy's action) and, for a shortcut, the
+        'reason'; None if the check is off or there are fewer than two responses
+    """
+    policy = get_consensus_policy(mode)
+    if policy["action"] == "off" or len(stage1_results) < 2:
+        return None
+
+    similarity = pairwise_similarity([result['response'] for result in stage1_results])
+    agreement = float(similarity[np.triu_indices(len(stage1_results), 1)].min())
+    consensus = {
+        "agreement": round(agreement, 3),
+        "threshold": policy["threshold"],
+        "action": "none",
+    }
+    if agreement >= policy["threshold"]:
+        consensus["action"] = policy["action"]
+        consensus["reason"] = (
+            f"all {len(stage1_results)} responses agree (lowest pairwise similarity "
+            f"{agreement:.2f} >= {policy['threshold']})"
+        )
+    return consensus
+
 
-    # Format results
+async def stage1_collect_responses(
+    user_query: str,
+    search_context: Optional[str] = None,
+    mode: str = "chat",
+    custom_models: Optional[List[str]] = None,
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_straggler: Optional[Callable[[Dict[str, Any]], None]] = None,
+    stage_report: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Stage 1: Collect individual responses from all council models.
+
+    Args:
+        user_query: The user's question
+        search_context: Optional web search results to include
+        mode: Council mode - "chat", "code", or "image"
+        custom_models: Optional list of models to override defaults
+        on_delta: Optional callback (model, chunk) to stream tokens as they arrive
+        on_result: Optional callback invoked with each model's result as soon as it completes
+        on_straggler: Optional callback for results that arrive after the quorum cut-off
+        stage_report: Optional dict filled with models skipped (open circuit) or cut off by the quorum policy
+
+    Returns:
+        List of dicts with 'model', 'response', and optional 'images' keys
+    """
+    # Get mode-specific models or use custom models if provided
+    council_models = custom_models if custom_models else get_council_models(mode)
+    enable_image_generation = (mode == "image")
+
+    # Build the prompt based on mode
+    if mode == "code":
+        system_prompt = CODE_MODE_SYSTEM_PROMPT
+        prompt = f"Code Task:\n\n{user_query}"
+    elif mode == "image":
+        system_prompt = IMAGE_MODE_SYSTEM_PROMPT
+        prompt = f"Image Generation Request:\n\n{user_query}"
+    else:
+        system_prompt = None
+        # Build the prompt, optionally including search context
+        if search_context:
+            prompt = f"""The following web search results may be helpful for answering the question:
+
+{search_context}
+
+---
+
+Question: {user_query}
+
+Please provide a comprehensive answer, using the search results above if relevant."""
+        else:
+            prompt = user_query
+
+    # Build messages with optional system prompt
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+
+    # Skip models whose circuit is open instead of waiting for them to fail
+    skipped = [m for m in council_models if resilience.is_open(m)]
+    available_models = [m for m in council_models if m not in skipped]
+
+    # Query all models in parallel, formatting each response as it arrives
+    stage1_results = []
+    completed = set()
+    async for model, response in query_models_as_completed(
+        available_models,
+        messages,
+        enable_image_generation=enable_image_generation,
+        on_delta=on_delta,
+        use_cache=cache_enabled_for_mode(mode),
+        **quorum_options(mode, format_stage1_result, on_straggler)
+    ):
+        completed.add(model)
+        if response is None:  # Only include successful responses
+            continue
+
+        result = format_stage1_result(model, response)
+        stage1_results.append(result)
+
+        if on_result is not None:
+            on_result(result)
+
+    if stage_report is not None:
+        stage_report["circuit_open"] = skipped
+        stage_report["cut_off"] = [m for m in council_models if m not in completed and m not in skipped]
+
+    # Keep council order so response labels stay stable
+    stage1_results.sort(key=lambda result: council_models.index(council_seat(result)))
+
+    return stage1_results
+
+
+async def stage2_collect_rankings(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    mode: str = "chat",
+    custom_models: Optional[List[str]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_straggler: Optional[Callable[[Dict[str, Any]], None]] = None,
+    stage_report: Optional[Dict[str, Any]] = None,
+    chairman_model: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Stage 2: Each model ranks the anonymized responses.
+
+    With the "full" review strategy every judge ranks every response; with
+    "sampled" each ranks a few (see assign_reviews), and the partial
+    rankings are combined by calculate_aggregate_rankings. When the Stage 1
+    responses already agree (see detect_consensus), only the chairman ranks
+    them, or the review is skipped.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Results from Stage 1
+        mode: Council mode - "chat", "code", or "image"
+        custom_models: Optional list of models to override defaults
+        on_result: Optional callback invoked with each model's ranking as soon as it completes
+        on_straggler: Optional callback for rankings that arrive after the quorum cut-off
+        stage_report: Optional dict filled with models skipped (open circuit) or cut off by the
+            quorum policy, the review strategy used, and the consensus check
+        chairman_model: Optional chairman model, the single judge when responses agree
+
+    Returns:
+        Tuple of (rankings list, label_to_model mapping)
+    """
+    # Get mode-specific models or use custom models if provided
+    council_models = custom_models if custom_models else get_council_models(mode)
+
+    # Anonymized labels for responses (Response A, ..., Response Z, Response AA, ...)
+    labels = [response_label(i) for i in range(len(stage1_results))]
+
+    # Create mapping from label to model name
+    label_to_model = {
+        f"Response {label}": result['model']
+        for label, result in zip(labels, stage1_results)
+    }
+
+    consensus = detect_consensus(stage1_results, mode)
+    action = consensus["action"] if consensus else "none"
+    if stage_report is not None:
+        stage_report["consensus"] = consensus
+    if action == "skip":
+        if stage_report is not None:
+            stage_report.update(circuit_open=[], cut_off=[], review_strategy="skipped")
+        return [], label_to_model
+    if action == "single_judge":
+        # The chairman checks the agreeing responses, unless its circuit is open
+        chair = chairman_model or get_chairman_model(mode)
+        if not resilience.is_open(chair):
+            council_models = [chair]
+        else:
+            council_models = [m for m in council_models if not resilience.is_open(m)][:1]
+
+    skipped = [m for m in council_models if resilience.is_open(m)]
+    available_models = [m for m in council_models if m not in skipped]
+
+    policy = get_stage2_review_policy(mode)
+    output = policy["output"]
+    strategy = "full" if action == "single_judge" else policy["strategy"]
+    if strategy == "auto":
+        strategy = "full" if len(stage1_results) <= policy["full_max"] else "sampled"
+
+    if strategy == "sampled" and len(stage1_results) > 1:
+        # Each judge ranks a few responses, so prompts stay the same size however large the council
+        assignments = assign_reviews(
+            available_models,
+            [result['model'] for result in stage1_results],
+            policy["size"],
+            seed=zlib.crc32(user_query.encode("utf-8"))
+        )
+        messages = {}
+        reviewed = {}
+        for model, indices in assignments.items():
+            messages[model] = [{"role": "user", "content": build_ranking_prompt(
+                user_query, [(labels[i], stage1_results[i]) for i in indices], mode,
+                output, policy["rationale"]
+            )}]
+            reviewed[model] = [f"Response {labels[i]}" for i in indices]
+    else:
+        strategy = "full"
+        messages = [{"role": "user", "content": build_ranking_prompt(
+            user_query, list(zip(labels, stage1_results)), mode, output, policy["rationale"]
+        )}]
+        reviewed = {}
+
+    # JSON verdicts skip the written evaluation, so output can be capped tightly
+    request_options = None
+    if output == "json":
+        request_options = {
+            "response_format": ranking_response_format(policy["rationale"]),
+            "max_tokens": policy["max_tokens"]
+        }
+
+    def format_result(model: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        return format_stage2_result(model, response, reviewed.get(model), output)
+
+    # Get rankings from all council models in parallel, parsing each as it arrives
     stage2_results = []
-    for model, response in responses.items():
-        if response is not None:
-            full_text = response.get('content', '')
-            parsed = parse_ranking_from_text(full_text)
-            stage2_results.append({
-                "model": model,
-                "ranking": full_text,
-                "parsed_ranking": parsed
-            })
+    completed = set()
+    async for model, response in query_models_as_completed(
+        available_models,
+        messages,
+        use_cache=cache_enabled_for_mode(mode),
+        request_options=request_options,
+        **quorum_options(mode, format_result, on_straggler)
+    ):
+        completed.add(model)
+        if response is None:
+            continue
+
+        result = format_result(model, response)
+        stage2_results.append(result)
+
+        if on_result is not None:
+            on_result(result)
+
+    if stage_report is not None:
+        stage_report["circuit_open"] = skipped
+        stage_report["cut_off"] = [m for m in council_models if m not in completed and m not in skipped]
+        stage_report["review_strategy"] = "single_judge" if action == "single_judge" else strategy
+
+    stage2_results.sort(key=lambda result: council_models.index(council_seat(result)))
 
     return stage2_results, label_to_model
 
@@ -239,7 +647,8 @@ async def stage3_synthesize_final(
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
     mode: str = "chat",
-    chairman_model: Optional[str] = None
+    chairman_model: Optional[str] = None,
+    on_delta: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
@@ -250,9 +659,10 @@ async def stage3_synthesize_final(
         stage2_results: Rankings from Stage 2
         mode: Council mode - "chat", "code", or "image"
         chairman_model: Optional specific chairman model to use
+        on_delta: Optional callback (chunk) to stream the synthesis as it arrives
 
     Returns:
-        Dict with 'model' and 'response' keys
+        Dict with 'model' and 'response' keys ('error': True if the chairman failed)
     """
     # Get the chairman model (custom or mode-specific)
     chair = chairman_model if chairman_model else get_chairman_model(mode)
@@ -274,7 +684,7 @@ async def stage3_synthesize_final(
     stage2_text = "\n\n".join([
         f"Model: {result['model']}\nRanking: {result['ranking']}"
         for result in stage2_results
-    ])
+    ]) or "(No peer rankings were collected.)"
 
     # Mode-specific chairman prompts
     if mode == "code":
@@ -334,21 +744,32 @@ Provide a clear, well-reasoned final answer that represents the council's collec
     messages = [{"role": "user", "content": chairman_prompt}]
 
     # Query the chairman model
-    response = await query_model(
-        chair,
-        messages,
-        enable_image_generation=enable_image_generation
-    )
+    if on_delta is not None:
+        response = await query_model_streaming(
+            chair,
+            messages,
+            on_delta,
+            enable_image_generation=enable_image_generation,
+            use_cache=cache_enabled_for_mode(mode)
+        )
+    else:
+        response = await query_model(
+            chair,
+            messages,
+            enable_image_generation=enable_image_generation,
+            use_cache=cache_enabled_for_mode(mode)
+        )
 
     if response is None:
         # Fallback if chairman fails
         return {
             "model": chair,
-            "response": "Error: Unable to generate final synthesis."
+            "response": "Error: Unable to generate final synthesis.",
+            "error": True
         }
 
     result = {
-        "model": chair,
+        **answering_model(chair, response),
         "response": response.get('content', '')
     }
 
@@ -359,17 +780,24 @@ Provide a clear, well-reasoned final answer that represents the council's collec
     return result
 
 
-def parse_ranking_from_text(ranking_text: str) -> List[str]:
+def parse_ranking_from_text(ranking_text: str, labels: Optional[List[str]] = None) -> List[str]:
     """
     Parse the FINAL RANKING section from the model's response.
 
     Args:
         ranking_text: The full text response from the model
+        labels: Labels the judge was shown; others are ignored (None = accept any)
 
     Returns:
         List of response labels in ranked order
     """
-    import re
+    def keep(matches: List[str]) -> List[str]:
+        # Drop repeats and labels the judge wasn't asked to rank
+        ranked = []
+        for label in matches:
+            if label not in ranked and (labels is None or label in labels):
+                ranked.append(label)
+        return ranked
 
     # Look for "FINAL RANKING:" section
     if "FINAL RANKING:" in ranking_text:
@@ -379,65 +807,166 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
             ranking_section = parts[1]
             # Try to extract numbered list format (e.g., "1. Response A")
             # This pattern looks for: number, period, optional space, "Response X"
-            numbered_matches = re.findall(r'\d+\.\s*Response [A-Z]', ranking_section)
+            numbered_matches = re.findall(r'\d+\.\s*(Response [A-Z]+)\b', ranking_section)
             if numbered_matches:
-                # Extract just the "Response X" part
-                return [re.search(r'Response [A-Z]', m).group() for m in numbered_matches]
+                return keep(numbered_matches)
 
             # Fallback: Extract all "Response X" patterns in order
-            matches = re.findall(r'Response [A-Z]', ranking_section)
-            return matches
+            return keep(re.findall(r'Response [A-Z]+\b', ranking_section))
 
     # Fallback: try to find any "Response X" patterns in order
-    matches = re.findall(r'Response [A-Z]', ranking_text)
-    return matches
+    return keep(re.findall(r'Response [A-Z]+\b', ranking_text))
+
+
+def parse_structured_ranking(text: str, labels: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Validate a JSON verdict from a judge.
+
+    Unknown and repeated labels are dropped, and labels that were scored but
+    left out of the ranking are appended in score order.
+
+    Args:
+        text: The judge's response text
+        labels: Labels the judge was shown; others are ignored (None = accept any)
+
+    Returns:
+        Dict with 'ranking' (labels best to worst), 'scores' and 'rationales' keyed
+        by label, or None if the text holds no usable verdict
+    """
+    # Some models wrap the object in a code fence or a sentence despite response_format
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        data = serialization.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    def valid_label(label: Any) -> Optional[str]:
+        if not isinstance(label, str):
+            return None
+        label = label.strip()
+        if re.fullmatch(r'[A-Z]+', label):
+            label = f"Response {label}"
+        if not re.fullmatch(r'Response [A-Z]+', label) or (labels is not None and label not in labels):
+            return None
+        return label
+
+    scores = {}
+    rationales = {}
+    evaluations = data.get("evaluations")
+    for evaluation in evaluations if isinstance(evaluations, list) else []:
+        if not isinstance(evaluation, dict):
+            continue
+        label = valid_label(evaluation.get("label"))
+        score = evaluation.get("score")
+        if label is None or label in scores or isinstance(score, bool) or not isinstance(score, (int, float)):
+            continue
+        if score != score or abs(score) == float("inf"):
+            continue
+        scores[label] = score
+        if isinstance(evaluation.get("rationale"), str) and evaluation["rationale"].strip():
+            rationales[label] = evaluation["rationale"].strip()
+
+    ranking = []
+    ranked = data.get("ranking")
+    for label in ranked if isinstance(ranked, list) else []:
+        label = valid_label(label)
+        if label is not None and label not in ranking:
+            ranking.append(label)
+    ranking += sorted((label for label in scores if label not in ranking), key=lambda label: -scores[label])
+
+    if not ranking:
+        return None
+    return {"ranking": ranking, "scores": scores, "rationales": rationales}
+
+
+def format_verdict_text(verdict: Dict[str, Any]) -> str:
+    """Render a JSON verdict as evaluation lines followed by a FINAL RANKING list."""
+    lines = []
+    for label in verdict["ranking"]:
+        line = label
+        if label in verdict["scores"]:
+            line += f" ({verdict['scores'][label]:g}/10)"
+        if label in verdict["rationales"]:
+            line += f": {verdict['rationales'][label]}"
+        lines.append(line)
+    ranking = "\n".join(f"{position}. {label}" for position, label in enumerate(verdict["ranking"], 1))
+    return "\n\n".join(lines) + "\n\nFINAL RANKING:\n" + ranking
 
 
 def calculate_aggregate_rankings(
     stage2_results: List[Dict[str, Any]],
-    label_to_model: Dict[str, str]
+    label_to_model: Dict[str, str],
+    method: str = RANK_AGGREGATION_METHOD
 ) -> List[Dict[str, Any]]:
     """
     Calculate aggregate rankings across all models.
 
+    Judges that ranked only a sample of the responses contribute their
+    relative order: for the average rank, a position in a ranking of k
+    labels is rescaled onto the 1..N scale of the whole council.
+
     Args:
         stage2_results: Rankings from each model
         label_to_model: Mapping from anonymous labels to model names
+        method: Aggregation method used for the order (see rank_aggregation.METHODS),
+            or "auto" for bradley_terry when some rankings are partial, mean_rank otherwise
 
     Returns:
-        List of dicts with model name and average rank, sorted best to worst
+        List of dicts with model name, average rank, rankings count, and the
+        method's score and confidence interval, sorted best to worst
     """
-    from collections import defaultdict
-
-    # Track positions for each model
-    model_positions = defaultdict(list)
-
+    rankings = []
     for ranking in stage2_results:
-        ranking_text = ranking['ranking']
+        parsed_ranking = ranking.get('parsed_ranking')
+        if parsed_ranking is None:
+            parsed_ranking = parse_ranking_from_text(ranking['ranking'], ranking.get('reviewed'))
+        rankings.append([label_to_model[label] for label in parsed_ranking if label in label_to_model])
+
+    judgments = rank_aggregation.Judgments.from_rankings(rankings, list(label_to_model.values()))
+    if method == "auto":
+        partial = any(length < len(judgments.items) for length in judgments.groups)
+        method = "bradley_terry" if partial else "mean_rank"
+    mean_rank = {
+        result['model']: result
+        for result in rank_aggregation.aggregate(judgments, "mean_rank")
+    }
+    ordered = mean_rank.values() if method == "mean_rank" else rank_aggregation.aggregate(judgments, method)
+
+    return [
+        {
+            "model": result['model'],
+            "average_rank": round(mean_rank[result['model']]['score'], 2),
+            "rankings_count": mean_rank[result['model']]['rankings_count'],
+            "method": method,
+            "score": result['score'],
+            "ci": result['ci'],
+        }
+        for result in ordered
+        if result['model'] in mean_rank
+    ]
+
 
-        # Parse the ranking from the structured format
-        parsed_ranking = parse_ranking_from_text(ranking_text)
+# Run metadata kept with the stored assistant message (the rest, such as the
+# web search context, is only sent to the client that ran the council)
+STORED_METADATA_KEYS = ("label_to_model", "aggregate_rankings", "mode", "stage2_review", "consensus")
 
-        for position, label in enumerate(parsed_ranking, start=1):
-            if label in label_to_model:
-                model_name = label_to_model[label]
-                model_positions[model_name].append(position)
 
-    # Calculate average position for each model
-    aggregate = []
-    for model, positions in model_positions.items():
-        if positions:
-            avg_rank = sum(positions) / len(positions)
-            aggregate.append({
-                "model": model,
-                "average_rank": round(avg_rank, 2),
-                "rankings_count": len(positions)
-            })
+def message_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Select the run metadata to store with the assistant message.
 
-    # Sort by average rank (lower is better)
-    aggregate.sort(key=lambda x: x['average_rank'])
+    Args:
+        metadata: Metadata returned by run_full_council or the council_complete event
 
-    return aggregate
+    Returns:
+        Dict with label_to_model, aggregate_rankings, mode, stage2_review and
+        consensus (those present)
+    """
+    return {key: metadata[key] for key in STORED_METADATA_KEYS if metadata.get(key) is not None}
 
 
 async def generate_conversation_title(user_query: str) -> str:
@@ -482,7 +1011,8 @@ async def run_full_council(
     user_query: str,
     mode: str = "chat",
     custom_models: Optional[List[str]] = None,
-    chairman_model: Optional[str] = None
+    chairman_model: Optional[str] = None,
+    on_straggler: Optional[Callable[[str, Dict[str, Any]], None]] = None
 ) -> Tuple[List, List, Dict, Dict]:
     """
     Run the complete 3-stage council process.
@@ -492,16 +1022,29 @@ async def run_full_council(
         mode: Council mode - "chat", "code", or "image"
         custom_models: Optional list of models to override defaults
         chairman_model: Optional specific chairman model to use
+        on_straggler: Optional callback (stage, result) for results that arrive
+            after a stage advanced on quorum ("stage1" or "stage2")
 
     Returns:
         Tuple of (stage1_results, stage2_results, stage3_result, metadata)
     """
+    # Serve near-identical questions from the semantic cache, unless the
+    # question needs current information
+    use_semantic_cache = not needs_web_search(user_query)
+    if use_semantic_cache:
+        cached = semantic_cache.lookup(user_query, mode, custom_models, chairman_model)
+        if cached is not None:
+            return cached
+
     # Check if web search would help and fetch context
     search_context = await get_search_context(user_query)
 
     # Stage 1: Collect individual responses (with search context if available)
+    stage1_report = {}
     stage1_results = await stage1_collect_responses(
-        user_query, search_context, mode=mode, custom_models=custom_models
+        user_query, search_context, mode=mode, custom_models=custom_models,
+        on_straggler=(lambda result: on_straggler("stage1", result)) if on_straggler else None,
+        stage_report=stage1_report
     )
 
     # If no models responded successfully, return error
@@ -512,8 +1055,12 @@ async def run_full_council(
         }, {}
 
     # Stage 2: Collect rankings
+    stage2_report = {}
     stage2_results, label_to_model = await stage2_collect_rankings(
-        user_query, stage1_results, mode=mode, custom_models=custom_models
+        user_query, stage1_results, mode=mode, custom_models=custom_models,
+        on_straggler=(lambda result: on_straggler("stage2", result)) if on_straggler else None,
+        stage_report=stage2_report,
+        chairman_model=chairman_model
     )
 
     # Calculate aggregate rankings
@@ -536,7 +1083,178 @@ async def run_full_council(
         "search_context": search_context,
         "mode": mode,
         "council_models": custom_models if custom_models else get_council_models(mode),
-        "chairman_model": chairman_model if chairman_model else get_chairman_model(mode)
+        "chairman_model": chairman_model if chairman_model else get_chairman_model(mode),
+        "quorum": {
+            "stage1_cut_off": stage1_report.get("cut_off", []),
+            "stage2_cut_off": stage2_report.get("cut_off", []),
+        },
+        "circuit_open": stage1_report.get("circuit_open", []),
+        "stage2_review": stage2_report.get("review_strategy", "full"),
+        "consensus": stage2_report.get("consensus")
     }
 
+    # Never cache a failed synthesis: it would be served for every similar question
+    if use_semantic_cache and stage3_result.get('response') and not stage3_result.get('error'):
+        semantic_cache.store(
+            user_query, stage1_results, stage2_results, stage3_result, metadata,
+            mode=mode, custom_models=custom_models, chairman_model=chairman_model
+        )
+
     return stage1_results, stage2_results, stage3_result, metadata
+
+
+async def drain_events(task: asyncio.Task, events: asyncio.Queue) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield queued events while a task runs, then any left once it finishes.
+
+    Args:
+        task: The running stage task that feeds the queue
+        events: Queue of event dicts produced by the task's callbacks
+
+    Yields:
+        Event dicts in the order they were queued
+    """
+    while True:
+        getter = asyncio.ensure_future(events.get())
+        done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter in done:
+            yield getter.result()
+            continue
+
+        getter.cancel()
+        while not events.empty():
+            yield events.get_nowait()
+        return
+
+
+async def run_council_events(
+    user_query: str,
+    mode: str = "chat",
+    custom_models: Optional[List[str]] = None,
+    chairman_model: Optional[str] = None,
+    on_straggler: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the 3-stage council process as a stream of progress events.
+
+    Args:
+        user_query: The user's question
+        mode: Council mode - "chat", "code", or "image"
+        custom_models: Optional list of models to override defaults
+        chairman_model: Optional specific chairman model to use
+        on_straggler: Optional callback (stage, result) for results that arrive
+            after a stage advanced on quorum ("stage1" or "stage2")
+
+    Yields:
+        SSE event dicts (stage*_start, stage*_delta, stage*_model_complete,
+        stage*_complete), then a final 'council_complete' event carrying
+        'stage1', 'stage2', 'stage3' and 'metadata' for persistence
+    """
+    # Replay a semantic cache hit as a complete run
+    use_semantic_cache = not needs_web_search(user_query)
+    cached = None
+    if use_semantic_cache:
+        cached = semantic_cache.lookup(user_query, mode, custom_models, chairman_model)
+    if cached is not None:
+        stage1_results, stage2_results, stage3_result, metadata = cached
+        yield {'type': 'stage1_start', 'mode': mode}
+        yield {'type': 'stage1_complete', 'data': stage1_results, 'metadata': {}}
+        yield {'type': 'stage2_start'}
+        yield {'type': 'stage2_complete', 'data': stage2_results, 'metadata': metadata}
+        yield {'type': 'stage3_start'}
+        yield {'type': 'stage3_complete', 'data': stage3_result}
+        yield {
+            'type': 'council_complete',
+            'stage1': stage1_results,
+            'stage2': stage2_results,
+            'stage3': stage3_result,
+            'metadata': metadata,
+        }
+        return
+
+    events = asyncio.Queue()
+
+    # Stage 1: Collect responses, streaming tokens as they arrive
+    yield {'type': 'stage1_start', 'mode': mode}
+    stage1_report = {}
+    stage1_task = asyncio.create_task(stage1_collect_responses(
+        user_query, mode=mode, custom_models=custom_models,
+        on_delta=lambda model, chunk: events.put_nowait(
+            {'type': 'stage1_delta', 'model': model, 'delta': chunk}
+        ),
+        on_result=lambda result: events.put_nowait(
+            {'type': 'stage1_model_complete', 'data': result}
+        ),
+        on_straggler=(lambda result: on_straggler("stage1", result)) if on_straggler else None,
+        stage_report=stage1_report
+    ))
+    async for event in drain_events(stage1_task, events):
+        yield event
+    stage1_results = stage1_task.result()
+    yield {
+        'type': 'stage1_complete',
+        'data': stage1_results,
+        'metadata': {
+            'cut_off': stage1_report.get('cut_off', []),
+            'circuit_open': stage1_report.get('circuit_open', []),
+        }
+    }
+
+    # Stage 2: Collect rankings, reporting each judge as it finishes
+    yield {'type': 'stage2_start'}
+    stage2_report = {}
+    stage2_task = asyncio.create_task(stage2_collect_rankings(
+        user_query, stage1_results, mode=mode, custom_models=custom_models,
+        on_result=lambda result: events.put_nowait(
+            {'type': 'stage2_model_complete', 'data': result}
+        ),
+        on_straggler=(lambda result: on_straggler("stage2", result)) if on_straggler else None,
+        stage_report=stage2_report,
+        chairman_model=chairman_model
+    ))
+    async for event in drain_events(stage2_task, events):
+        yield event
+    stage2_results, label_to_model = stage2_task.result()
+    aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+    metadata = {
+        'label_to_model': label_to_model,
+        'aggregate_rankings': aggregate_rankings,
+        'mode': mode,
+        'quorum': {
+            'stage1_cut_off': stage1_report.get('cut_off', []),
+            'stage2_cut_off': stage2_report.get('cut_off', []),
+        },
+        'stage2_review': stage2_report.get('review_strategy', 'full'),
+        'consensus': stage2_report.get('consensus'),
+    }
+    yield {'type': 'stage2_complete', 'data': stage2_results, 'metadata': metadata}
+
+    # Stage 3: Synthesize final answer
+    yield {'type': 'stage3_start'}
+    chair = chairman_model or get_chairman_model(mode)
+    stage3_task = asyncio.create_task(stage3_synthesize_final(
+        user_query, stage1_results, stage2_results,
+        mode=mode, chairman_model=chairman_model,
+        on_delta=lambda chunk: events.put_nowait(
+            {'type': 'stage3_delta', 'model': chair, 'delta': chunk}
+        )
+    ))
+    async for event in drain_events(stage3_task, events):
+        yield event
+    stage3_result = stage3_task.result()
+    yield {'type': 'stage3_complete', 'data': stage3_result}
+
+    # Never cache a failed synthesis: it would be served for every similar question
+    if use_semantic_cache and stage3_result.get('response') and not stage3_result.get('error'):
+        semantic_cache.store(
+            user_query, stage1_results, stage2_results, stage3_result, metadata,
+            mode=mode, custom_models=custom_models, chairman_model=chairman_model
+        )
+
+    yield {
+        'type': 'council_complete',
+        'stage1': stage1_results,
+        'stage2': stage2_results,
+        'stage3': stage3_result,
+        'metadata': metadata,
+    }
@@ -0,0 +1,130 @@
+"""Shared, connection-pooled HTTP client for all outbound API traffic."""
+
+from typing import Dict, Any, Optional
+import httpx
+try:
+    from .config import (
+        OPENROUTER_API_KEY,
+        HTTP_MAX_CONNECTIONS,
+        HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        HTTP_KEEPALIVE_EXPIRY,
+        HTTP2_ENABLED,
+    )
+except ImportError:
+    from config import (
+        OPENROUTER_API_KEY,
+        HTTP_MAX_CONNECTIONS,
+        HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        HTTP_KEEPALIVE_EXPIRY,
+        HTTP2_ENABLED,
+    )
+
+# HTTP/2 needs the optional h2 package (installed via httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Endpoint used to open a pooled connection at startup
+WARMUP_URL = "https://openrouter.ai/api/v1/models"
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Create the pooled client from the configured limits."""
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED and HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client, creating it on first use.
+
+    The client is normally created by the FastAPI lifespan hook, but is
+    built lazily so the council can also be used outside the app.
+
+    Returns:
+        The process-wide httpx.AsyncClient
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start_client(warm: bool = True):
+    """
+    Create the shared client and optionally warm a connection to OpenRouter.
+
+    Args:
+        warm: Open a connection up front so the first council call skips the TLS handshake
+    """
+    client = get_client()
+    if not warm:
+        return
+
+    try:
+        await client.head(
+            WARMUP_URL,
+            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+            timeout=10.0
+        )
+    except Exception as e:
+        print(f"HTTP client warm-up failed: {e}")
+
+
+async def close_client():
+    """Close the shared client and release all pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool statistics for monitoring.
+
+    Returns:
+        Dict with open, idle, active and waiting counts plus configured limits
+    """
+    stats = {
+        "http2": HTTP2_ENABLED and HTTP2_AVAILABLE,
+        "open": 0,
+        "idle": 0,
+        "active": 0,
+        "waiting": 0,
+        "limits": {
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": HTTP_KEEPALIVE_EXPIRY,
+        },
+    }
+
+    if _client is None or _client.is_closed:
+        return stats
+
+    # httpx does not expose pool state publicly; read it from httpcore
+    pool = getattr(_client._transport, "_pool", None)
+    if pool is None:
+        return stats
+
+    connections = list(getattr(pool, "connections", []))
+    stats["open"] = len(connections)
+    stats["idle"] = sum(1 for conn in connections if conn.is_idle())
+    stats["active"] = stats["open"] - stats["idle"]
+    stats["waiting"] = sum(
+        1 for request in getattr(pool, "_requests", []) if request.is_queued()
+    )
+
+    return stats
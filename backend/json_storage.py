@@ -0,0 +1,218 @@
+"""JSON-based storage for conversations (one file per conversation).
+
+Cold conversations are kept as compact, compressed <id>.json.zst (or
+.json.gz) files instead; see cold_storage.
+"""
+
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator
+from pathlib import Path
+try:
+    from .storage_base import (
+        StorageBackend, Mutation, apply_mutation, conversation_metadata, decode_cursor, conversation_file_path
+    )
+    from .metadata_index import MetadataIndex
+    from . import cold_storage
+    from . import serialization
+except ImportError:
+    from storage_base import (
+        StorageBackend, Mutation, apply_mutation, conversation_metadata, decode_cursor, conversation_file_path
+    )
+    from metadata_index import MetadataIndex
+    import cold_storage
+    import serialization
+
+
+class JSONStorage(StorageBackend):
+    """Stores each conversation as data_dir/<id>.json, rewritten on every change."""
+
+    name = "json"
+
+    def __init__(self, data_dir: str, index_path: str, pretty: bool = False):
+        """
+        Args:
+            data_dir: Directory for the conversation files
+            index_path: Metadata index journal used for listing
+            pretty: Indent the files (larger and slower to write, easier to read by hand)
+        """
+        self.data_dir = data_dir
+        self.pretty = pretty
+        self.index = MetadataIndex(index_path, self._scan_metadata)
+
+    def ensure_data_dir(self):
+        """Ensure the data directory exists."""
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+
+    def get_conversation_path(self, conversation_id: str) -> str:
+        """Get the file path for a conversation."""
+        return conversation_file_path(self.data_dir, f"{conversation_id}.json")
+
+    def get_cold_paths(self, conversation_id: str) -> List[str]:
+        """Possible paths of a conversation's compressed cold-tier file."""
+        return [
+            conversation_file_path(self.data_dir, f"{conversation_id}.json{suffix}")
+            for suffix in cold_storage.COLD_SUFFIXES
+        ]
+
+    def _read_cold(self, path: str) -> Dict[str, Any]:
+        with open(path, 'rb') as f:
+            return serialization.loads(cold_storage.decompress(f.read()))
+
+    def create_conversation(self, conversation_id: str) -> Dict[str, Any]:
+        conversation = {
+            "id": conversation_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "title": "New Conversation",
+            "messages": []
+        }
+        self.save_conversation(conversation)
+        return conversation
+
+    def _record(self, conversation: Dict[str, Any]):
+        """Update the metadata index after a conversation was written."""
+        self.index.record(conversation_metadata(conversation))
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        path = self.get_conversation_path(conversation_id)
+
+        if not os.path.exists(path):
+            for cold_path in self.get_cold_paths(conversation_id):
+                if os.path.exists(cold_path):
+                    return self._read_cold(cold_path)
+            return None
+
+        with open(path, 'rb') as f:
+            return serialization.loads(f.read())
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        self.ensure_data_dir()
+
+        path = self.get_conversation_path(conversation['id'])
+        with open(path, 'wb') as f:
+            f.write(serialization.dumpb(conversation, pretty=self.pretty))
+        # Written to, so it is hot again
+        for cold_path in self.get_cold_paths(conversation['id']):
+            if os.path.exists(cold_path):
+                os.remove(cold_path)
+        self._record(conversation)
+
+    def _scan_metadata(self) -> Iterator[Dict[str, Any]]:
+        """Read metadata from every conversation file (only to build a missing index)."""
+        self.ensure_data_dir()
+
+        for filename in os.listdir(self.data_dir):
+            path = os.path.join(self.data_dir, filename)
+            if filename.endswith('.json'):
+                with open(path, 'rb') as f:
+                    yield conversation_metadata(serialization.loads(f.read()))
+            elif filename.endswith(cold_storage.JSON_COLD_SUFFIXES):
+                yield conversation_metadata(self._read_cold(path))
+
+    def list_conversations(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        return self.index.page(limit, decode_cursor(before), order)
+
+    def get_metadata(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self.index.get(conversation_id)
+
+    def apply_mutations(self, conversation_id: str, mutations: List[Mutation]) -> List[Any]:
+        """Load the file once, apply every mutation, and rewrite it once."""
+        conversation = self.get_conversation(conversation_id)
+        if conversation is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        results = [apply_mutation(conversation, mutation) for mutation in mutations]
+        self.save_conversation(conversation)
+        return results
+
+    def archive_cold(self, cutoff: datetime) -> Dict[str, Any]:
+        """Repack <id>.json files not modified since cutoff into compressed, unindented files."""
+        self.ensure_data_dir()
+        cutoff_ts = cutoff.timestamp()
+        stats = {"conversations": 0, "bytes_before": 0, "bytes_after": 0, "ids": []}
+
+        for filename in os.listdir(self.data_dir):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self.data_dir, filename)
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime >= cutoff_ts:
+                    continue
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                conversation = serialization.loads(raw)
+            except (OSError, ValueError) as e:
+                print(f"Skipping conversation file {path} during cold tiering: {e}")
+                continue
+
+            packed = cold_storage.compress(serialization.dumpb(conversation))
+            cold_path = conversation_file_path(self.data_dir, f"{conversation['id']}.json{cold_storage.COLD_SUFFIX}")
+            tmp_path = cold_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(packed)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, cold_path)
+
+            # Move the hot file aside atomically: from here on a writer creates a
+            # fresh <id>.json (and drops the cold copy) instead of writing into
+            # the file we are about to delete
+            aside_path = f"{path}.{os.getpid()}.archiving"
+            try:
+                os.rename(path, aside_path)
+            except FileNotFoundError:
+                continue
+            aside = os.stat(aside_path)
+            if (aside.st_mtime_ns, aside.st_size) != (stat.st_mtime_ns, stat.st_size):
+                # A write landed before the rename and wins: put it back unless an
+                # even newer write already recreated the file, then drop the cold copy
+                try:
+                    os.link(aside_path, path)
+                except FileExistsError:
+                    pass
+                os.remove(aside_path)
+                try:
+                    os.remove(cold_path)
+                except FileNotFoundError:
+                    pass
+                continue
+            os.remove(aside_path)
+
+            stats["conversations"] += 1
+            stats["bytes_before"] += len(raw)
+            stats["bytes_after"] += len(packed)
+            stats["ids"].append(conversation['id'])
+        return stats
+
+    def add_user_message(self, conversation_id: str, content: str):
+        self.apply_mutations(conversation_id, [("add_user_message", (content,))])
+
+    def add_assistant_message(
+        self,
+        conversation_id: str,
+        stage1: List[Dict[str, Any]],
+        stage2: List[Dict[str, Any]],
+        stage3: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        return self.apply_mutations(
+            conversation_id, [("add_assistant_message", (stage1, stage2, stage3, metadata))]
+        )[0]
+
+    def attach_late_result(
+        self,
+        conversation_id: str,
+        message_index: int,
+        stage: str,
+        result: Dict[str, Any]
+    ):
+        self.apply_mutations(conversation_id, [("attach_late_result", (message_index, stage, result))])
+
+    def update_conversation_title(self, conversation_id: str, title: str):
+        self.apply_mutations(conversation_id, [("update_conversation_title", (title,))])
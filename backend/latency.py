@@ -0,0 +1,180 @@
+"""Per-model latency histograms driving adaptive timeouts and request hedging."""
+
+import json
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+try:
+    from .config import (
+        LATENCY_STATS_PATH,
+        DEFAULT_MODEL_TIMEOUT,
+        LATENCY_MIN_SAMPLES,
+        ADAPTIVE_TIMEOUT_MULTIPLIER,
+        ADAPTIVE_TIMEOUT_MIN,
+        ADAPTIVE_TIMEOUT_MAX,
+    )
+except ImportError:
+    from config import (
+        LATENCY_STATS_PATH,
+        DEFAULT_MODEL_TIMEOUT,
+        LATENCY_MIN_SAMPLES,
+        ADAPTIVE_TIMEOUT_MULTIPLIER,
+        ADAPTIVE_TIMEOUT_MIN,
+        ADAPTIVE_TIMEOUT_MAX,
+    )
+
+# Log-spaced bucket upper bounds (seconds): 0.25s * 1.25^i up to ~10 minutes
+BUCKET_BOUNDS: List[float] = [round(0.25 * 1.25 ** i, 3) for i in range(36)]
+
+# Halve all counts once a model has this many samples, so old history decays
+MAX_SAMPLES_PER_MODEL = 2000
+
+# Persist after this many new samples (and always on shutdown)
+SAVE_EVERY = 50
+
+_histograms: Dict[str, List[int]] = {}
+_loaded = False
+_unsaved = 0
+
+
+def _bucket_index(seconds: float) -> int:
+    """Find the histogram bucket for a latency value."""
+    for i, bound in enumerate(BUCKET_BOUNDS):
+        if seconds <= bound:
+            return i
+    return len(BUCKET_BOUNDS) - 1
+
+
+def load_histograms():
+    """Load persisted histograms from disk (once per process)."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    if not os.path.exists(LATENCY_STATS_PATH):
+        return
+
+    try:
+        with open(LATENCY_STATS_PATH, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load latency stats: {e}")
+        return
+
+    # Bucket layout changed since the file was written; start fresh
+    if data.get("bounds") != BUCKET_BOUNDS:
+        return
+
+    _histograms.update(data.get("models", {}))
+
+
+def save_histograms():
+    """Persist histograms to disk atomically."""
+    global _unsaved
+    Path(LATENCY_STATS_PATH).parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = f"{LATENCY_STATS_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"bounds": BUCKET_BOUNDS, "models": _histograms}, f)
+    os.replace(tmp_path, LATENCY_STATS_PATH)
+    _unsaved = 0
+
+
+def record_latency(model: str, seconds: float):
+    """
+    Record one observed call latency for a model.
+
+    Args:
+        model: OpenRouter model identifier
+        seconds: Wall-clock duration of the call (timeouts count as the timeout)
+    """
+    global _unsaved
+    load_histograms()
+
+    counts = _histograms.setdefault(model, [0] * len(BUCKET_BOUNDS))
+    counts[_bucket_index(seconds)] += 1
+
+    if sum(counts) > MAX_SAMPLES_PER_MODEL:
+        _histograms[model] = [count // 2 for count in counts]
+
+    _unsaved += 1
+    if _unsaved >= SAVE_EVERY:
+        try:
+            save_histograms()
+        except OSError as e:
+            print(f"Failed to save latency stats: {e}")
+
+
+def get_percentile(model: str, quantile: float) -> Optional[float]:
+    """
+    Estimate a latency percentile for a model from its histogram.
+
+    Args:
+        model: OpenRouter model identifier
+        quantile: Quantile in [0, 1] (e.g. 0.95)
+
+    Returns:
+        Upper bound of the bucket holding the quantile, or None without enough samples
+    """
+    load_histograms()
+
+    counts = _histograms.get(model)
+    if not counts:
+        return None
+
+    total = sum(counts)
+    if total < LATENCY_MIN_SAMPLES:
+        return None
+
+    threshold = quantile * total
+    cumulative = 0
+    for bound, count in zip(BUCKET_BOUNDS, counts):
+        cumulative += count
+        if cumulative >= threshold:
+            return bound
+    return BUCKET_BOUNDS[-1]
+
+
+def get_timeout(model: str) -> float:
+    """
+    Get the adaptive request timeout for a model.
+
+    Returns:
+        p99 latency times the configured multiplier, clamped to the configured
+        range, or the default timeout while history is too short
+    """
+    p99 = get_percentile(model, 0.99)
+    if p99 is None:
+        return DEFAULT_MODEL_TIMEOUT
+    return min(max(p99 * ADAPTIVE_TIMEOUT_MULTIPLIER, ADAPTIVE_TIMEOUT_MIN), ADAPTIVE_TIMEOUT_MAX)
+
+
+def get_hedge_delay(model: str) -> Optional[float]:
+    """
+    Get how long to wait before hedging a call to a model.
+
+    Returns:
+        The model's p95 latency, or None while history is too short
+    """
+    return get_percentile(model, 0.95)
+
+
+def get_latency_stats() -> Dict[str, Any]:
+    """
+    Get latency percentiles and derived timeouts for every tracked model.
+
+    Returns:
+        Dict mapping model identifier to samples, p50/p95/p99 and timeout
+    """
+    load_histograms()
+    return {
+        model: {
+            "samples": sum(counts),
+            "p50": get_percentile(model, 0.50),
+            "p95": get_percentile(model, 0.95),
+            "p99": get_percentile(model, 0.99),
+            "timeout": get_timeout(model),
+        }
+        for model, counts in _histograms.items()
+    }
@@ -0,0 +1,468 @@
+"""Model leaderboard aggregated over every stored council run.
+
+Each assistant message keeps its stage 2 rankings and (since rankings are
+anonymized) its label_to_model mapping. The leaderboard keeps running totals
+per mode and model, and head-to-head counts per mode and model pair, in
+its own SQLite database. storage.py adds each message's judgments as it is
+stored, so reading the leaderboard only touches these small tables, never
+the conversations. The totals can be rebuilt from the backend at any time.
+
+Only the rankings stored with the message count. Stage 2 results that arrive
+after the quorum cut-off (attach_late_result) are left out: they played no
+part in the run's aggregate ranking or its first place.
+
+Usage:
+    python -m backend.leaderboard --rebuild
+    python -m backend.leaderboard [--mode chat]
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+try:
+    from .config import LEADERBOARD_PATH
+    from .storage_base import StorageBackend
+    from . import rank_aggregation
+except ImportError:
+    from config import LEADERBOARD_PATH
+    from storage_base import StorageBackend
+    import rank_aggregation
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_stats (
+    mode TEXT NOT NULL,
+    model TEXT NOT NULL,
+    judgments INTEGER NOT NULL DEFAULT 0,
+    points REAL NOT NULL DEFAULT 0,
+    runs INTEGER NOT NULL DEFAULT 0,
+    first_places INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mode, model)
+);
+
+CREATE TABLE IF NOT EXISTS pair_stats (
+    mode TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    loser TEXT NOT NULL,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mode, winner, loser)
+);
+
+CREATE TABLE IF NOT EXISTS counted_messages (
+    conversation_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (conversation_id, position)
+);
+"""
+
+# Messages stored before the council recorded its mode
+DEFAULT_MODE = "chat"
+
+# Normal quantile for the 95% interval of Bradley-Terry strengths
+Z_95 = 1.959964
+
+# Payloads read per message during a rebuild
+REBUILD_STAGES = ("stage1", "stage2", "metadata")
+
+# Totals of one or more messages: model stats keyed by (mode, model) and pair wins by (mode, winner, loser)
+Totals = Tuple[Dict[Tuple[str, str], List[float]], Dict[Tuple[str, str, str], int]]
+
+
+def message_label_to_model(message: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Get the label -> model mapping of an assistant message.
+
+    Messages stored before the mapping was kept are labelled in stage 1
+    order (Response A is the first stage 1 result), so it is rebuilt from there.
+    """
+    label_to_model = (message.get("metadata") or {}).get("label_to_model")
+    if label_to_model:
+        return label_to_model
+    try:
+        from .council import response_label
+    except ImportError:
+        from council import response_label
+    return {
+        f"Response {response_label(i)}": result.get("model")
+        for i, result in enumerate(message.get("stage1") or [])
+    }
+
+
+def message_judgments(message: Dict[str, Any]) -> Optional[Tuple[str, List[List[str]], Optional[str]]]:
+    """
+    Extract a stored assistant message's judgments.
+
+    Args:
+        message: Assistant message dict
+
+    Returns:
+        (mode, rankings of model names best first, model ranked first
+        overall), or None if the message holds no usable ranking
+    """
+    if message.get("role") != "assistant" or not message.get("stage2"):
+        return None
+    metadata = message.get("metadata") or {}
+    label_to_model = message_label_to_model(message)
+
+    rankings = []
+    for result in message["stage2"]:
+        ranked = [label_to_model[label] for label in result.get("parsed_ranking") or [] if label in label_to_model]
+        if len(ranked) >= 2:
+            rankings.append(ranked)
+    if not rankings:
+        return None
+
+    aggregate = metadata.get("aggregate_rankings")
+    if not aggregate:
+        aggregate = rank_aggregation.aggregate(rankings, "mean_rank")
+    top = aggregate[0]["model"] if aggregate else None
+    return metadata.get("mode") or DEFAULT_MODE, rankings, top
+
+
+def _accumulate(totals: Totals, judgments: Tuple[str, List[List[str]], Optional[str]]):
+    """Add one message's judgments to running totals."""
+    model_totals, pair_totals = totals
+    mode, rankings, top = judgments
+
+    ranked_models = set()
+    for ranking in rankings:
+        last = len(ranking) - 1
+        for position, model in enumerate(ranking):
+            stats = model_totals[(mode, model)]
+            stats[0] += 1
+            # Share of the other responses in this ranking that it beat
+            stats[1] += (last - position) / last
+            for loser in ranking[position + 1:]:
+                pair_totals[(mode, model, loser)] += 1
+        ranked_models.update(ranking)
+
+    for model in ranked_models:
+        model_totals[(mode, model)][2] += 1
+    if top is not None:
+        model_totals[(mode, top)][3] += 1
+
+
+def _new_totals() -> Totals:
+    return defaultdict(lambda: [0, 0.0, 0, 0]), defaultdict(int)
+
+
+class Leaderboard:
+    """Running ranking totals per mode, model and model pair, in their own SQLite database."""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite database file for the totals
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Bumped on every write so cached standings are recomputed
+        self._version = 0
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _write_totals(self, conn: sqlite3.Connection, totals: Totals):
+        model_totals, pair_totals = totals
+        conn.executemany(
+            "INSERT INTO model_stats (mode, model, judgments, points, runs, first_places) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (mode, model) DO UPDATE SET "
+            "judgments = judgments + excluded.judgments, points = points + excluded.points, "
+            "runs = runs + excluded.runs, first_places = first_places + excluded.first_places",
+            [(mode, model, *stats) for (mode, model), stats in model_totals.items()]
+        )
+        conn.executemany(
+            "INSERT INTO pair_stats (mode, winner, loser, wins) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (mode, winner, loser) DO UPDATE SET wins = wins + excluded.wins",
+            [(mode, winner, loser, wins) for (mode, winner, loser), wins in pair_totals.items()]
+        )
+        self._version += 1
+
+    def add_messages(self, conversation_id: str, messages: List[Tuple[int, Dict[str, Any]]]):
+        """
+        Count newly stored messages in one transaction.
+
+        Messages already counted (by conversation and position) are skipped,
+        so re-imports and overlapping rebuilds don't count twice.
+
+        Args:
+            conversation_id: Conversation identifier
+            messages: (position, message) pairs
+        """
+        candidates = []
+        for position, message in messages:
+            judgments = message_judgments(message)
+            if judgments is not None:
+                candidates.append((position, judgments))
+        if not candidates:
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            totals = _new_totals()
+            for position, judgments in candidates:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO counted_messages (conversation_id, position) VALUES (?, ?)",
+                    (conversation_id, position)
+                )
+                if cursor.rowcount:
+                    _accumulate(totals, judgments)
+            self._write_totals(conn, totals)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def standings(self, mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the leaderboard.
+
+        Reads only the per-model and per-pair totals, so the cost depends on
+        the number of models, not on how many conversations are stored.
+        Results are cached until the totals change.
+
+        Args:
+            mode: Council mode, or None to combine every mode
+
+        Returns:
+            Dict with mode, counted messages, models (best first: judgments,
+            average_score, runs, first_places, wins, losses, win_rate, and
+            Bradley-Terry strength with its 95% ci) and pairs (head-to-head wins)
+        """
+        conn = self._connect()
+        # data_version changes when another process commits to the database
+        version = (self._version, conn.execute("PRAGMA data_version").fetchone()[0])
+        # data_version is per connection, so each thread caches its own results
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            cache = self._local.cache = {}
+        cached = cache.get(mode)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        where, params = ("WHERE mode = ?", (mode,)) if mode else ("", ())
+        model_rows = conn.execute(
+            "SELECT model, SUM(judgments), SUM(points), SUM(runs), SUM(first_places) "
+            f"FROM model_stats {where} GROUP BY model", params
+        ).fetchall()
+        pair_rows = conn.execute(
+            f"SELECT winner, loser, SUM(wins) FROM pair_stats {where} GROUP BY winner, loser", params
+        ).fetchall()
+
+        models = [row[0] for row in model_rows]
+        index = {model: i for i, model in enumerate(models)}
+        wins = np.zeros((len(models), len(models)))
+        for winner, loser, count in pair_rows:
+            wins[index[winner], index[loser]] = count
+
+        fit = rank_aggregation.bradley_terry(wins) if models else {"strength": [], "se": []}
+        entries = []
+        for i, (model, judgments, points, runs, first_places) in enumerate(model_rows):
+            won, lost = int(wins[i].sum()), int(wins[:, i].sum())
+            strength, se = float(fit["strength"][i]), float(fit["se"][i])
+            entries.append({
+                "model": model,
+                "judgments": judgments,
+                "average_score": round(points / judgments, 4) if judgments else None,
+                "runs": runs,
+                "first_places": first_places,
+                "wins": won,
+                "losses": lost,
+                "win_rate": round(won / (won + lost), 4) if won + lost else None,
+                "strength": round(strength, 4),
+                "ci": [round(strength - Z_95 * se, 4), round(strength + Z_95 * se, 4)],
+            })
+        entries.sort(key=lambda entry: -entry["strength"])
+
+        pairs = []
+        for a in range(len(models)):
+            for b in range(a + 1, len(models)):
+                if wins[a, b] or wins[b, a]:
+                    pairs.append({
+                        "model_a": models[a],
+                        "model_b": models[b],
+                        "a_wins": int(wins[a, b]),
+                        "b_wins": int(wins[b, a]),
+                    })
+
+        # Every counted message has exactly one first place
+        messages = sum(entry["first_places"] for entry in entries)
+        result = {"mode": mode, "messages": messages, "models": entries, "pairs": pairs}
+        cache[mode] = (version, result)
+        return result
+
+    def is_empty(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM counted_messages LIMIT 1").fetchone() is None
+
+    def rebuild(self, backend: StorageBackend, clear: bool = True) -> Dict[str, Any]:
+        """
+        Recount every assistant message stored in a backend.
+
+        Only the stage 1, stage 2 and metadata payloads are read (through
+        get_messages). A full rebuild scans without holding any lock, then
+        replaces all totals in one transaction, so readers keep the old
+        standings until the new ones are complete. Messages the server
+        counted while the scan ran are re-read and included.
+
+        Args:
+            backend: Storage backend to read from
+            clear: Drop the existing totals first (otherwise only uncounted messages are added)
+
+        Returns:
+            Dict with conversations, counted messages and elapsed seconds
+        """
+        start = time.monotonic()
+        if not clear:
+            return self._add_missing(backend, start)
+
+        conversations = 0
+        counted: List[Tuple[str, int]] = []
+        totals = _new_totals()
+        for metadata in backend.list_conversations(order="asc"):
+            conversations += 1
+            messages = backend.get_messages(metadata["id"], stages=REBUILD_STAGES) or []
+            for position, message in enumerate(messages):
+                judgments = message_judgments(message)
+                if judgments is not None:
+                    counted.append((metadata["id"], position))
+                    _accumulate(totals, judgments)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Messages counted live after the scan passed their conversation
+            scanned = set(counted)
+            for conversation_id, position in conn.execute(
+                "SELECT conversation_id, position FROM counted_messages"
+            ).fetchall():
+                if (conversation_id, position) in scanned:
+                    continue
+                messages = backend.get_messages(conversation_id, position, 1, REBUILD_STAGES) or []
+                judgments = message_judgments(messages[0]) if messages else None
+                if judgments is not None:
+                    counted.append((conversation_id, position))
+                    _accumulate(totals, judgments)
+
+            conn.execute("DELETE FROM model_stats")
+            conn.execute("DELETE FROM pair_stats")
+            conn.execute("DELETE FROM counted_messages")
+            conn.executemany(
+                "INSERT INTO counted_messages (conversation_id, position) VALUES (?, ?)", counted
+            )
+            self._write_totals(conn, totals)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return {
+            "conversations": conversations,
+            "messages": len(counted),
+            "seconds": round(time.monotonic() - start, 2),
+        }
+
+    def _add_missing(self, backend: StorageBackend, start: float) -> Dict[str, Any]:
+        """Add uncounted messages conversation by conversation (add_messages skips counted ones)."""
+        conversations = 0
+        for metadata in backend.list_conversations(order="asc"):
+            conversations += 1
+            messages = backend.get_messages(metadata["id"], stages=REBUILD_STAGES) or []
+            self.add_messages(metadata["id"], list(enumerate(messages)))
+        return {
+            "conversations": conversations,
+            "messages": self._connect().execute("SELECT COUNT(*) FROM counted_messages").fetchone()[0],
+            "seconds": round(time.monotonic() - start, 2),
+        }
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_leaderboard: Optional[Leaderboard] = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    """Get the shared leaderboard, opening it on first use."""
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            _leaderboard = Leaderboard(LEADERBOARD_PATH)
+        return _leaderboard
+
+
+def build_if_empty(backend: StorageBackend) -> bool:
+    """
+    Count stored history on first start, when the leaderboard is empty but conversations exist.
+
+    Returns:
+        True if the leaderboard was built
+    """
+    leaderboard = get_leaderboard()
+    if not leaderboard.is_empty() or not backend.list_conversations(limit=1):
+        return False
+    stats = leaderboard.rebuild(backend, clear=False)
+    print(f"Built leaderboard {leaderboard.db_path}: {stats}")
+    return True
+
+
+def close():
+    """Close the shared leaderboard."""
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is not None:
+            _leaderboard.close()
+            _leaderboard = None
+
+
+if __name__ == "__main__":
+    try:
+        from .config import STORAGE_BACKEND
+        from .storage import create_backend
+        from . import serialization
+    except ImportError:
+        from config import STORAGE_BACKEND
+        from storage import create_backend
+        import serialization
+
+    parser = argparse.ArgumentParser(description="Rebuild or show the model leaderboard.")
+    parser.add_argument("--rebuild", action="store_true", help="Recount every stored conversation")
+    parser.add_argument("--backend", default=STORAGE_BACKEND, help="Storage backend to count")
+    parser.add_argument("--mode", help="Only this council mode (default: all modes)")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        backend = create_backend(args.backend)
+        print(get_leaderboard().rebuild(backend))
+        backend.close()
+    print(serialization.dumps(get_leaderboard().standings(args.mode), pretty=True))
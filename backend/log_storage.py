@@ -0,0 +1,399 @@
+"""Append-only event log storage for conversations.
+
+Each conversation is a JSONL file of events (created, user_message,
+assistant_message, title, late_result). A mutation appends one line with a
+single write + fsync; get_conversation replays the log. Long logs are folded
+into a single snapshot event by a background compaction.
+
+Every event carries the conversation's message_count and its sequence
+number since the last snapshot, so appends only need to read the tail of
+the file. A truncated last line (crash mid-append) is ignored on replay and
+terminated before the next append.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, IO, Tuple
+try:
+    from .storage_base import StorageBackend, Mutation, conversation_metadata, decode_cursor, conversation_file_path
+    from . import serialization
+    from .metadata_index import MetadataIndex
+except ImportError:
+    from storage_base import StorageBackend, Mutation, conversation_metadata, decode_cursor, conversation_file_path
+    import serialization
+    from metadata_index import MetadataIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# Bytes read per step when scanning backwards for the last event
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Event types that append a message
+MESSAGE_EVENTS = ("user_message", "assistant_message")
+
+
+def _encode_event(event: Dict[str, Any]) -> bytes:
+    return serialization.dumpb(event) + b"\n"
+
+
+def apply_event(conversation: Optional[Dict[str, Any]], event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Fold one log event into a conversation.
+
+    Args:
+        conversation: State so far (None before the first event)
+        event: Decoded log event
+
+    Returns:
+        The updated conversation
+    """
+    kind = event["type"]
+    if kind == "snapshot":
+        return event["conversation"]
+    if kind == "created":
+        return {"id": event["id"], "created_at": event["created_at"], "title": event["title"], "messages": []}
+    if conversation is None:
+        raise ValueError(f"Event {kind!r} before conversation was created")
+
+    if kind == "user_message":
+        conversation["messages"].append({"role": "user", "content": event["content"]})
+    elif kind == "assistant_message":
+        conversation["messages"].append({"role": "assistant", **event["message"]})
+    elif kind == "title":
+        conversation["title"] = event["title"]
+    elif kind == "late_result":
+        message = conversation["messages"][event["index"]]
+        message.setdefault("late_results", {}).setdefault(event["stage"], []).append(event["result"])
+    return conversation
+
+
+def _mutation_event(mutation: Mutation) -> Dict[str, Any]:
+    """Translate a storage mutation into its log event."""
+    operation, args = mutation
+    if operation == "add_user_message":
+        content, = args
+        return {"type": "user_message", "content": content}
+    if operation == "add_assistant_message":
+        stage1, stage2, stage3, metadata = args
+        message = {"stage1": stage1, "stage2": stage2, "stage3": stage3}
+        if metadata:
+            message["metadata"] = metadata
+        return {"type": "assistant_message", "message": message}
+    if operation == "attach_late_result":
+        message_index, stage, result = args
+        return {"type": "late_result", "index": message_index, "stage": stage, "result": result}
+    if operation == "update_conversation_title":
+        title, = args
+        return {"type": "title", "title": title}
+    raise ValueError(f"Unknown mutation: {operation}")
+
+
+class LogStorage(StorageBackend):
+    """Stores each conversation as data_dir/<id>.jsonl, an append-only event log."""
+
+    name = "log"
+
+    def __init__(self, data_dir: str, index_path: str, compact_events: int = 50):
+        """
+        Args:
+            data_dir: Directory for the per-conversation logs
+            index_path: Metadata index journal used for listing
+            compact_events: Events after the last snapshot that trigger a background compaction
+        """
+        self.data_dir = data_dir
+        self.compact_events = compact_events
+        self.index = MetadataIndex(index_path, self._scan_metadata)
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compaction")
+        self._compacting: set = set()
+        self._compacting_lock = threading.Lock()
+
+    def get_log_path(self, conversation_id: str) -> str:
+        """Get the log file path for a conversation."""
+        return conversation_file_path(self.data_dir, f"{conversation_id}.jsonl")
+
+    @contextmanager
+    def _locked_log(self, conversation_id: str, create: bool = False) -> Iterator[IO[bytes]]:
+        """
+        Open a conversation's log with an exclusive lock held.
+
+        Compaction replaces the file, so after locking we check we still
+        hold the current inode and reopen if not.
+
+        Raises:
+            ValueError: If the conversation doesn't exist and create is False
+        """
+        path = self.get_log_path(conversation_id)
+        flags = os.O_RDWR | os.O_APPEND | (os.O_CREAT if create else 0)
+        while True:
+            try:
+                f = os.fdopen(os.open(path, flags, 0o644), 'a+b')
+            except FileNotFoundError:
+                raise ValueError(f"Conversation {conversation_id} not found")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                current = os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                break
+            f.close()
+
+        try:
+            yield f
+        finally:
+            f.close()  # closing releases the flock
+
+    def _read_tail(self, f: IO[bytes]) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Read the last complete event without scanning the whole log.
+
+        Returns:
+            (last event or None, whether the file ends mid-line)
+        """
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        position, buffer = size, b""
+        while position > 0 and buffer.count(b"\n") < 2:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+
+        lines = buffer.split(b"\n")
+        truncated = lines[-1] != b""
+        for line in reversed(lines[:-1]):
+            if line.strip():
+                try:
+                    return serialization.loads(line), truncated
+                except ValueError:
+                    break
+
+        # Corrupt tail: fall back to a full replay to recover the counters
+        f.seek(0)
+        conversation, events = self._replay(f.read())
+        if conversation is None:
+            return None, truncated
+        return {"message_count": len(conversation["messages"]), "seq": events}, truncated
+
+    def _replay(self, data: bytes) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Rebuild a conversation from raw log bytes.
+
+        Returns:
+            (conversation or None, events since the last snapshot)
+        """
+        conversation = None
+        events = 0
+        lines = data.split(b"\n")
+        for number, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                event = serialization.loads(line)
+            except ValueError:
+                if number < len(lines) - 1:
+                    print(f"Skipping corrupt log line {number + 1}")
+                continue  # otherwise a truncated final line from an interrupted append
+            conversation = apply_event(conversation, event)
+            events = 0 if event["type"] == "snapshot" else events + 1
+        return conversation, events
+
+    def _append(self, conversation_id: str, events: List[Dict[str, Any]]) -> List[int]:
+        """
+        Append events with a single write + fsync.
+
+        Args:
+            conversation_id: Conversation identifier
+            events: Events to append (message_count and seq are filled in here)
+
+        Returns:
+            The conversation's message count before each event
+        """
+        with self._locked_log(conversation_id) as f:
+            last, truncated = self._read_tail(f)
+            if last is None:
+                raise ValueError(f"Conversation {conversation_id} not found")
+
+            message_count = last["message_count"]
+            seq = last.get("seq", 0)
+            counts = []
+            for event in events:
+                if event["type"] == "late_result" and not 0 <= event["index"] < message_count:
+                    raise ValueError(f"Message {event['index']} not found in conversation {conversation_id}")
+                counts.append(message_count)
+                if event["type"] in MESSAGE_EVENTS:
+                    message_count += 1
+                seq += 1
+                event["message_count"] = message_count
+                event["seq"] = seq
+
+            # Terminate a line left half-written by a crash so these events stay parseable
+            f.write((b"\n" if truncated else b"") + b"".join(_encode_event(event) for event in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+        if seq >= self.compact_events:
+            self._schedule_compaction(conversation_id)
+        return counts
+
+    def _schedule_compaction(self, conversation_id: str):
+        """Queue a background compaction unless one is already pending."""
+        with self._compacting_lock:
+            if conversation_id in self._compacting:
+                return
+            self._compacting.add(conversation_id)
+        self._compactor.submit(self._run_compaction, conversation_id)
+
+    def _run_compaction(self, conversation_id: str):
+        try:
+            self.compact(conversation_id)
+        except Exception as e:
+            print(f"Failed to compact log for {conversation_id}: {e}")
+        finally:
+            with self._compacting_lock:
+                self._compacting.discard(conversation_id)
+
+    def _write_snapshot(self, path: str, conversation: Dict[str, Any]):
+        """Atomically replace a log with a single snapshot event."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_encode_event({
+                "type": "snapshot",
+                "conversation": conversation,
+                "message_count": len(conversation["messages"]),
+                "seq": 0,
+            }))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def compact(self, conversation_id: str) -> bool:
+        """
+        Fold a conversation's log into a single snapshot event.
+
+        Returns:
+            True if the log was rewritten
+        """
+        with self._locked_log(conversation_id) as f:
+            f.seek(0)
+            conversation, events = self._replay(f.read())
+            if conversation is None or events == 0:
+                return False
+            self._write_snapshot(self.get_log_path(conversation_id), conversation)
+        return True
+
+    def _record(self, conversation_id: str, **fields):
+        self.index.record({"id": conversation_id, **fields})
+
+    def create_conversation(self, conversation_id: str) -> Dict[str, Any]:
+        conversation = {
+            "id": conversation_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "title": "New Conversation",
+            "messages": []
+        }
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+        with self._locked_log(conversation_id, create=True) as f:
+            f.write(_encode_event({
+                "type": "created",
+                "id": conversation_id,
+                "created_at": conversation["created_at"],
+                "title": conversation["title"],
+                "message_count": 0,
+                "seq": 0,
+            }))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._record(conversation_id, created_at=conversation["created_at"], title=conversation["title"], message_count=0)
+        return conversation
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.get_log_path(conversation_id), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return self._replay(data)[0]
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        path = self.get_log_path(conversation["id"])
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+        with self._locked_log(conversation["id"], create=True):
+            self._write_snapshot(path, conversation)
+        self.index.record(conversation_metadata(conversation))
+
+    def _scan_metadata(self) -> Iterator[Dict[str, Any]]:
+        """Replay every log for its metadata (only to build a missing index)."""
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+        for filename in os.listdir(self.data_dir):
+            if filename.endswith('.jsonl'):
+                conversation = self.get_conversation(filename[:-len('.jsonl')])
+                if conversation is not None:
+                    yield conversation_metadata(conversation)
+
+    def list_conversations(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        return self.index.page(limit, decode_cursor(before), order)
+
+    def get_metadata(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self.index.get(conversation_id)
+
+    def apply_mutations(self, conversation_id: str, mutations: List[Mutation]) -> List[Any]:
+        """Append one event per mutation, all in a single write + fsync."""
+        events = [_mutation_event(mutation) for mutation in mutations]
+        counts = self._append(conversation_id, events)
+
+        fields = {"message_count": events[-1]["message_count"]}
+        for event in events:
+            if event["type"] == "title":
+                fields["title"] = event["title"]
+        self._record(conversation_id, **fields)
+
+        return [
+            count if event["type"] in MESSAGE_EVENTS else None
+            for event, count in zip(events, counts)
+        ]
+
+    def add_user_message(self, conversation_id: str, content: str):
+        self.apply_mutations(conversation_id, [("add_user_message", (content,))])
+
+    def add_assistant_message(
+        self,
+        conversation_id: str,
+        stage1: List[Dict[str, Any]],
+        stage2: List[Dict[str, Any]],
+        stage3: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        return self.apply_mutations(
+            conversation_id, [("add_assistant_message", (stage1, stage2, stage3, metadata))]
+        )[0]
+
+    def attach_late_result(
+        self,
+        conversation_id: str,
+        message_index: int,
+        stage: str,
+        result: Dict[str, Any]
+    ):
+        self.apply_mutations(conversation_id, [("attach_late_result", (message_index, stage, result))])
+
+    def update_conversation_title(self, conversation_id: str, title: str):
+        self.apply_mutations(conversation_id, [("update_conversation_title", (title,))])
+
+    def close(self):
+        self._compactor.shutdown(wait=True)
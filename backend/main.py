@@ -1,22 +1,37 @@
 """FastAPI backend for LLM Council."""
 
 import os
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 import uuid
-import json
 import asyncio
+import copy
+import time
 import httpx
 
 try:
     # Package imports (when run as python -m backend.main)
     from . import storage
-    from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
+    from . import async_storage
+    from . import migrate_storage
+    from . import http_client
+    from . import latency
+    from . import resilience
+    from . import response_cache
+    from . import singleflight
+    from . import semantic_cache
+    from . import blob_store
+    from . import bulk_transfer
+    from . import cold_storage
+    from . import serialization
+    from .council import run_full_council, run_council_events, generate_conversation_title, message_metadata
     from .config import (
         OPENROUTER_API_KEY,
+        STORAGE_BACKEND,
         get_council_models,
         get_chairman_model,
         CHAT_COUNCIL_MODELS,
@@ -25,13 +40,31 @@ try:
         CHAT_CHAIRMAN_MODEL,
         CODE_CHAIRMAN_MODEL,
         IMAGE_CHAIRMAN_MODEL,
+        IMAGE_CACHE_MAX_AGE,
+        IMAGE_THUMBNAIL_SIZES,
+        IMAGE_THUMBNAIL_DEFAULT_SIZE,
+        COLD_TIER_AFTER_DAYS,
+        COLD_TIER_INTERVAL_HOURS,
     )
 except ImportError:
     # Standalone imports (when run from /app on Railway)
     import storage
-    from council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
+    import async_storage
+    import migrate_storage
+    import http_client
+    import latency
+    import resilience
+    import response_cache
+    import singleflight
+    import semantic_cache
+    import blob_store
+    import bulk_transfer
+    import cold_storage
+    import serialization
+    from council import run_full_council, run_council_events, generate_conversation_title, message_metadata
     from config import (
         OPENROUTER_API_KEY,
+        STORAGE_BACKEND,
         get_council_models,
         get_chairman_model,
         CHAT_COUNCIL_MODELS,
@@ -40,9 +73,48 @@ except ImportError:
         CHAT_CHAIRMAN_MODEL,
         CODE_CHAIRMAN_MODEL,
         IMAGE_CHAIRMAN_MODEL,
+        IMAGE_CACHE_MAX_AGE,
+        IMAGE_THUMBNAIL_SIZES,
+        IMAGE_THUMBNAIL_DEFAULT_SIZE,
+        COLD_TIER_AFTER_DAYS,
+        COLD_TIER_INTERVAL_HOURS,
     )
 
-app = FastAPI(title="LLM Council API", version="0.2.0")
+
+async def cold_tier_loop():
+    """Periodically move conversations nobody has modified in a while into cold storage."""
+    while True:
+        try:
+            await async_storage.call(storage.archive_cold, COLD_TIER_AFTER_DAYS)
+        except Exception as e:
+            print(f"Cold tiering failed: {e}")
+        await asyncio.sleep(COLD_TIER_INTERVAL_HOURS * 3600)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create and warm shared resources on startup, release them on shutdown."""
+    latency.load_histograms()
+    if STORAGE_BACKEND == "sqlite":
+        migrate_storage.migrate_if_empty()
+    storage.build_search_index_if_empty()
+    storage.build_leaderboard_if_empty()
+    await http_client.start_client()
+    cold_tier_task = asyncio.create_task(cold_tier_loop()) if COLD_TIER_INTERVAL_HOURS > 0 else None
+    yield
+    if cold_tier_task:
+        cold_tier_task.cancel()
+    await http_client.close_client()
+    latency.save_histograms()
+    await async_storage.close()
+
+
+app = FastAPI(
+    title="LLM Council API",
+    version="0.2.0",
+    lifespan=lifespan,
+    default_response_class=serialization.FastJSONResponse
+)
 
 # CORS configuration - extend with FRONTEND_URL for production
 allowed_origins = ["http://localhost:5173", "http://localhost:3000"]
@@ -57,6 +129,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -89,6 +162,46 @@ class Conversation(BaseModel):
     messages: List[Dict[str, Any]]
 
 
+class MessagePage(BaseModel):
+    """A range of a conversation's messages."""
+    total: int
+    offset: int
+    messages: List[Dict[str, Any]]
+
+
+class LateResultSink:
+    """Attaches straggler results to an assistant message once it is stored."""
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.message_index: Optional[int] = None
+        self.pending: List[tuple] = []
+        self.tasks: set = set()
+
+    def add(self, stage: str, result: Dict[str, Any]):
+        """Attach a late result, or hold it until the message is stored."""
+        if self.message_index is None:
+            self.pending.append((stage, result))
+            return
+
+        task = asyncio.create_task(self._attach(stage, result))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _attach(self, stage: str, result: Dict[str, Any]):
+        try:
+            await async_storage.attach_late_result(self.conversation_id, self.message_index, stage, result)
+        except Exception as e:
+            print(f"Failed to attach late {stage} result: {e}")
+
+    def bind(self, message_index: int):
+        """Record where the assistant message was stored and flush held results."""
+        self.message_index = message_index
+        pending, self.pending = self.pending, []
+        for stage, result in pending:
+            self.add(stage, result)
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -96,65 +209,151 @@ async def root():
 
 
 @app.get("/api/conversations", response_model=List[ConversationMetadata])
-async def list_conversations():
-    """List all conversations (metadata only)."""
-    return storage.list_conversations()
+async def list_conversations(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[str] = None,
+    order: Literal["desc", "asc"] = "desc"
+):
+    """
+    List conversations (metadata only), optionally one page at a time.
+
+    Pass the X-Next-Cursor header of a page as `before` to get the next one.
+    """
+    conversations = await async_storage.list_conversations(limit, before, order)
+    if limit is not None and len(conversations) == limit:
+        response.headers["X-Next-Cursor"] = storage.encode_cursor(conversations[-1])
+    return conversations
 
 
 @app.post("/api/conversations", response_model=Conversation)
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
     conversation_id = str(uuid.uuid4())
-    conversation = storage.create_conversation(conversation_id)
+    conversation = await async_storage.create_conversation(conversation_id)
     return conversation
 
 
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
 async def get_conversation(conversation_id: str):
     """Get a specific conversation with all its messages."""
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await async_storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return conversation
 
 
+@app.get("/api/conversations/{conversation_id}/messages", response_model=MessagePage)
+async def get_messages(
+    conversation_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    newest: Optional[int] = Query(None, ge=1, le=1000),
+    view: Literal["full", "summary"] = "full"
+):
+    """
+    Get a range of a conversation's messages.
+
+    Pass `newest` for the last N messages, or `offset`/`limit` for any range.
+    The "summary" view keeps user messages and stage 3 answers only; fetch
+    stage 1/2 details per message from /messages/{index}/{stage}.
+    """
+    metadata = await async_storage.get_metadata(conversation_id)
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    total = metadata["message_count"]
+    if newest is not None:
+        offset, limit = max(0, total - newest), newest
+
+    stages = storage.SUMMARY_STAGES if view == "summary" else None
+    messages = await async_storage.get_messages(conversation_id, offset, limit, stages)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"total": total, "offset": offset, "messages": messages}
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{message_index}/{stage}")
+async def get_message_stage(
+    conversation_id: str,
+    message_index: int,
+    stage: Literal["stage1", "stage2"]
+):
+    """
+    Get the stage 1 responses or stage 2 rankings of one assistant message,
+    including results that arrived after the stage advanced.
+    """
+    messages = await async_storage.get_messages(
+        conversation_id, message_index, 1, (stage, "late_results")
+    )
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if message_index < 0 or not messages or stage not in messages[0]:
+        raise HTTPException(status_code=404, detail=f"Message {message_index} has no {stage}")
+
+    message = messages[0]
+    return {
+        "index": message_index,
+        "stage": stage,
+        "results": message[stage],
+        "late_results": message.get("late_results", {}).get(stage, []),
+    }
+
+
 @app.post("/api/conversations/{conversation_id}/message")
 async def send_message(conversation_id: str, request: SendMessageRequest):
     """
     Send a message and run the 3-stage council process.
     Returns the complete response with all stages.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
+    # Check if conversation exists (metadata only; messages aren't needed)
+    conversation = await async_storage.get_metadata(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
+    is_first_message = conversation["message_count"] == 0
 
     # Add user message
-    storage.add_user_message(conversation_id, request.content)
+    await async_storage.add_user_message(conversation_id, request.content)
 
-    # If this is the first message, generate a title
+    # If this is the first message, generate a title alongside the council run
+    title_task = None
     if is_first_message:
-        title = await generate_conversation_title(request.content)
-        storage.update_conversation_title(conversation_id, title)
-
-    # Run the 3-stage council process with mode and custom models
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
-        request.content,
-        mode=request.mode or "chat",
-        custom_models=request.custom_models,
-        chairman_model=request.chairman_model
+        title_task = asyncio.create_task(generate_conversation_title(request.content))
+
+    # Run the 3-stage council process with mode and custom models, sharing
+    # the run with any identical request already in flight
+    mode = request.mode or "chat"
+    late_results = LateResultSink(conversation_id)
+    key = singleflight.make_key(
+        request.content, mode, request.custom_models, request.chairman_model
+    )
+    stage1_results, stage2_results, stage3_result, metadata = await singleflight.run_once(
+        key,
+        lambda on_straggler: run_full_council(
+            request.content,
+            mode=mode,
+            custom_models=request.custom_models,
+            chairman_model=request.chairman_model,
+            on_straggler=on_straggler
+        ),
+        on_straggler=late_results.add
     )
 
-    # Add assistant message with all stages
-    storage.add_assistant_message(
+    # Store the title and the assistant message together (coalesced into one write)
+    writes = []
+    if title_task:
+        writes.append(async_storage.update_conversation_title(conversation_id, await title_task))
+    writes.append(async_storage.add_assistant_message(
         conversation_id,
         stage1_results,
         stage2_results,
-        stage3_result
-    )
+        stage3_result,
+        message_metadata(metadata)
+    ))
+    message_index = (await asyncio.gather(*writes))[-1]
+    late_results.bind(message_index)
 
     # Return the complete response with metadata
     return {
@@ -171,18 +370,18 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
     Send a message and stream the 3-stage council process.
     Returns Server-Sent Events as each stage completes.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
+    # Check if conversation exists (metadata only; messages aren't needed)
+    conversation = await async_storage.get_metadata(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
+    is_first_message = conversation["message_count"] == 0
 
     async def event_generator():
         try:
             # Add user message
-            storage.add_user_message(conversation_id, request.content)
+            await async_storage.add_user_message(conversation_id, request.content)
 
             # Start title generation in parallel (don't await yet)
             title_task = None
@@ -191,52 +390,63 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
 
             # Get mode and custom models from request
             mode = request.mode or "chat"
-            custom_models = request.custom_models
-            chairman = request.chairman_model
-
-            # Stage 1: Collect responses
-            yield f"data: {json.dumps({'type': 'stage1_start', 'mode': mode})}\n\n"
-            stage1_results = await stage1_collect_responses(
-                request.content, mode=mode, custom_models=custom_models
-            )
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
+            late_results = LateResultSink(conversation_id)
 
-            # Stage 2: Collect rankings
-            yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
-            stage2_results, label_to_model = await stage2_collect_rankings(
-                request.content, stage1_results, mode=mode, custom_models=custom_models
+            # Stream the council run, attaching to an identical run already in flight
+            key = singleflight.make_key(
+                request.content, mode, request.custom_models, request.chairman_model,
+                kind="stream"
             )
-            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings, 'mode': mode}})}\n\n"
-
-            # Stage 3: Synthesize final answer
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
-            stage3_result = await stage3_synthesize_final(
-                request.content, stage1_results, stage2_results,
-                mode=mode, chairman_model=chairman
+            council_events = singleflight.stream_once(
+                key,
+                lambda on_straggler: run_council_events(
+                    request.content,
+                    mode=mode,
+                    custom_models=request.custom_models,
+                    chairman_model=request.chairman_model,
+                    on_straggler=on_straggler
+                ),
+                on_straggler=late_results.add
             )
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
+
+            outcome = None
+            async for event in council_events:
+                if event['type'] == 'council_complete':
+                    # Shared with every caller attached to the run; this one gets its own copy
+                    outcome = copy.deepcopy(event)
+                    continue
+                yield serialization.sse_event(event)
+                if event['type'] == 'error':
+                    return
+
+            stage1_results = outcome['stage1']
+            stage2_results = outcome['stage2']
+            stage3_result = outcome['stage3']
 
             # Wait for title generation if it was started
+            writes = []
             if title_task:
                 title = await title_task
-                storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
+                writes.append(async_storage.update_conversation_title(conversation_id, title))
+                yield serialization.sse_event({'type': 'title_complete', 'data': {'title': title}})
 
-            # Save complete assistant message
-            storage.add_assistant_message(
+            # Save complete assistant message, together with the title (coalesced into one write)
+            writes.append(async_storage.add_assistant_message(
                 conversation_id,
                 stage1_results,
                 stage2_results,
-                stage3_result
-            )
+                stage3_result,
+                message_metadata(outcome['metadata'])
+            ))
+            message_index = (await asyncio.gather(*writes))[-1]
+            late_results.bind(message_index)
 
             # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield serialization.sse_event({'type': 'complete'})
 
         except Exception as e:
             # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield serialization.sse_event({'type': 'error', 'message': str(e)})
 
     return StreamingResponse(
         event_generator(),
@@ -252,6 +462,53 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
 # Model Management Endpoints
 # ═══════════════════════════════════════════════════════════════════════════
 
+def _image_response(path: str, media_type: str, etag: str, if_none_match: Optional[str]) -> Response:
+    """Serve an immutable blob with validators; FileResponse handles Range requests."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable",
+        # Blobs are model output served from the API origin: never sniff or run them
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; sandbox",
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@app.get("/api/images/{blob_id}")
+async def get_image(blob_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Serve a generated image from the blob store.
+    """
+    path = blob_store.get_blob_path(blob_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return _image_response(path, blob_store.mime_type_for(blob_id), f'"{blob_id}"', if_none_match)
+
+
+@app.get("/api/images/{blob_id}/thumbnail")
+async def get_image_thumbnail(
+    blob_id: str,
+    size: int = IMAGE_THUMBNAIL_DEFAULT_SIZE,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Serve a PNG thumbnail of a generated image (the original if Pillow is not installed).
+    """
+    if size not in IMAGE_THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {list(IMAGE_THUMBNAIL_SIZES)}")
+    if blob_store.get_blob_path(blob_id) is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    path = await asyncio.to_thread(blob_store.get_thumbnail_path, blob_id, size)
+    if path is None:
+        return await get_image(blob_id, if_none_match)
+
+    return _image_response(path, "image/png", f'"{blob_id}-{size}"', if_none_match)
+
+
 @app.get("/api/models/available")
 async def list_available_models():
     """
@@ -259,42 +516,202 @@ async def list_available_models():
     Returns a curated list of popular text generation models.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://openrouter.ai/api/v1/models",
-                headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
-                timeout=30.0
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            # Filter and format models
-            models = []
-            for model in data.get("data", []):
-                model_id = model.get("id", "")
-                # Filter out embedding, moderation, and deprecated models
-                if any(x in model_id.lower() for x in ["embed", "moderation", "deprecated"]):
-                    continue
+        client = http_client.get_client()
+        response = await client.get(
+            "https://openrouter.ai/api/v1/models",
+            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+            timeout=30.0
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        # Filter and format models
+        models = []
+        for model in data.get("data", []):
+            model_id = model.get("id", "")
+            # Filter out embedding, moderation, and deprecated models
+            if any(x in model_id.lower() for x in ["embed", "moderation", "deprecated"]):
+                continue
+
+            models.append({
+                "id": model_id,
+                "name": model.get("name", model_id),
+                "description": model.get("description", ""),
+                "context_length": model.get("context_length", 0),
+                "pricing": {
+                    "prompt": model.get("pricing", {}).get("prompt", 0),
+                    "completion": model.get("pricing", {}).get("completion", 0),
+                },
+                "top_provider": model.get("top_provider", {}).get("max_completion_tokens", 0),
+            })
+
+        # Sort by name
+        models.sort(key=lambda x: x["name"].lower())
+
+        return {"models": models, "count": len(models)}
 
-                models.append({
-                    "id": model_id,
-                    "name": model.get("name", model_id),
-                    "description": model.get("description", ""),
-                    "context_length": model.get("context_length", 0),
-                    "pricing": {
-                        "prompt": model.get("pricing", {}).get("prompt", 0),
-                        "completion": model.get("pricing", {}).get("completion", 0),
-                    },
-                    "top_provider": model.get("top_provider", {}).get("max_completion_tokens", 0),
-                })
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch models: {str(e)}")
 
-            # Sort by name
-            models.sort(key=lambda x: x["name"].lower())
 
-            return {"models": models, "count": len(models)}
+@app.get("/api/stats/http-pool")
+async def get_http_pool_stats():
+    """
+    Get connection pool statistics for the shared HTTP client.
+    """
+    return http_client.get_pool_stats()
 
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch models: {str(e)}")
+
+@app.get("/api/stats/latency")
+async def get_latency_stats():
+    """
+    Get per-model latency percentiles and the adaptive timeouts derived from them.
+    """
+    return latency.get_latency_stats()
+
+
+@app.get("/api/stats/cache")
+async def get_response_cache_stats():
+    """
+    Get model response cache counters (hits, misses, evictions) and tier sizes.
+    """
+    return response_cache.get_cache_stats()
+
+
+@app.get("/api/stats/coalescing")
+async def get_coalescing_stats():
+    """
+    Get counters for council runs shared between identical concurrent requests.
+    """
+    return singleflight.get_singleflight_stats()
+
+
+@app.get("/api/stats/semantic-cache")
+async def get_semantic_cache_stats():
+    """
+    Get semantic cache counters and entries per council configuration.
+    """
+    return semantic_cache.get_semantic_cache_stats()
+
+
+@app.get("/api/search")
+async def search_conversations(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Full-text search over past user messages and council answers.
+
+    Hits are ranked best first; matched terms are wrapped in ** in snippets.
+    """
+    start = time.perf_counter()
+    hits = await async_storage.search(q, limit)
+
+    conversation_ids = list(dict.fromkeys(hit["conversation_id"] for hit in hits))
+    metadata = await asyncio.gather(*[async_storage.get_metadata(cid) for cid in conversation_ids])
+    titles = {cid: meta["title"] for cid, meta in zip(conversation_ids, metadata) if meta}
+    for hit in hits:
+        hit["title"] = titles.get(hit["conversation_id"])
+
+    return {
+        "query": q,
+        "hits": hits,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+@app.get("/api/leaderboard")
+async def get_leaderboard(mode: Optional[Literal["chat", "code", "image"]] = None):
+    """
+    Model standings aggregated over every stored council run.
+
+    Totals are kept up to date as messages are stored, so this never scans
+    conversations. Models are ordered by Bradley-Terry strength.
+    """
+    return await async_storage.get_leaderboard(mode)
+
+
+@app.get("/api/export")
+async def export_conversations(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    compression: Literal["none", "gzip", "zstd"] = "none"
+):
+    """
+    Stream all conversations, or those created in [since, until), as NDJSON.
+
+    One conversation per line, oldest first; optionally gzip or zstd compressed.
+    """
+    if compression == "zstd" and not bulk_transfer.ZSTD_AVAILABLE:
+        raise HTTPException(status_code=400, detail="zstd compression requires the zstandard package")
+
+    filename = f"conversations-{time.strftime('%Y%m%d-%H%M%S')}{bulk_transfer.FILE_EXTENSIONS[compression]}"
+    return StreamingResponse(
+        bulk_transfer.export_ndjson(storage.get_backend(), since, until, compression),
+        media_type=bulk_transfer.MEDIA_TYPES[compression],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.post("/api/import")
+async def import_conversations(request: Request, replace: bool = False):
+    """
+    Import conversations from an NDJSON body (as produced by /api/export).
+
+    The body is parsed as it streams in (gzip/zstd detected automatically)
+    and saved in batches. Existing conversations are skipped unless replace=true.
+    """
+    importer = bulk_transfer.NDJSONImporter(
+        storage.save_conversations,
+        lambda conversation_id: storage.get_metadata(conversation_id) is not None,
+        replace
+    )
+    try:
+        async for chunk in request.stream():
+            await async_storage.call(importer.feed, chunk)
+        return await async_storage.call(importer.finish)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable import stream: {e}")
+
+
+@app.get("/api/stats/transfer")
+async def get_transfer_stats():
+    """
+    Get the throughput of the last NDJSON export and import.
+    """
+    return bulk_transfer.get_transfer_stats()
+
+
+@app.get("/api/stats/cold-storage")
+async def get_cold_storage_stats():
+    """
+    Get disk and memory savings of the last cold-tiering run.
+    """
+    return cold_storage.get_cold_storage_stats()
+
+
+@app.get("/api/stats/storage")
+async def get_storage_stats():
+    """
+    Get storage write coalescing and conversation cache counters.
+    """
+    return async_storage.get_storage_stats()
+
+
+@app.get("/api/stats/images")
+async def get_image_stats():
+    """
+    Get image blob store counters.
+    """
+    return blob_store.get_blob_stats()
+
+
+@app.get("/api/models/health")
+async def get_model_health():
+    """
+    Get circuit breaker state and adaptive concurrency limits per model.
+    """
+    return resilience.get_resilience_stats()
 
 
 @app.get("/api/models/config")
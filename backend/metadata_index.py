@@ -0,0 +1,227 @@
+"""Conversation metadata index for file-based storage backends.
+
+Keeps id/created_at/title/message_count for every conversation in memory,
+backed by an append-only JSONL journal: each create, append or title
+change writes one line, so listing never opens conversation files. Other
+worker processes pick up new journal lines on their next read, and the
+journal is compacted once it is mostly superseded entries.
+
+Appends and compaction hold an exclusive flock on the journal, so a
+snapshot never drops a concurrent append. Each snapshot starts with a
+generation header and replaces the file; readers that see a new file or
+generation reload it from the start instead of resuming at a stale offset.
+"""
+
+import bisect
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple, IO
+try:
+    from . import serialization
+except ImportError:
+    import serialization
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+# Rewrite the journal once it holds this many lines per live conversation
+COMPACT_RATIO = 4
+
+
+def _generation(line: bytes) -> Optional[str]:
+    """Snapshot generation from a journal's first line (None for journals without a header)."""
+    try:
+        header = serialization.loads(line)
+    except ValueError:
+        return None
+    return header.get("generation") if isinstance(header, dict) else None
+
+
+class MetadataIndex:
+    """In-memory conversation metadata, sorted by (created_at, id)."""
+
+    def __init__(self, path: str, build: Callable[[], Iterable[Dict[str, Any]]]):
+        """
+        Args:
+            path: JSONL journal file
+            build: Yields metadata for every stored conversation; used when no journal exists yet
+        """
+        self.path = path
+        self._build = build
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._order: List[Tuple[str, str]] = []
+        self._offset = 0
+        self._lines = 0
+        self._loaded = False
+        # Identity of the journal read so far: (device, inode) and snapshot generation
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._generation: Optional[str] = None
+
+    def _apply(self, entry: Dict[str, Any]):
+        """Merge one journal entry into memory, keeping the sort order."""
+        existing = self._entries.get(entry["id"])
+        if existing is None:
+            bisect.insort(self._order, (entry["created_at"], entry["id"]))
+            self._entries[entry["id"]] = dict(entry)
+        else:
+            existing.update(entry)
+
+    def _reset(self):
+        self._entries, self._order, self._offset, self._lines = {}, [], 0, 0
+        self._generation = None
+
+    def _refresh(self):
+        """Load the journal, or read lines other processes appended since the last call."""
+        if not self._loaded and not os.path.exists(self.path):
+            self._rebuild()
+            return
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self._offset:
+            # Replaced by another process's snapshot: start over
+            self._reset()
+        elif stat.st_size == self._offset and self._loaded:
+            return
+
+        with open(self.path, 'rb') as f:
+            if self._offset and _generation(f.readline()) != self._generation:
+                # A snapshot that happened to reuse the inode
+                self._reset()
+            opened = os.fstat(f.fileno())
+            self._file_id = (opened.st_dev, opened.st_ino)
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written by a concurrent append
+                self._offset += len(line)
+                try:
+                    entry = serialization.loads(line)
+                    if "generation" in entry:
+                        self._generation = entry["generation"]
+                        continue
+                    self._lines += 1
+                    self._apply(entry)
+                except (ValueError, KeyError, TypeError):
+                    continue
+        self._loaded = True
+
+    def _rebuild(self):
+        """Create the journal from the backend's conversations (first run only)."""
+        self._entries, self._order = {}, []
+        for entry in self._build():
+            self._apply(entry)
+        with self._locked():
+            self._write_snapshot()
+        self._loaded = True
+
+    def _write_snapshot(self):
+        """Rewrite the journal as a new generation with one line per conversation."""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        generation = os.urandom(8).hex()
+        data = serialization.dumpb({"generation": generation}) + b"\n" + b"".join(
+            serialization.dumpb(self._entries[id]) + b"\n" for _, id in self._order
+        )
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            written = os.fstat(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._offset = len(data)
+        self._lines = len(self._order)
+        self._file_id = (written.st_dev, written.st_ino)
+        self._generation = generation
+
+    @contextmanager
+    def _locked(self) -> Iterator[IO[bytes]]:
+        """
+        Open the journal for appending under an exclusive flock.
+
+        Compaction replaces the file, so after locking we check we still
+        hold the current inode and reopen if not.
+        """
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            f = open(self.path, 'ab')
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                current = os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                break
+            f.close()
+
+        try:
+            yield f
+        finally:
+            f.close()  # closing releases the flock
+
+    def _append(self, entry: Dict[str, Any]):
+        """Journal one change (a single O_APPEND write under the journal lock)."""
+        with self._locked() as f:
+            f.write(serialization.dumpb(entry) + b"\n")
+
+    def _compact(self):
+        """Snapshot the journal; appends wait for the lock, so none can be lost."""
+        with self._locked():
+            self._refresh()
+            self._write_snapshot()
+
+    def record(self, entry: Dict[str, Any]):
+        """
+        Record a new conversation or changed fields of an existing one.
+
+        Args:
+            entry: Dict with 'id' and any of created_at, title, message_count
+        """
+        with self._lock:
+            self._refresh()
+            self._append(entry)
+            self._refresh()
+            if self._lines > COMPACT_RATIO * max(len(self._entries), 16):
+                self._compact()
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get the metadata for one conversation."""
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(conversation_id)
+            return dict(entry) if entry else None
+
+    def page(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[str, str]] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one page of metadata in (created_at, id) order.
+
+        Args:
+            limit: Maximum entries to return (None for all)
+            before: (created_at, id) cursor; only entries past it in the sort order are returned
+            order: "desc" (newest first) or "asc"
+
+        Returns:
+            List of metadata dicts
+        """
+        with self._lock:
+            self._refresh()
+            if order == "desc":
+                end = bisect.bisect_left(self._order, before) if before else len(self._order)
+                start = max(end - limit, 0) if limit is not None else 0
+                keys = reversed(self._order[start:end])
+            else:
+                start = bisect.bisect_right(self._order, before) if before else 0
+                end = start + limit if limit is not None else len(self._order)
+                keys = self._order[start:end]
+            return [dict(self._entries[id]) for _, id in keys]
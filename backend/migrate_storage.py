@@ -0,0 +1,115 @@
+"""One-shot migration of JSON conversation files into the SQLite backend.
+
+Usage:
+    python -m backend.migrate_storage [--source data/conversations] [--db data/council.db]
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Any
+try:
+    from .config import DATA_DIR, SQLITE_PATH
+    from .sqlite_storage import SQLiteStorage
+    from . import cold_storage
+    from . import serialization
+except ImportError:
+    from config import DATA_DIR, SQLITE_PATH
+    from sqlite_storage import SQLiteStorage
+    import cold_storage
+    import serialization
+
+# Conversations inserted per transaction
+BATCH_SIZE = 200
+
+
+def migrate_json_to_sqlite(source_dir: str = DATA_DIR, db_path: str = SQLITE_PATH) -> Dict[str, Any]:
+    """
+    Copy every data/conversations/*.json file (and compressed cold-tier
+    file) into the SQLite database.
+
+    Conversations already present in the database are left untouched, so
+    the migration can be re-run safely.
+
+    Args:
+        source_dir: Directory holding <id>.json conversation files
+        db_path: SQLite database to write into
+
+    Returns:
+        Dict with migrated, skipped and failed counts and elapsed seconds
+    """
+    start = time.monotonic()
+    stats = {"migrated": 0, "skipped": 0, "failed": 0}
+    if not os.path.isdir(source_dir):
+        return {**stats, "seconds": 0.0}
+
+    target = SQLiteStorage(db_path)
+    existing = {conversation["id"] for conversation in target.list_conversations()}
+
+    batch = []
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.endswith(('.json',) + cold_storage.JSON_COLD_SUFFIXES):
+            continue
+        path = os.path.join(source_dir, filename)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if filename.endswith(cold_storage.JSON_COLD_SUFFIXES):
+                data = cold_storage.decompress(data)
+            conversation = serialization.loads(data)
+            missing = [key for key in ("id", "created_at", "messages") if key not in conversation]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable conversation file {path}: {e}")
+            stats["failed"] += 1
+            continue
+
+        if conversation["id"] in existing:
+            stats["skipped"] += 1
+            continue
+
+        batch.append(conversation)
+        if len(batch) >= BATCH_SIZE:
+            target.save_conversations(batch)
+            stats["migrated"] += len(batch)
+            batch = []
+
+    if batch:
+        target.save_conversations(batch)
+        stats["migrated"] += len(batch)
+
+    target.close()
+    return {**stats, "seconds": round(time.monotonic() - start, 2)}
+
+
+def migrate_if_empty(source_dir: str = DATA_DIR, db_path: str = SQLITE_PATH) -> bool:
+    """
+    Run the migration on first start, when the database has no conversations yet.
+
+    Returns:
+        True if a migration was run
+    """
+    if not os.path.isdir(source_dir) or not any(
+        name.endswith(('.json',) + cold_storage.JSON_COLD_SUFFIXES) for name in os.listdir(source_dir)
+    ):
+        return False
+
+    target = SQLiteStorage(db_path)
+    empty = target.conversation_count() == 0
+    target.close()
+    if not empty:
+        return False
+
+    stats = migrate_json_to_sqlite(source_dir, db_path)
+    print(f"Migrated JSON conversations into {db_path}: {stats}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate JSON conversation files into SQLite.")
+    parser.add_argument("--source", default=DATA_DIR, help="Directory of <id>.json files")
+    parser.add_argument("--db", default=SQLITE_PATH, help="SQLite database path")
+    args = parser.parse_args()
+
+    print(migrate_json_to_sqlite(args.source, args.db))
@@ -1,31 +1,136 @@
 """OpenRouter API client for making LLM requests."""
 
+import asyncio
+import time
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple, Union
 try:
-    from .config import OPENROUTER_API_KEY, OPENROUTER_API_URL, IMAGE_GENERATION_CONFIG
+    from .config import (
+        OPENROUTER_API_KEY, OPENROUTER_API_URL, IMAGE_GENERATION_CONFIG,
+        HEDGE_ENABLED, HEDGE_BACKUP_MODELS, RESPONSE_CACHE_ENABLED
+    )
+    from .http_client import get_client
+    from . import latency
+    from . import resilience
+    from . import response_cache
+    from . import blob_store
+    from . import serialization
 except ImportError:
-    from config import OPENROUTER_API_KEY, OPENROUTER_API_URL, IMAGE_GENERATION_CONFIG
+    from config import (
+        OPENROUTER_API_KEY, OPENROUTER_API_URL, IMAGE_GENERATION_CONFIG,
+        HEDGE_ENABLED, HEDGE_BACKUP_MODELS, RESPONSE_CACHE_ENABLED
+    )
+    from http_client import get_client
+    import latency
+    import resilience
+    import response_cache
+    import blob_store
+    import serialization
 
 
 async def query_model(
     model: str,
     messages: List[Dict[str, str]],
-    timeout: float = 120.0,
-    enable_image_generation: bool = False
+    timeout: Optional[float] = None,
+    enable_image_generation: bool = False,
+    use_cache: bool = True,
+    request_options: Optional[Dict[str, Any]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Query a single model via OpenRouter API.
 
+    Identical payloads are served from the response cache. Once a model has
+    latency history, its timeout is derived from that history, and a call
+    running past the model's p95 is hedged with a duplicate request (to the
+    same model or its configured backup). The first successful answer wins
+    and the other request is cancelled.
+
     Args:
         model: OpenRouter model identifier (e.g., "openai/gpt-4o")
         messages: List of message dicts with 'role' and 'content'
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds (None = adaptive per-model timeout)
         enable_image_generation: Enable image generation modalities
+        use_cache: Serve and store this call through the response cache
+        request_options: Extra request parameters, e.g. response_format or max_tokens
 
     Returns:
         Response dict with 'content', optional 'reasoning_details', and optional 'images'
     """
+    cache_key = None
+    if use_cache and RESPONSE_CACHE_ENABLED:
+        cache_key = response_cache.make_key(model, messages, enable_image_generation, request_options)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    result = await _query_model_hedged(model, messages, timeout, enable_image_generation, request_options)
+
+    # A backup model's answer must not be served later as this model's
+    if cache_key is not None and result is not None and result.get('hedged_by', model) == model:
+        await response_cache.put(cache_key, result)
+
+    return result
+
+
+async def _query_model_hedged(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: Optional[float],
+    enable_image_generation: bool,
+    request_options: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Query a model with an adaptive timeout, hedging calls that run past p95."""
+    if timeout is None:
+        timeout = latency.get_timeout(model)
+
+    hedge_delay = latency.get_hedge_delay(model) if HEDGE_ENABLED else None
+    if hedge_delay is None or hedge_delay >= timeout:
+        return await _query_model_once(model, messages, timeout, enable_image_generation, request_options)
+
+    primary = asyncio.ensure_future(
+        _query_model_once(model, messages, timeout, enable_image_generation, request_options)
+    )
+    pending = {primary}
+
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+        if primary in done:
+            pending = set()
+            if primary.result() is not None:
+                return primary.result()
+
+        # Primary is slow (or failed fast): race a duplicate against it
+        hedge_model = HEDGE_BACKUP_MODELS.get(model, model)
+        hedge = asyncio.ensure_future(
+            _query_model_once(
+                hedge_model, messages, latency.get_timeout(hedge_model), enable_image_generation, request_options
+            )
+        )
+        pending.add(hedge)
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result is not None:
+                    if task is hedge:
+                        result['hedged_by'] = hedge_model
+                    return result
+        return None
+    finally:
+        # Cancel the losing request (or both, if we were cancelled ourselves)
+        for task in pending:
+            task.cancel()
+
+
+async def _query_model_once(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    enable_image_generation: bool,
+    request_options: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Send a single request to OpenRouter and record its latency."""
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
@@ -40,37 +145,267 @@ async def query_model(
     if enable_image_generation:
         payload["modalities"] = IMAGE_GENERATION_CONFIG["modalities"]
         payload["image_config"] = IMAGE_GENERATION_CONFIG["image_config"]
+    if request_options:
+        payload.update(request_options)
 
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
-            )
+        async with resilience.model_slot(model):
+            start = time.monotonic()
+            client = get_client()
+            try:
+                response = await client.post(
+                    OPENROUTER_API_URL,
+                    headers=headers,
+                    json=payload,
+                    timeout=timeout
+                )
+            except asyncio.CancelledError:
+                # A call cancelled in flight (e.g. the loser of a hedge race) is the slow
+                # tail; its elapsed time is a lower bound, and dropping it would drag
+                # p95/p99 and so the hedge delay and timeout down over time
+                latency.record_latency(model, time.monotonic() - start)
+                raise
             response.raise_for_status()
+            latency.record_latency(model, time.monotonic() - start)
 
             data = response.json()
             message = data['choices'][0]['message']
+            resilience.record_success(model)
 
-            result = {
-                'content': message.get('content'),
-                'reasoning_details': message.get('reasoning_details')
-            }
+        result = {
+            'content': message.get('content'),
+            'reasoning_details': message.get('reasoning_details')
+        }
 
-            # Extract images if present (base64 encoded in content blocks)
-            if enable_image_generation and message.get('content'):
-                images = extract_images_from_content(message.get('content'))
-                if images:
-                    result['images'] = images
+        # Extract images if present (base64 encoded in content blocks) and
+        # move them into the blob store so results only carry references
+        if enable_image_generation:
+            images = extract_images_from_content(message.get('images') or [])
+            if message.get('content'):
+                images.extend(extract_images_from_content(message.get('content')))
+            if images:
+                # Decoding, hashing and writing the images would block the event loop
+                result['content'], result['images'] = await asyncio.to_thread(
+                    blob_store.externalize_images, result['content'], images
+                )
 
-            return result
+        return result
 
+    except resilience.CircuitOpenError:
+        print(f"Skipping model {model}: circuit open")
+        return None
+    except httpx.TimeoutException as e:
+        latency.record_latency(model, timeout)
+        record_call_failure(model, e)
+        print(f"Timeout querying model {model} after {timeout:.0f}s: {e}")
+        return None
     except Exception as e:
+        record_call_failure(model, e)
         print(f"Error querying model {model}: {e}")
         return None
 
 
+def record_call_failure(model: str, error: Exception):
+    """
+    Feed a failed call into the model's circuit breaker and concurrency limit.
+
+    429/503 responses and timeouts count as overload and shrink the model's
+    concurrency limit; other 4xx responses are request problems, not
+    provider health, and are ignored.
+
+    Args:
+        model: OpenRouter model identifier
+        error: The exception raised by the call
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status in (429, 503):
+            retry_after = resilience.parse_retry_after(error.response.headers.get("Retry-After"))
+            resilience.record_failure(model, overloaded=True, retry_after=retry_after)
+        elif status >= 500:
+            resilience.record_failure(model)
+    elif isinstance(error, httpx.TimeoutException):
+        resilience.record_failure(model, overloaded=True)
+    else:
+        resilience.record_failure(model)
+
+
+async def query_model_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: Optional[float] = None,
+    enable_image_generation: bool = False,
+    use_cache: bool = True,
+    request_options: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a single model's response via OpenRouter API.
+
+    A response cache hit is replayed as a single delta.
+
+    Args:
+        model: OpenRouter model identifier (e.g., "openai/gpt-4o")
+        messages: List of message dicts with 'role' and 'content'
+        timeout: Request timeout in seconds (None = adaptive per-model timeout)
+        enable_image_generation: Enable image generation modalities
+        use_cache: Serve and store this call through the response cache
+        request_options: Extra request parameters, e.g. response_format or max_tokens
+
+    Yields:
+        {'type': 'delta', 'content': str} for each content chunk, then one
+        {'type': 'complete', 'response': dict or None} with the assembled
+        response in the same shape query_model returns
+    """
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+    }
+
+    if enable_image_generation:
+        payload["modalities"] = IMAGE_GENERATION_CONFIG["modalities"]
+        payload["image_config"] = IMAGE_GENERATION_CONFIG["image_config"]
+    if request_options:
+        payload.update(request_options)
+
+    cache_key = None
+    if use_cache and RESPONSE_CACHE_ENABLED:
+        cache_key = response_cache.make_key(model, messages, enable_image_generation, request_options)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            if cached.get('content'):
+                yield {'type': 'delta', 'content': cached['content']}
+            yield {'type': 'complete', 'response': cached}
+            return
+
+    if timeout is None:
+        timeout = latency.get_timeout(model)
+
+    content_parts = []
+    reasoning_details = []
+    image_blocks = []
+
+    try:
+        async with resilience.model_slot(model):
+            start = time.monotonic()
+            client = get_client()
+            async with client.stream(
+                "POST",
+                OPENROUTER_API_URL,
+                headers=headers,
+                json=payload,
+                timeout=timeout
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    # Skip blank lines and SSE comments (": OPENROUTER PROCESSING")
+                    if not line.startswith("data:"):
+                        continue
+
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+
+                    chunk = serialization.loads(data)
+                    if chunk.get('error'):
+                        raise RuntimeError(chunk['error'].get('message', chunk['error']))
+
+                    choices = chunk.get('choices') or []
+                    if not choices:
+                        continue
+
+                    delta = choices[0].get('delta') or {}
+                    if delta.get('content'):
+                        content_parts.append(delta['content'])
+                        yield {'type': 'delta', 'content': delta['content']}
+                    if delta.get('reasoning_details'):
+                        reasoning_details.extend(delta['reasoning_details'])
+                    if delta.get('images'):
+                        image_blocks.extend(delta['images'])
+
+            resilience.record_success(model)
+            latency.record_latency(model, time.monotonic() - start)
+
+    except resilience.CircuitOpenError:
+        print(f"Skipping model {model}: circuit open")
+        yield {'type': 'complete', 'response': None}
+        return
+    except httpx.TimeoutException as e:
+        latency.record_latency(model, timeout)
+        record_call_failure(model, e)
+        print(f"Timeout streaming model {model} after {timeout:.0f}s: {e}")
+        yield {'type': 'complete', 'response': None}
+        return
+    except Exception as e:
+        record_call_failure(model, e)
+        print(f"Error streaming model {model}: {e}")
+        yield {'type': 'complete', 'response': None}
+        return
+
+    content = "".join(content_parts)
+    result = {
+        'content': content,
+        'reasoning_details': reasoning_details or None
+    }
+
+    if enable_image_generation:
+        images = extract_images_from_content(image_blocks)
+        if content:
+            images.extend(extract_images_from_content(content))
+        if images:
+            result['content'], result['images'] = await asyncio.to_thread(
+                blob_store.externalize_images, content, images
+            )
+
+    if cache_key is not None:
+        await response_cache.put(cache_key, result)
+
+    yield {'type': 'complete', 'response': result}
+
+
+async def query_model_streaming(
+    model: str,
+    messages: List[Dict[str, str]],
+    on_delta: Callable[[str], None],
+    timeout: Optional[float] = None,
+    enable_image_generation: bool = False,
+    use_cache: bool = True,
+    request_options: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Query a single model with streaming, forwarding each delta to a callback.
+
+    Args:
+        model: OpenRouter model identifier
+        messages: List of message dicts with 'role' and 'content'
+        on_delta: Called with each content chunk as it arrives
+        timeout: Request timeout in seconds (None = adaptive per-model timeout)
+        enable_image_generation: Enable image generation modalities
+        use_cache: Serve and store this call through the response cache
+        request_options: Extra request parameters, e.g. response_format or max_tokens
+
+    Returns:
+        The assembled response dict (same shape as query_model), or None if failed
+    """
+    result = None
+    async for event in query_model_stream(
+        model, messages, timeout=timeout,
+        enable_image_generation=enable_image_generation, use_cache=use_cache,
+        request_options=request_options
+    ):
+        if event['type'] == 'delta':
+            on_delta(event['content'])
+        else:
+            result = event['response']
+    return result
+
+
 def extract_images_from_content(content: Any) -> List[str]:
     """
     Extract base64 image data URLs from model response content.
@@ -102,10 +437,36 @@ def extract_images_from_content(content: Any) -> List[str]:
     return images
 
 
+def _query_for_fanout(
+    model: str,
+    messages: List[Dict[str, str]],
+    enable_image_generation: bool,
+    on_delta: Optional[Callable[[str, str], None]],
+    use_cache: bool,
+    request_options: Optional[Dict[str, Any]] = None
+):
+    """Build the per-model coroutine used by the parallel fan-out helpers."""
+    if on_delta is not None:
+        return query_model_streaming(
+            model,
+            messages,
+            lambda chunk: on_delta(model, chunk),
+            enable_image_generation=enable_image_generation,
+            use_cache=use_cache,
+            request_options=request_options
+        )
+    return query_model(
+        model, messages, enable_image_generation=enable_image_generation, use_cache=use_cache,
+        request_options=request_options
+    )
+
+
 async def query_models_parallel(
     models: List[str],
     messages: List[Dict[str, str]],
-    enable_image_generation: bool = False
+    enable_image_generation: bool = False,
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    use_cache: bool = True
 ) -> Dict[str, Optional[Dict[str, Any]]]:
     """
     Query multiple models in parallel.
@@ -114,15 +475,15 @@ async def query_models_parallel(
         models: List of OpenRouter model identifiers
         messages: List of message dicts to send to each model
         enable_image_generation: Enable image generation modalities
+        on_delta: Optional callback (model, chunk); when given, models are streamed
+        use_cache: Serve and store these calls through the response cache
 
     Returns:
         Dict mapping model identifier to response dict (or None if failed)
     """
-    import asyncio
-
     # Create tasks for all models
     tasks = [
-        query_model(model, messages, enable_image_generation=enable_image_generation)
+        _query_for_fanout(model, messages, enable_image_generation, on_delta, use_cache)
         for model in models
     ]
 
@@ -131,3 +492,84 @@ async def query_models_parallel(
 
     # Map models to their responses
     return {model: response for model, response in zip(models, responses)}
+
+
+async def query_models_as_completed(
+    models: List[str],
+    messages: Union[List[Dict[str, str]], Dict[str, List[Dict[str, str]]]],
+    enable_image_generation: bool = False,
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    use_cache: bool = True,
+    min_responses: int = 0,
+    soft_deadline: float = 0,
+    on_straggler: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+    request_options: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Query multiple models in parallel, yielding each response as it completes.
+
+    Iteration stops early once `min_responses` successful answers have been
+    yielded, or `soft_deadline` seconds after the first successful answer.
+    Calls still in flight at that point (or when the iterator is closed) are
+    cancelled, unless `on_straggler` is given, in which case they keep running
+    and their result is passed to it when they finish.
+
+    Args:
+        models: List of OpenRouter model identifiers
+        messages: List of message dicts to send to each model, or a dict
+            mapping each model to its own message list
+        enable_image_generation: Enable image generation modalities
+        on_delta: Optional callback (model, chunk); when given, models are streamed
+        use_cache: Serve and store these calls through the response cache
+        min_responses: Stop after this many successful answers (0 = wait for all)
+        soft_deadline: Seconds after the first answer to wait for the rest (0 = no deadline)
+        on_straggler: Optional callback (model, response) for calls left running
+        request_options: Extra request parameters sent to every model, e.g. response_format
+
+    Yields:
+        (model, response) tuples in completion order (response is None if failed)
+    """
+    tasks = {
+        asyncio.ensure_future(
+            _query_for_fanout(
+                model,
+                messages[model] if isinstance(messages, dict) else messages,
+                enable_image_generation, on_delta, use_cache, request_options
+            )
+        ): model
+        for model in models
+    }
+    pending = set(tasks)
+    answered = 0
+    deadline = None
+    loop = asyncio.get_running_loop()
+
+    try:
+        while pending:
+            if min_responses and answered >= min_responses:
+                break
+
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                response = task.result()
+                if response is not None:
+                    answered += 1
+                    if soft_deadline and deadline is None:
+                        deadline = loop.time() + soft_deadline
+                yield tasks.pop(task), response
+    finally:
+        for task in pending:
+            if on_straggler is None:
+                task.cancel()
+            else:
+                task.add_done_callback(
+                    lambda task, model=tasks[task]: task.cancelled() or on_straggler(model, task.result())
+                )
@@ -0,0 +1,437 @@
+"""Rank aggregation over stage 2 judgments, vectorized with NumPy.
+
+A judgment is one judge's ranking of some of the items (models), best
+first. Judges that reviewed only a sample of the responses, or whose
+ranking was only partly parsed, give partial rankings. Rankings are
+encoded once into integer arrays grouped by length; every method works on
+those arrays or on the pairwise win matrix derived from them, so 10^5+
+judgments aggregate in well under a second.
+
+Methods:
+    mean_rank      Average position, rescaled onto 1..N for partial rankings (lower is better)
+    borda          Average share of the other listed items beaten, 0..1
+    copeland       Pairwise majority wins minus losses
+    kemeny         Position in the order agreeing with the most pairwise preferences
+                   (local-search approximation; lower is better)
+    bradley_terry  Maximum-likelihood log-strength from pairwise outcomes
+
+Usage:
+    python -m backend.rank_aggregation [--judgments 100000] [--items 20] [--size 4]
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from itertools import chain, repeat
+from statistics import NormalDist
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Union
+
+import numpy as np
+
+METHODS = ("mean_rank", "borda", "copeland", "kemeny", "bradley_terry")
+
+# Methods whose score is a position (lower is better)
+ASCENDING_METHODS = {"mean_rank", "kemeny"}
+
+# Pseudo-comparisons added between every pair before fitting Bradley-Terry,
+# so items that never lost (or never won) still get finite strengths
+BRADLEY_TERRY_PRIOR = 0.1
+BRADLEY_TERRY_MAX_ITERATIONS = 10000
+BRADLEY_TERRY_TOLERANCE = 1e-9
+
+# Kemeny runs a local search per bootstrap sample, so it uses fewer of them
+KEMENY_MAX_BOOTSTRAP = 50
+
+
+class Judgments:
+    """Rankings encoded as integer item indices, grouped by ranking length."""
+
+    def __init__(self, items: List[str], groups: Dict[int, np.ndarray]):
+        """
+        Args:
+            items: Item names; an item's index is its position in this list
+            groups: Ranking length -> (rankings, length) int array of item indices, best first
+        """
+        self.items = items
+        self.groups = groups
+        self._wins: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_rankings(
+        cls,
+        rankings: Iterable[Sequence[str]],
+        items: Optional[Sequence[str]] = None
+    ) -> "Judgments":
+        """
+        Encode rankings of item names.
+
+        Names are mapped to indices for a whole group of equal-length
+        rankings at once; only rankings with repeats or unknown names take
+        the slow path.
+
+        Args:
+            rankings: Each a sequence of item names, best first (repeats are dropped)
+            items: Items to aggregate; names not listed are ignored. None = every
+                name seen, in order of first appearance
+
+        Returns:
+            Encoded judgments
+        """
+        by_length = defaultdict(list)
+        for ranking in rankings:
+            by_length[len(ranking)].append(ranking)
+        if items is None:
+            items = list(dict.fromkeys(chain.from_iterable(chain.from_iterable(by_length.values()))))
+        items = list(items)
+        index = {item: i for i, item in enumerate(items)}
+
+        encoded = defaultdict(list)
+        for length, group in by_length.items():
+            if length == 0:
+                continue
+            names = chain.from_iterable(group)
+            rows = np.fromiter(
+                map(index.get, names, repeat(-1)), dtype=np.int64, count=len(group) * length
+            ).reshape(len(group), length)
+
+            ordered = np.sort(rows, axis=1)
+            bad = (ordered[:, 0] < 0) | (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+            encoded[length].append(rows[~bad])
+            for row in rows[bad].tolist():
+                cleaned = list(dict.fromkeys(i for i in row if i >= 0))
+                if cleaned:
+                    encoded[len(cleaned)].append(np.array([cleaned], dtype=np.int64))
+
+        return cls(items, {
+            length: np.concatenate(parts)
+            for length, parts in encoded.items()
+            if sum(len(part) for part in parts)
+        })
+
+    @property
+    def count(self) -> int:
+        """Number of (non-empty) rankings."""
+        return sum(len(rows) for rows in self.groups.values())
+
+    def pairwise_wins(self) -> np.ndarray:
+        """
+        Count pairwise preferences (computed once, then cached).
+
+        Returns:
+            (n, n) float array; [a, b] is how many rankings put a above b
+        """
+        if self._wins is not None:
+            return self._wins
+        n = len(self.items)
+        wins = np.zeros((n, n), dtype=np.float64)
+        for length, rows in self.groups.items():
+            if length < 2:
+                continue
+            if length == n and n < 256:
+                # Complete rankings: compare every item's positions against all others at once
+                positions = np.empty((n, len(rows)), dtype=np.uint8)
+                positions[rows.T, np.arange(len(rows))] = np.arange(n, dtype=np.uint8)[:, None]
+                for item in range(n):
+                    wins[item] += np.count_nonzero(positions[item] < positions, axis=1)
+            else:
+                better, worse = np.triu_indices(length, 1)
+                codes = rows[:, better] * n + rows[:, worse]
+                wins += np.bincount(codes.ravel(), minlength=n * n).reshape(n, n)
+        self._wins = wins
+        return wins
+
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _positional(
+    judgments: Judgments,
+    points: str
+) -> Dict[str, np.ndarray]:
+    """
+    Per-item count, mean and standard deviation of positional points.
+
+    Args:
+        judgments: Encoded rankings
+        points: "rank" (position rescaled onto 1..N) or "borda" (share of the
+            other listed items beaten)
+
+    Returns:
+        Dict with "count", "mean" and "std" arrays (NaN where undefined)
+    """
+    n = len(judgments.items)
+    counts = np.zeros(n)
+    sums = np.zeros(n)
+    squares = np.zeros(n)
+
+    for length, rows in judgments.groups.items():
+        if length < 2:
+            if points == "borda" or n > 1:
+                # A single item out of several says nothing about relative quality
+                continue
+            values = np.ones(1)
+        elif points == "borda":
+            values = (length - 1 - np.arange(length)) / (length - 1)
+        elif length == n:
+            values = np.arange(1, length + 1, dtype=np.float64)
+        else:
+            values = 1 + np.arange(length) * (n - 1) / (length - 1)
+
+        flat = rows.ravel()
+        weights = np.tile(values, len(rows))
+        counts += np.bincount(flat, minlength=n)
+        sums += np.bincount(flat, weights=weights, minlength=n)
+        squares += np.bincount(flat, weights=weights * weights, minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        variance = (squares - counts * mean * mean) / (counts - 1)
+    return {"count": counts, "mean": mean, "std": np.sqrt(np.maximum(variance, 0))}
+
+
+def _copeland_scores(wins: np.ndarray) -> np.ndarray:
+    """Copeland score per item; wins may carry leading bootstrap dimensions."""
+    return np.sign(wins - np.swapaxes(wins, -1, -2)).sum(axis=-1)
+
+
+def _bootstrap_wins(wins: np.ndarray, samples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Parametric bootstrap of the win matrix.
+
+    Each pair's comparison count stays fixed and its outcomes are redrawn
+    from the observed win share, which is far cheaper than resampling the
+    rankings themselves.
+
+    Returns:
+        (samples, n, n) array of resampled win matrices
+    """
+    n = len(wins)
+    upper, lower = np.triu_indices(n, 1)
+    totals = wins[upper, lower] + wins[lower, upper]
+    share = np.divide(wins[upper, lower], totals, out=np.full_like(totals, 0.5), where=totals > 0)
+
+    drawn = rng.binomial(totals.astype(np.int64), share, size=(samples, len(totals)))
+    resampled = np.zeros((samples, n, n))
+    resampled[:, upper, lower] = drawn
+    resampled[:, lower, upper] = totals - drawn
+    return resampled
+
+
+def kemeny_order(wins: np.ndarray, start: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Approximate the Kemeny-optimal order by local search.
+
+    Starting from `start` (default: Copeland order), the single move of one
+    item to another position that agrees with the most additional pairwise
+    preferences is applied until no move helps. Each step is evaluated for
+    all items and target positions at once from row prefix sums.
+
+    Args:
+        wins: (n, n) pairwise win matrix
+        start: Initial order of item indices
+
+    Returns:
+        Item indices, best first
+    """
+    n = len(wins)
+    margin = wins - wins.T
+    if start is None:
+        start = np.lexsort((-wins.sum(axis=1), -_copeland_scores(wins)))
+    order = np.array(start, dtype=np.int64)
+    positions = np.arange(n)
+
+    for _ in range(n * n):
+        # ordered[i, k]: preference of the item at position i over the one at position k
+        ordered = margin[np.ix_(order, order)]
+        prefix = np.zeros((n, n + 1))
+        np.cumsum(ordered, axis=1, out=prefix[:, 1:])
+
+        own = prefix[positions, positions]
+        after_own = prefix[positions, positions + 1]
+        # Moving the item at i up to j < i puts it ahead of items j..i-1;
+        # moving it down to j > i puts items i+1..j ahead of it
+        gain = np.where(
+            positions[None, :] < positions[:, None],
+            own[:, None] - prefix[:, :n],
+            after_own[:, None] - prefix[:, 1:]
+        )
+        gain[positions, positions] = 0
+
+        source, target = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[source, target] <= 1e-9:
+            break
+        item = order[source]
+        order = np.insert(np.delete(order, source), target, item)
+    return order
+
+
+def bradley_terry(wins: np.ndarray, prior: float = BRADLEY_TERRY_PRIOR) -> Dict[str, np.ndarray]:
+    """
+    Fit Bradley-Terry strengths by minorization-maximization.
+
+    Args:
+        wins: (n, n) pairwise win matrix
+        prior: Pseudo-wins added each way between every pair
+
+    Returns:
+        Dict with "strength" (log-strength, mean zero) and "se" (standard
+        errors from the observed Fisher information)
+    """
+    n = len(wins)
+    if n == 1:
+        return {"strength": np.zeros(1), "se": np.zeros(1)}
+    regularized = wins + prior * (1 - np.eye(n))
+    comparisons = regularized + regularized.T
+    total_wins = regularized.sum(axis=1)
+
+    strength = np.ones(n)
+    for _ in range(BRADLEY_TERRY_MAX_ITERATIONS):
+        updated = total_wins / (comparisons / (strength[:, None] + strength[None, :])).sum(axis=1)
+        updated /= np.exp(np.log(updated).mean())
+        converged = np.max(np.abs(np.log(updated) - np.log(strength))) < BRADLEY_TERRY_TOLERANCE
+        strength = updated
+        if converged:
+            break
+
+    pair = strength[:, None] * strength[None, :] / (strength[:, None] + strength[None, :]) ** 2
+    information = -comparisons * pair
+    np.fill_diagonal(information, 0)
+    np.fill_diagonal(information, -information.sum(axis=1))
+    # Strengths are only identified up to a constant, so the information is singular
+    covariance = np.linalg.pinv(information)
+    return {"strength": np.log(strength), "se": np.sqrt(np.maximum(np.diag(covariance), 0))}
+
+
+def aggregate(
+    rankings: Union[Judgments, Iterable[Sequence[str]]],
+    method: str = "mean_rank",
+    items: Optional[Sequence[str]] = None,
+    confidence: float = 0.95,
+    bootstrap: int = 200,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate (possibly partial) rankings into one global ranking.
+
+    Args:
+        rankings: Encoded Judgments, or rankings of item names, best first
+        method: One of METHODS
+        items: Items to aggregate when rankings aren't encoded yet (None = every name seen)
+        confidence: Confidence level of the intervals
+        bootstrap: Bootstrap samples for copeland (kemeny uses at most KEMENY_MAX_BOOTSTRAP)
+        seed: Random seed for the bootstrap
+
+    Returns:
+        List of dicts with model, score, ci ([low, high], or None when it
+        can't be estimated) and rankings_count, sorted best to worst. Items
+        that appear in no usable ranking are left out.
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown aggregation method: {method}")
+    judgments = rankings if isinstance(rankings, Judgments) else Judgments.from_rankings(rankings, items)
+    n = len(judgments.items)
+    if n == 0:
+        return []
+
+    z = _z(confidence)
+    tail = (1 - confidence) / 2 * 100
+    rng = np.random.default_rng(seed)
+    ci_low = np.full(n, np.nan)
+    ci_high = np.full(n, np.nan)
+
+    if method in ("mean_rank", "borda"):
+        stats = _positional(judgments, "rank" if method == "mean_rank" else "borda")
+        counts = stats["count"]
+        scores = stats["mean"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            half_width = z * stats["std"] / np.sqrt(counts)
+        ci_low, ci_high = scores - half_width, scores + half_width
+    else:
+        wins = judgments.pairwise_wins()
+        counts = np.zeros(n)
+        for length, rows in judgments.groups.items():
+            if length >= 2:
+                counts += np.bincount(rows.ravel(), minlength=n)
+
+        if method == "copeland":
+            scores = _copeland_scores(wins).astype(np.float64)
+            if bootstrap:
+                samples = _copeland_scores(_bootstrap_wins(wins, bootstrap, rng))
+                ci_low, ci_high = np.percentile(samples, [tail, 100 - tail], axis=0)
+        elif method == "kemeny":
+            order = kemeny_order(wins)
+            scores = np.empty(n)
+            scores[order] = np.arange(1, n + 1)
+            samples = min(bootstrap, KEMENY_MAX_BOOTSTRAP)
+            if samples:
+                positions = np.empty((samples, n))
+                for sample, resampled in enumerate(_bootstrap_wins(wins, samples, rng)):
+                    positions[sample, kemeny_order(resampled, order)] = np.arange(1, n + 1)
+                ci_low, ci_high = np.percentile(positions, [tail, 100 - tail], axis=0)
+        else:
+            fit = bradley_terry(wins)
+            scores = fit["strength"]
+            ci_low, ci_high = scores - z * fit["se"], scores + z * fit["se"]
+
+    present = np.flatnonzero(counts > 0)
+    direction = 1 if method in ASCENDING_METHODS else -1
+    present = present[np.argsort(direction * scores[present], kind="stable")]
+
+    results = []
+    for i in present:
+        ci = None
+        if np.isfinite(ci_low[i]) and np.isfinite(ci_high[i]):
+            ci = [round(float(ci_low[i]), 4), round(float(ci_high[i]), 4)]
+        results.append({
+            "model": judgments.items[i],
+            "score": round(float(scores[i]), 4),
+            "ci": ci,
+            "rankings_count": int(counts[i]),
+        })
+    return results
+
+
+def synthetic_rankings(
+    judgments: int,
+    items: int,
+    size: int,
+    noise: float = 1.0,
+    seed: int = 0
+) -> List[List[str]]:
+    """
+    Generate partial rankings of items with known quality (item 0 is best).
+
+    Each judgment ranks `size` random items by quality plus Gaussian noise.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"model-{i}" for i in range(items)]
+    chosen = np.argsort(rng.random((judgments, items)), axis=1)[:, :size]
+    perceived = chosen + rng.normal(0, noise * items / 4, chosen.shape)
+    ordered = np.take_along_axis(chosen, np.argsort(perceived, axis=1), axis=1)
+    return [[names[i] for i in row] for row in ordered.tolist()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark rank aggregation on synthetic partial rankings.")
+    parser.add_argument("--judgments", type=int, default=100000, help="Number of rankings")
+    parser.add_argument("--items", type=int, default=20, help="Number of ranked models")
+    parser.add_argument("--size", type=int, default=4, help="Models per ranking")
+    args = parser.parse_args()
+
+    rankings = synthetic_rankings(args.judgments, args.items, args.size)
+    start = time.perf_counter()
+    judgments = Judgments.from_rankings(rankings)
+    print(f"encode: {(time.perf_counter() - start) * 1000:.1f} ms for {judgments.count} rankings")
+
+    for method in METHODS:
+        start = time.perf_counter()
+        results = aggregate(judgments, method)
+        elapsed = (time.perf_counter() - start) * 1000
+        order = [int(result["model"].split("-")[1]) for result in results]
+        displaced = sum(1 for position, item in enumerate(order) if position != item)
+        print(f"{method}: {elapsed:.1f} ms, top 3 {order[:3]}, {displaced} items off their true position, "
+              f"best {results[0]['score']} ci {results[0]['ci']}")
@@ -0,0 +1,202 @@
+"""Per-model circuit breakers and AIMD concurrency limits for OpenRouter calls.
+
+State is process-wide, so every concurrent council run shares the same view
+of which models are degraded and how many requests each may have in flight.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+try:
+    from .config import (
+        BREAKER_FAILURE_THRESHOLD,
+        BREAKER_COOLDOWN,
+        AIMD_INITIAL_LIMIT,
+        AIMD_MIN_LIMIT,
+        AIMD_MAX_LIMIT,
+        AIMD_BACKOFF,
+    )
+except ImportError:
+    from config import (
+        BREAKER_FAILURE_THRESHOLD,
+        BREAKER_COOLDOWN,
+        AIMD_INITIAL_LIMIT,
+        AIMD_MIN_LIMIT,
+        AIMD_MAX_LIMIT,
+        AIMD_BACKOFF,
+    )
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because the model's circuit is open."""
+
+
+class ModelState:
+    """Breaker and concurrency state for a single model."""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+        self.limit = AIMD_INITIAL_LIMIT
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.condition = asyncio.Condition()
+
+    def circuit_state(self) -> str:
+        """Current breaker state, moving open -> half-open once the cooldown passes."""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= BREAKER_COOLDOWN:
+            self.state = HALF_OPEN
+        return self.state
+
+
+_models: Dict[str, ModelState] = {}
+
+
+def _get_state(model: str) -> ModelState:
+    """Get (or create) the state for a model."""
+    if model not in _models:
+        _models[model] = ModelState()
+    return _models[model]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_open(model: str) -> bool:
+    """
+    Check whether a model's circuit is open (failing fast).
+
+    Half-open circuits count as available so a probe can go through.
+    """
+    if model not in _models:
+        return False
+    return _models[model].circuit_state() == OPEN
+
+
+@asynccontextmanager
+async def model_slot(model: str):
+    """
+    Reserve a concurrency slot for a request to a model.
+
+    Fails fast with CircuitOpenError while the circuit is open, and lets a
+    single probe through while it is half-open. Otherwise waits until the
+    model is below its AIMD limit and past any Retry-After back-off.
+
+    Raises:
+        CircuitOpenError: If the circuit is open or a half-open probe is already running
+    """
+    state = _get_state(model)
+
+    circuit = state.circuit_state()
+    if circuit == OPEN or (circuit == HALF_OPEN and state.probe_in_flight):
+        raise CircuitOpenError(f"Circuit open for {model}")
+
+    is_probe = circuit == HALF_OPEN
+    if is_probe:
+        state.probe_in_flight = True
+
+    try:
+        async with state.condition:
+            while True:
+                wait = state.blocked_until - time.monotonic()
+                if wait <= 0 and state.in_flight < max(int(state.limit), 1):
+                    break
+                try:
+                    await asyncio.wait_for(
+                        state.condition.wait(), timeout=wait if wait > 0 else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            state.in_flight += 1
+
+        try:
+            yield
+        finally:
+            async with state.condition:
+                state.in_flight -= 1
+                state.condition.notify_all()
+    finally:
+        if is_probe:
+            state.probe_in_flight = False
+
+
+def record_success(model: str):
+    """Record a successful call: close the circuit and additively raise the limit."""
+    state = _get_state(model)
+    state.state = CLOSED
+    state.consecutive_failures = 0
+    state.limit = min(state.limit + 1.0 / state.limit, AIMD_MAX_LIMIT)
+
+
+def record_failure(model: str, overloaded: bool = False, retry_after: Optional[float] = None):
+    """
+    Record a failed call (5xx, 429, timeout or connection error).
+
+    Args:
+        model: OpenRouter model identifier
+        overloaded: The provider signalled overload (429/503); halve the limit
+        retry_after: Seconds from a Retry-After header to hold back new requests
+    """
+    state = _get_state(model)
+    state.consecutive_failures += 1
+
+    if overloaded:
+        state.limit = max(state.limit * AIMD_BACKOFF, AIMD_MIN_LIMIT)
+    if retry_after:
+        state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+
+    if state.state == HALF_OPEN or state.consecutive_failures >= BREAKER_FAILURE_THRESHOLD:
+        if state.state != OPEN:
+            print(f"Circuit opened for {model} after {state.consecutive_failures} failures")
+        state.state = OPEN
+        state.opened_at = time.monotonic()
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """
+    Get breaker state and concurrency limits for every model seen so far.
+
+    Returns:
+        Dict mapping model identifier to its breaker and limiter state
+    """
+    now = time.monotonic()
+    stats = {}
+    for model, state in _models.items():
+        circuit = state.circuit_state()
+        stats[model] = {
+            "circuit": circuit,
+            "consecutive_failures": state.consecutive_failures,
+            "reopens_in": round(max(BREAKER_COOLDOWN - (now - state.opened_at), 0.0), 1) if circuit == OPEN else None,
+            "concurrency_limit": round(state.limit, 2),
+            "in_flight": state.in_flight,
+            "retry_after": round(max(state.blocked_until - now, 0.0), 1),
+        }
+    return stats
@@ -0,0 +1,283 @@
+"""
+Content-addressed cache for model responses (memory LRU + optional disk tier).
+
+The memory tier is only touched from the event loop; disk reads, writes and
+eviction scans run in worker threads so a slow disk never stalls streaming.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+try:
+    from .config import (
+        IMAGE_GENERATION_CONFIG,
+        RESPONSE_CACHE_ENABLED,
+        RESPONSE_CACHE_MAX_ENTRIES,
+        RESPONSE_CACHE_TTL,
+        RESPONSE_CACHE_DISK_ENABLED,
+        RESPONSE_CACHE_DIR,
+        RESPONSE_CACHE_DISK_MAX_BYTES,
+        RESPONSE_CACHE_DISABLED_MODES,
+    )
+    from . import serialization
+except ImportError:
+    from config import (
+        IMAGE_GENERATION_CONFIG,
+        RESPONSE_CACHE_ENABLED,
+        RESPONSE_CACHE_MAX_ENTRIES,
+        RESPONSE_CACHE_TTL,
+        RESPONSE_CACHE_DISK_ENABLED,
+        RESPONSE_CACHE_DIR,
+        RESPONSE_CACHE_DISK_MAX_BYTES,
+        RESPONSE_CACHE_DISABLED_MODES,
+    )
+    import serialization
+
+# key -> (stored_at, response)
+_memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Approximate bytes on disk; None until the directory has been scanned
+_disk_bytes: Optional[int] = None
+# Guards _disk_bytes and eviction across the worker threads doing disk I/O
+_disk_lock = threading.Lock()
+
+_stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "memory_evictions": 0,
+    "disk_evictions": 0,
+    "expired": 0,
+}
+
+
+def cache_enabled_for_mode(mode: str) -> bool:
+    """Check whether responses may be cached for a council mode."""
+    return RESPONSE_CACHE_ENABLED and mode.lower() not in RESPONSE_CACHE_DISABLED_MODES
+
+
+def make_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    enable_image_generation: bool = False,
+    request_options: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build a stable cache key from everything that shapes the model's answer.
+
+    Args:
+        model: OpenRouter model identifier
+        messages: List of message dicts sent to the model
+        enable_image_generation: Whether image modalities were requested
+        request_options: Extra request parameters (response_format, max_tokens, ...)
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON payload
+    """
+    payload = {"model": model, "messages": messages}
+    if enable_image_generation:
+        payload["modalities"] = IMAGE_GENERATION_CONFIG["modalities"]
+        payload["image_config"] = IMAGE_GENERATION_CONFIG["image_config"]
+    if request_options:
+        payload.update(request_options)
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _disk_path(key: str) -> str:
+    """Get the on-disk location for a cache key (sharded by prefix)."""
+    return os.path.join(RESPONSE_CACHE_DIR, key[:2], f"{key}.json")
+
+
+async def get(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached response.
+
+    Args:
+        key: Cache key from make_key
+
+    Returns:
+        A deep copy of the cached response dict, or None on a miss
+    """
+    now = time.time()
+
+    entry = _memory.get(key)
+    if entry is not None:
+        stored_at, response = entry
+        if now - stored_at <= RESPONSE_CACHE_TTL:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return copy.deepcopy(response)
+        del _memory[key]
+        _stats["expired"] += 1
+
+    if RESPONSE_CACHE_DISK_ENABLED:
+        response = await asyncio.to_thread(_disk_get, key, now)
+        if response is not None:
+            _stats["disk_hits"] += 1
+            _memory_put(key, response, now)
+            return copy.deepcopy(response)
+
+    _stats["misses"] += 1
+    return None
+
+
+async def put(key: str, response: Dict[str, Any]):
+    """
+    Store a response in the memory tier and, if enabled, the disk tier.
+
+    Args:
+        key: Cache key from make_key
+        response: Response dict as returned by query_model (callers skip
+            answers from a hedge backup model, which the key doesn't describe)
+    """
+    now = time.time()
+    # Deep copy so later changes to the caller's result never reach the cache
+    response = copy.deepcopy({k: v for k, v in response.items() if k != 'hedged_by'})
+    _memory_put(key, response, now)
+
+    if RESPONSE_CACHE_DISK_ENABLED:
+        try:
+            await asyncio.to_thread(_disk_put, key, response)
+        except OSError as e:
+            print(f"Failed to write response cache entry: {e}")
+
+
+def _memory_put(key: str, response: Dict[str, Any], stored_at: float):
+    """Insert into the LRU, evicting the least recently used entries."""
+    _memory[key] = (stored_at, response)
+    _memory.move_to_end(key)
+    while len(_memory) > RESPONSE_CACHE_MAX_ENTRIES:
+        _memory.popitem(last=False)
+        _stats["memory_evictions"] += 1
+
+
+def _disk_get(key: str, now: float) -> Optional[Dict[str, Any]]:
+    """Read an entry from the disk tier, dropping it if expired."""
+    path = _disk_path(key)
+    try:
+        if now - os.path.getmtime(path) > RESPONSE_CACHE_TTL:
+            _disk_remove(path)
+            _stats["expired"] += 1
+            return None
+        with open(path, 'rb') as f:
+            return serialization.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Failed to read response cache entry: {e}")
+        return None
+
+
+def _disk_put(key: str, response: Dict[str, Any]):
+    """Write an entry to the disk tier and enforce the size cap."""
+    global _disk_bytes
+    path = _disk_path(key)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    data = serialization.dumpb(response)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = _scan_disk_bytes()
+        else:
+            _disk_bytes += len(data)
+
+        if _disk_bytes > RESPONSE_CACHE_DISK_MAX_BYTES:
+            _evict_disk()
+
+
+def _disk_remove(path: str):
+    """Remove a disk entry and keep the size estimate in step."""
+    global _disk_bytes
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except OSError:
+        return
+    with _disk_lock:
+        if _disk_bytes is not None:
+            _disk_bytes -= size
+
+
+def _list_disk_entries() -> List[Tuple[float, int, str]]:
+    """List (mtime, size, path) for every disk entry."""
+    entries = []
+    if not os.path.isdir(RESPONSE_CACHE_DIR):
+        return entries
+    for shard in os.listdir(RESPONSE_CACHE_DIR):
+        shard_dir = os.path.join(RESPONSE_CACHE_DIR, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for filename in os.listdir(shard_dir):
+            if filename.endswith('.json'):
+                path = os.path.join(shard_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _scan_disk_bytes() -> int:
+    """Total size of the disk tier."""
+    return sum(size for _, size, _ in _list_disk_entries())
+
+
+def _evict_disk():
+    """Delete expired entries, then the oldest ones until 90% of the cap remains (caller holds _disk_lock)."""
+    global _disk_bytes
+    now = time.time()
+    entries = sorted(_list_disk_entries())
+    total = sum(size for _, size, _ in entries)
+    target = RESPONSE_CACHE_DISK_MAX_BYTES * 0.9
+
+    for mtime, size, path in entries:
+        if total <= target and now - mtime <= RESPONSE_CACHE_TTL:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        _stats["disk_evictions"] += 1
+
+    _disk_bytes = total
+
+
+def clear():
+    """Drop every entry from the memory tier."""
+    _memory.clear()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get cache counters and tier sizes.
+
+    Returns:
+        Dict with hit/miss/eviction counters, hit ratio and tier sizes
+    """
+    hits = _stats["memory_hits"] + _stats["disk_hits"]
+    lookups = hits + _stats["misses"]
+    return {
+        **_stats,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "memory_entries": len(_memory),
+        "memory_max_entries": RESPONSE_CACHE_MAX_ENTRIES,
+        "disk_enabled": RESPONSE_CACHE_DISK_ENABLED,
+        "disk_bytes": _disk_bytes,
+        "disk_max_bytes": RESPONSE_CACHE_DISK_MAX_BYTES,
+    }
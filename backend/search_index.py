@@ -0,0 +1,351 @@
+"""Full-text search over stored conversations (SQLite FTS5).
+
+The index lives in its own database, next to whichever storage backend is
+configured. User messages and stage 3 answers (and optionally every stage 1
+response) are stored as documents; an external-content FTS5 table indexes
+their text. storage.py adds messages as they are stored, and the index can
+be rebuilt from the backend at any time.
+
+Usage:
+    python -m backend.search_index --rebuild
+    python -m backend.search_index "query terms"
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+try:
+    from .config import SEARCH_INDEX_PATH, SEARCH_INDEX_STAGE1
+    from .storage_base import StorageBackend
+except ImportError:
+    from config import SEARCH_INDEX_PATH, SEARCH_INDEX_STAGE1
+    from storage_base import StorageBackend
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    model TEXT NOT NULL DEFAULT '',
+    text TEXT NOT NULL,
+    UNIQUE (conversation_id, position, kind, model)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    text, content = 'documents', content_rowid = 'id', tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Conversations indexed per transaction during a rebuild
+REBUILD_BATCH_SIZE = 500
+
+# Markers around matched terms in snippets (rendered as bold by the frontend's markdown)
+SNIPPET_MARK = "**"
+SNIPPET_TOKENS = 16
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# A document is (position, kind, model, text)
+Document = Tuple[int, str, str, str]
+
+
+def message_documents(position: int, message: Dict[str, Any], include_stage1: bool) -> List[Document]:
+    """
+    Extract the searchable texts of a stored message.
+
+    Args:
+        position: Index of the message in its conversation
+        message: Message dict
+        include_stage1: Whether to index every stage 1 response too
+
+    Returns:
+        List of (position, kind, model, text) documents
+    """
+    documents = []
+    if message.get("role") == "user":
+        if isinstance(message.get("content"), str):
+            documents.append((position, "user", "", message["content"]))
+        return documents
+
+    stage3 = message.get("stage3") or {}
+    if isinstance(stage3.get("response"), str):
+        documents.append((position, "stage3", stage3.get("model") or "", stage3["response"]))
+    if include_stage1:
+        for result in message.get("stage1") or []:
+            if isinstance(result.get("response"), str):
+                documents.append((position, "stage1", result.get("model") or "", result["response"]))
+    return documents
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in the input are inert.
+
+    Returns:
+        The MATCH expression, or None if the text has no words
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """FTS5 index of conversation messages in its own SQLite database."""
+
+    def __init__(self, db_path: str, include_stage1: bool = False):
+        """
+        Args:
+            db_path: SQLite database file for the index
+            include_stage1: Whether to index stage 1 responses as well
+        """
+        self.db_path = db_path
+        self.include_stage1 = include_stage1
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _insert(self, conn: sqlite3.Connection, conversation_id: str, documents: List[Document]):
+        # Already-indexed documents are skipped, so live indexing and a rebuild can overlap
+        conn.executemany(
+            "INSERT OR IGNORE INTO documents (conversation_id, position, kind, model, text) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(conversation_id, *document) for document in documents]
+        )
+
+    def add_messages(self, conversation_id: str, messages: List[Tuple[int, Dict[str, Any]]]):
+        """
+        Index newly stored messages in one transaction.
+
+        Args:
+            conversation_id: Conversation identifier
+            messages: (position, message) pairs
+        """
+        documents = [
+            document
+            for position, message in messages
+            for document in message_documents(position, message, self.include_stage1)
+        ]
+        if not documents:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert(conn, conversation_id, documents)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def replace_conversations(self, conversations: List[Dict[str, Any]]):
+        """Re-index whole conversations (after they were replaced in storage)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for conversation in conversations:
+                conn.execute("DELETE FROM documents WHERE conversation_id = ?", (conversation["id"],))
+                self._insert(conn, conversation["id"], [
+                    document
+                    for position, message in enumerate(conversation.get("messages", []))
+                    for document in message_documents(position, message, self.include_stage1)
+                ])
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find the best-matching messages (BM25 ranking).
+
+        Args:
+            query: Free text; every word must match, the last as a prefix
+            limit: Maximum hits to return
+
+        Returns:
+            List of hits with conversation_id, message_index, kind ("user",
+            "stage3" or "stage1"), model, snippet and score (higher is better)
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        rows = self._connect().execute(
+            "SELECT d.conversation_id, d.position, d.kind, d.model, "
+            "snippet(documents_fts, 0, ?, ?, '…', ?), bm25(documents_fts) "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ? ORDER BY rank LIMIT ?",
+            (SNIPPET_MARK, SNIPPET_MARK, SNIPPET_TOKENS, match, limit)
+        ).fetchall()
+        return [
+            {
+                "conversation_id": conversation_id,
+                "message_index": position,
+                "kind": kind,
+                "model": model or None,
+                "snippet": snippet,
+                "score": round(-score, 6),
+            }
+            for conversation_id, position, kind, model, snippet, score in rows
+        ]
+
+    def document_count(self) -> int:
+        """Number of indexed documents."""
+        return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def rebuild(self, backend: StorageBackend, clear: bool = True) -> Dict[str, Any]:
+        """
+        Index every conversation stored in a backend.
+
+        Messages are read through get_messages() with only the indexed
+        payloads, so backends that support it skip the rest.
+
+        Args:
+            backend: Storage backend to read from
+            clear: Drop the existing index first (otherwise only missing documents are added)
+
+        Returns:
+            Dict with conversations, documents and elapsed seconds
+        """
+        start = time.monotonic()
+        stages = ("stage3", "stage1") if self.include_stage1 else ("stage3",)
+        conn = self._connect()
+        if clear:
+            # Dropping is much faster than deleting row by row through the trigger
+            conn.executescript("DROP TABLE IF EXISTS documents_fts; DROP TABLE IF EXISTS documents;" + SCHEMA)
+
+        conversations = 0
+        batch: List[Tuple[str, List[Document]]] = []
+
+        def write(batch):
+            conn.execute("BEGIN IMMEDIATE")
+            for conversation_id, documents in batch:
+                self._insert(conn, conversation_id, documents)
+            conn.execute("COMMIT")
+
+        for metadata in backend.list_conversations(order="asc"):
+            messages = backend.get_messages(metadata["id"], stages=stages) or []
+            batch.append((metadata["id"], [
+                document
+                for position, message in enumerate(messages)
+                for document in message_documents(position, message, self.include_stage1)
+            ]))
+            conversations += 1
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                write(batch)
+                batch = []
+        if batch:
+            write(batch)
+
+        conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+        return {
+            "conversations": conversations,
+            "documents": self.document_count(),
+            "seconds": round(time.monotonic() - start, 2),
+        }
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SearchIndex:
+    """Get the shared search index, opening it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(SEARCH_INDEX_PATH, SEARCH_INDEX_STAGE1)
+        return _index
+
+
+def build_if_empty(backend: StorageBackend) -> bool:
+    """
+    Build the index on first start, when it is empty but conversations exist.
+
+    Returns:
+        True if the index was built
+    """
+    index = get_index()
+    if index.document_count() > 0 or not backend.list_conversations(limit=1):
+        return False
+    stats = index.rebuild(backend, clear=False)
+    print(f"Built search index {index.db_path}: {stats}")
+    return True
+
+
+def close():
+    """Close the shared search index."""
+    global _index
+    with _index_lock:
+        if _index is not None:
+            _index.close()
+            _index = None
+
+
+if __name__ == "__main__":
+    try:
+        from .config import STORAGE_BACKEND
+        from .storage import create_backend
+    except ImportError:
+        from config import STORAGE_BACKEND
+        from storage import create_backend
+
+    parser = argparse.ArgumentParser(description="Build or query the conversation search index.")
+    parser.add_argument("query", nargs="?", help="Search the index for this text")
+    parser.add_argument("--rebuild", action="store_true", help="Re-index every stored conversation")
+    parser.add_argument("--backend", default=STORAGE_BACKEND, help="Storage backend to index")
+    parser.add_argument("--limit", type=int, default=10, help="Hits to show for a query")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        backend = create_backend(args.backend)
+        print(get_index().rebuild(backend))
+        backend.close()
+    if args.query:
+        for hit in get_index().search(args.query, args.limit):
+            print(hit)
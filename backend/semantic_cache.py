@@ -0,0 +1,219 @@
+"""Semantic cache for whole council results, keyed by query similarity.
+
+Each (mode, council, chairman) namespace keeps a preallocated embedding
+matrix, so a lookup is one matrix-vector product over every cached query.
+"""
+
+import copy
+import json
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+try:
+    from .config import (
+        SEMANTIC_CACHE_ENABLED,
+        SEMANTIC_CACHE_MODES,
+        SEMANTIC_CACHE_THRESHOLD,
+        SEMANTIC_CACHE_TTL,
+        SEMANTIC_CACHE_MAX_ENTRIES,
+        SEMANTIC_CACHE_DIM,
+    )
+    from .text_similarity import embed_texts
+except ImportError:
+    from config import (
+        SEMANTIC_CACHE_ENABLED,
+        SEMANTIC_CACHE_MODES,
+        SEMANTIC_CACHE_THRESHOLD,
+        SEMANTIC_CACHE_TTL,
+        SEMANTIC_CACHE_MAX_ENTRIES,
+        SEMANTIC_CACHE_DIM,
+    )
+    from text_similarity import embed_texts
+
+# Rows allocated up front for a new namespace; doubled as it fills
+INITIAL_CAPACITY = 1024
+
+
+class SemanticIndex:
+    """Embedding matrix plus cached council results for one namespace."""
+
+    def __init__(self, dim: int, max_entries: int):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.size = 0
+        self.vectors = np.zeros((min(INITIAL_CAPACITY, max_entries), dim), dtype=np.float32)
+        self.stored_at = np.zeros(len(self.vectors), dtype=np.float64)
+        self.entries: List[Optional[Dict[str, Any]]] = [None] * len(self.vectors)
+
+    def search(self, vector: np.ndarray, now: float) -> Tuple[Optional[int], float]:
+        """
+        Find the most similar unexpired entry.
+
+        Returns:
+            (row index, similarity), or (None, 0.0) if the index is empty
+        """
+        if self.size == 0:
+            return None, 0.0
+
+        similarities = self.vectors[:self.size] @ vector
+        row = int(np.argmax(similarities))
+
+        # Only pay for the expiry mask when the best match is stale
+        if now - self.stored_at[row] > SEMANTIC_CACHE_TTL:
+            similarities[now - self.stored_at[:self.size] > SEMANTIC_CACHE_TTL] = -1.0
+            row = int(np.argmax(similarities))
+
+        return row, float(similarities[row])
+
+    def add(self, vector: np.ndarray, entry: Dict[str, Any], now: float):
+        """Insert an entry, growing the matrix or replacing the oldest row when full."""
+        if self.size < len(self.vectors):
+            row = self.size
+            self.size += 1
+        elif len(self.vectors) < self.max_entries:
+            self._grow()
+            row = self.size
+            self.size += 1
+        else:
+            row = int(np.argmin(self.stored_at))
+
+        self.vectors[row] = vector
+        self.stored_at[row] = now
+        self.entries[row] = entry
+
+    def _grow(self):
+        """Double the preallocated capacity (bounded by max_entries)."""
+        capacity = min(len(self.vectors) * 2, self.max_entries)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        stored_at = np.zeros(capacity, dtype=np.float64)
+        stored_at[:self.size] = self.stored_at[:self.size]
+
+        self.vectors = vectors
+        self.stored_at = stored_at
+        self.entries.extend([None] * (capacity - len(self.entries)))
+
+
+_indexes: Dict[str, SemanticIndex] = {}
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+}
+
+
+def cache_enabled_for_mode(mode: str) -> bool:
+    """Check whether council results may be served from the semantic cache for a mode."""
+    return SEMANTIC_CACHE_ENABLED and mode.lower() in SEMANTIC_CACHE_MODES
+
+
+def _namespace(
+    mode: str,
+    custom_models: Optional[List[str]],
+    chairman_model: Optional[str]
+) -> str:
+    """Results are only shared between runs with the same council configuration."""
+    return json.dumps([mode.lower(), custom_models or None, chairman_model or None])
+
+
+def lookup(
+    user_query: str,
+    mode: str = "chat",
+    custom_models: Optional[List[str]] = None,
+    chairman_model: Optional[str] = None
+) -> Optional[Tuple[List, List, Dict, Dict]]:
+    """
+    Find a cached council result for a near-identical query.
+
+    Args:
+        user_query: The user's question
+        mode: Council mode
+        custom_models: Optional model override
+        chairman_model: Optional chairman override
+
+    Returns:
+        (stage1, stage2, stage3, metadata) copies with metadata['semantic_cache']
+        describing the hit, or None on a miss
+    """
+    if not cache_enabled_for_mode(mode):
+        return None
+
+    index = _indexes.get(_namespace(mode, custom_models, chairman_model))
+    if index is None:
+        _stats["misses"] += 1
+        return None
+
+    vector = embed_texts([user_query], SEMANTIC_CACHE_DIM)[0]
+    row, similarity = index.search(vector, time.time())
+    if row is None or similarity < SEMANTIC_CACHE_THRESHOLD:
+        _stats["misses"] += 1
+        return None
+
+    _stats["hits"] += 1
+    entry = copy.deepcopy(index.entries[row])
+    entry["metadata"]["semantic_cache"] = {
+        "hit": True,
+        "similarity": round(similarity, 4),
+        "matched_query": entry["query"],
+        "cached_at": datetime.utcfromtimestamp(index.stored_at[row]).isoformat(),
+    }
+    return entry["stage1"], entry["stage2"], entry["stage3"], entry["metadata"]
+
+
+def store(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    stage2_results: List[Dict[str, Any]],
+    stage3_result: Dict[str, Any],
+    metadata: Dict[str, Any],
+    mode: str = "chat",
+    custom_models: Optional[List[str]] = None,
+    chairman_model: Optional[str] = None
+):
+    """
+    Cache a completed council result under its query embedding.
+
+    Args:
+        user_query: The user's question
+        stage1_results: Individual model responses
+        stage2_results: Model rankings
+        stage3_result: Final synthesized response
+        metadata: Council metadata
+        mode: Council mode
+        custom_models: Optional model override
+        chairman_model: Optional chairman override
+    """
+    if not cache_enabled_for_mode(mode):
+        return
+
+    namespace = _namespace(mode, custom_models, chairman_model)
+    if namespace not in _indexes:
+        _indexes[namespace] = SemanticIndex(SEMANTIC_CACHE_DIM, SEMANTIC_CACHE_MAX_ENTRIES)
+
+    vector = embed_texts([user_query], SEMANTIC_CACHE_DIM)[0]
+    _indexes[namespace].add(vector, copy.deepcopy({
+        "query": user_query,
+        "stage1": stage1_results,
+        "stage2": stage2_results,
+        "stage3": stage3_result,
+        "metadata": metadata,
+    }), time.time())
+    _stats["stores"] += 1
+
+
+def get_semantic_cache_stats() -> Dict[str, Any]:
+    """
+    Get semantic cache counters and index sizes.
+
+    Returns:
+        Dict with hits, misses, stores and entries per namespace
+    """
+    return {
+        **_stats,
+        "enabled": SEMANTIC_CACHE_ENABLED,
+        "threshold": SEMANTIC_CACHE_THRESHOLD,
+        "entries": {namespace: index.size for namespace, index in _indexes.items()},
+    }
@@ -0,0 +1,160 @@
+"""JSON serialization for storage, SSE events and API responses.
+
+Uses orjson when it is installed (several times faster on large council
+payloads) and the standard library otherwise. Both produce compact UTF-8
+JSON, so data written by one is read by the other.
+
+Run `python -m backend.serialization` for a micro-benchmark on
+council-sized payloads.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Union
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumpb(
+    value: Any,
+    pretty: bool = False,
+    sort_keys: bool = False,
+    default: Optional[Callable[[Any], Any]] = None
+) -> bytes:
+    """
+    Encode a value as UTF-8 JSON bytes.
+
+    Args:
+        value: JSON-serializable value
+        pretty: Indent with two spaces
+        sort_keys: Sort object keys
+        default: Called for values that aren't natively serializable
+
+    Returns:
+        Encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(value, default=default, option=option)
+    return dumps(value, pretty, sort_keys, default).encode("utf-8")
+
+
+def dumps(
+    value: Any,
+    pretty: bool = False,
+    sort_keys: bool = False,
+    default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """Encode a value as a JSON string (see dumpb)."""
+    if ORJSON_AVAILABLE:
+        return dumpb(value, pretty, sort_keys, default).decode("utf-8")
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+        sort_keys=sort_keys,
+        default=default
+    )
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Decode JSON text or bytes.
+
+    Raises:
+        ValueError: If the data isn't valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def sse_event(event: Dict[str, Any]) -> str:
+    """Format an event as a server-sent events data frame."""
+    return f"data: {dumps(event)}\n\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available (the app's default response class)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumpb(content)
+
+
+def _sample_council_message() -> Dict[str, Any]:
+    """An assistant message shaped like a real 4-model council result."""
+    paragraph = (
+        "The council weighs several perspectives here. First, consider the trade-offs "
+        "between latency and throughput — batching amortizes fixed costs, while streaming "
+        "keeps time-to-first-token low. Second, caching changes the picture entirely. "
+    )
+    models = ["openai/gpt-5.1", "google/gemini-3-pro-preview", "anthropic/claude-sonnet-4.5", "x-ai/grok-4"]
+    return {
+        "role": "assistant",
+        "stage1": [{"model": model, "response": paragraph * 40} for model in models],
+        "stage2": [
+            {
+                "model": model,
+                "ranking": paragraph * 8 + "\nFINAL RANKING:\n1. Response C\n2. Response A\n3. Response D\n4. Response B",
+                "parsed_ranking": ["Response C", "Response A", "Response D", "Response B"],
+            }
+            for model in models
+        ],
+        "stage3": {"model": models[1], "response": paragraph * 30},
+    }
+
+
+def benchmark(iterations: int = 200) -> Dict[str, Any]:
+    """
+    Time encoding and decoding of a council-sized conversation.
+
+    Returns:
+        Per-operation microseconds for the stdlib and (if installed) orjson, and the speedups
+    """
+    conversation = {
+        "id": "benchmark",
+        "created_at": "2025-01-01T00:00:00",
+        "title": "Benchmark",
+        "messages": [{"role": "user", "content": "How should we design this?"}, _sample_council_message()] * 5,
+    }
+    encoded = json.dumps(conversation)
+
+    def timed(fn: Callable[[], Any]) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return round((time.perf_counter() - start) / iterations * 1e6, 1)
+
+    results: Dict[str, Any] = {
+        "payload_bytes": len(encoded.encode("utf-8")),
+        "stdlib": {
+            "dumps_us": timed(lambda: json.dumps(conversation, ensure_ascii=False, separators=(",", ":"))),
+            "dumps_pretty_us": timed(lambda: json.dumps(conversation, indent=2)),
+            "loads_us": timed(lambda: json.loads(encoded)),
+        },
+    }
+    if ORJSON_AVAILABLE:
+        results["orjson"] = {
+            "dumps_us": timed(lambda: orjson.dumps(conversation)),
+            "dumps_pretty_us": timed(lambda: orjson.dumps(conversation, option=orjson.OPT_INDENT_2)),
+            "loads_us": timed(lambda: orjson.loads(encoded)),
+        }
+        results["speedup"] = {
+            key: round(results["stdlib"][key] / max(results["orjson"][key], 0.1), 1)
+            for key in results["stdlib"]
+        }
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(benchmark(), indent=2))
@@ -0,0 +1,184 @@
+"""In-process coalescing of identical concurrent council runs (single-flight).
+
+Callers that ask for exactly the same (query, mode, models, chairman) while a
+run is in flight attach to that run instead of starting another one.
+Streaming callers replay the events published so far and then follow live;
+each caller still persists its own copy of the result.
+"""
+
+import asyncio
+import copy
+import json
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Awaitable
+
+StragglerCallback = Callable[[str, Dict[str, Any]], None]
+
+_flights: Dict[str, "Flight"] = {}
+
+_stats = {
+    "started": 0,
+    "joined": 0,
+}
+
+
+class Flight:
+    """One in-flight execution shared by every caller with the same key."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.result: Any = None
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.listeners: List[StragglerCallback] = []
+        self._changed = asyncio.Event()
+
+    def publish(self, event: Dict[str, Any]):
+        """Record an event and wake every subscriber."""
+        self.events.append(event)
+        self._wake()
+
+    def finish(self):
+        """Mark the event stream complete."""
+        self.done = True
+        self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def notify_straggler(self, stage: str, result: Dict[str, Any]):
+        """Fan a late stage result out to every caller attached to this flight."""
+        for listener in self.listeners:
+            listener(stage, result)
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Replay events published so far, then follow new ones until done."""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+def make_key(
+    user_query: str,
+    mode: str = "chat",
+    custom_models: Optional[List[str]] = None,
+    chairman_model: Optional[str] = None,
+    kind: str = "full"
+) -> str:
+    """
+    Build the coalescing key for a council run.
+
+    The query is used verbatim: case and whitespace can change the answer
+    (code, case-sensitive questions), so only exact repeats share a run.
+
+    Args:
+        user_query: The user's question
+        mode: Council mode
+        custom_models: Optional model override
+        chairman_model: Optional chairman override
+        kind: Which pipeline is run ("full" or "stream"); kinds never share a flight
+
+    Returns:
+        A string key
+    """
+    return json.dumps(
+        [kind, user_query, (mode or "chat").lower(), custom_models or None, chairman_model or None]
+    )
+
+
+def _attach(key: str, start: Callable[["Flight"], Awaitable[None]], on_straggler: Optional[StragglerCallback]) -> "Flight":
+    """Join the flight for a key, starting it if none is running."""
+    flight = _flights.get(key)
+    if flight is None:
+        flight = Flight()
+        _flights[key] = flight
+        _stats["started"] += 1
+
+        async def run():
+            try:
+                await start(flight)
+            finally:
+                flight.finish()
+                if _flights.get(key) is flight:
+                    del _flights[key]
+
+        flight.task = asyncio.create_task(run())
+    else:
+        _stats["joined"] += 1
+
+    if on_straggler is not None:
+        flight.listeners.append(on_straggler)
+    return flight
+
+
+async def run_once(
+    key: str,
+    factory: Callable[[StragglerCallback], Awaitable[Any]],
+    on_straggler: Optional[StragglerCallback] = None
+) -> Any:
+    """
+    Run a coroutine once per key, sharing its result with concurrent callers.
+
+    Args:
+        key: Coalescing key from make_key
+        factory: Called with the flight's straggler callback to build the coroutine
+        on_straggler: Optional callback for this caller's late stage results
+
+    Returns:
+        A deep copy of the coroutine's result, so callers can modify and store it independently
+    """
+    async def start(flight: Flight):
+        flight.result = await factory(flight.notify_straggler)
+
+    flight = _attach(key, start, on_straggler)
+
+    # Shield the shared run so one caller disconnecting doesn't cancel it for the rest
+    await asyncio.shield(flight.task)
+    return copy.deepcopy(flight.result)
+
+
+def stream_once(
+    key: str,
+    factory: Callable[[StragglerCallback], AsyncIterator[Dict[str, Any]]],
+    on_straggler: Optional[StragglerCallback] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run an event stream once per key, broadcasting it to concurrent callers.
+
+    Late joiners first receive every event published so far. An exception in
+    the shared run is delivered to all subscribers as an 'error' event.
+    Events are shared between subscribers: copy one before modifying it.
+
+    Args:
+        key: Coalescing key from make_key
+        factory: Called with the flight's straggler callback to build the event stream
+        on_straggler: Optional callback for this caller's late stage results
+
+    Returns:
+        Async iterator over the shared events
+    """
+    async def start(flight: Flight):
+        try:
+            async for event in factory(flight.notify_straggler):
+                flight.publish(event)
+        except Exception as e:
+            flight.publish({'type': 'error', 'message': str(e)})
+
+    flight = _attach(key, start, on_straggler)
+    return flight.subscribe()
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    """
+    Get coalescing counters.
+
+    Returns:
+        Dict with runs started, callers that joined an existing run, and runs in flight
+    """
+    return {**_stats, "in_flight": len(_flights)}
@@ -0,0 +1,488 @@
+"""SQLite (WAL) storage for conversations.
+
+Conversations, messages and stage payloads live in normalized tables, so
+appending a message is a couple of row inserts regardless of how long the
+conversation is. Every write runs in a BEGIN IMMEDIATE transaction, which
+serializes writers across uvicorn worker processes; WAL lets readers
+proceed while a write is in progress.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+try:
+    from .storage_base import StorageBackend, Mutation, decode_cursor
+    from . import cold_storage
+    from . import serialization
+except ImportError:
+    from storage_base import StorageBackend, Mutation, decode_cursor
+    import cold_storage
+    import serialization
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    title TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    archived_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations(created_at, id);
+
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
+
+CREATE TABLE IF NOT EXISTS stage_payloads (
+    conversation_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, position, stage),
+    FOREIGN KEY (conversation_id, position)
+        REFERENCES messages(conversation_id, position) ON DELETE CASCADE
+);
+"""
+
+# Message keys stored as columns; everything else becomes a stage payload row
+MESSAGE_COLUMNS = ("role", "content")
+
+# Payloads are returned in this order, followed by any others alphabetically
+STAGE_ORDER = ("stage1", "stage2", "stage3")
+
+# Cold conversations compressed per transaction by archive_cold()
+ARCHIVE_BATCH_SIZE = 100
+
+
+def _encode(value: Any) -> str:
+    return serialization.dumps(value)
+
+
+def _decode(payload: Any) -> Any:
+    """Decode a stage payload: JSON text, or a compressed BLOB for cold conversations."""
+    if isinstance(payload, bytes):
+        payload = cold_storage.decompress(payload)
+    return serialization.loads(payload)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class SQLiteStorage(StorageBackend):
+    """Stores conversations in a single SQLite database in WAL mode."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            conn.executescript(SCHEMA)
+            if 0 < version < 2:
+                # Version 2 marks conversations already packed by archive_cold()
+                conn.execute("ALTER TABLE conversations ADD COLUMN archived_at TEXT")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly in _write()
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction, taking the database write lock up front."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _insert_message(
+        self,
+        conn: sqlite3.Connection,
+        conversation_id: str,
+        position: int,
+        message: Dict[str, Any],
+        created_at: str
+    ):
+        conn.execute(
+            "INSERT INTO messages (conversation_id, position, role, content, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (conversation_id, position, message["role"], message.get("content"), created_at)
+        )
+        conn.executemany(
+            "INSERT INTO stage_payloads (conversation_id, position, stage, payload) VALUES (?, ?, ?, ?)",
+            [
+                (conversation_id, position, key, _encode(value))
+                for key, value in message.items()
+                if key not in MESSAGE_COLUMNS
+            ]
+        )
+
+    def _append_message(self, conn: sqlite3.Connection, conversation_id: str, message: Dict[str, Any]) -> int:
+        """Append a message in O(1): insert its rows and bump the conversation's count."""
+        row = conn.execute(
+            "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        position = row[0]
+        now = _now()
+        self._insert_message(conn, conversation_id, position, message, now)
+        conn.execute(
+            "UPDATE conversations SET message_count = ?, updated_at = ?, archived_at = NULL WHERE id = ?",
+            (position + 1, now, conversation_id)
+        )
+        return position
+
+    def _assemble_message(self, role: str, content: Optional[str], payloads: Dict[str, str]) -> Dict[str, Any]:
+        message = {"role": role}
+        if content is not None:
+            message["content"] = content
+        for stage in STAGE_ORDER:
+            if stage in payloads:
+                message[stage] = _decode(payloads.pop(stage))
+        for stage in sorted(payloads):
+            message[stage] = _decode(payloads[stage])
+        return message
+
+    def create_conversation(self, conversation_id: str) -> Dict[str, Any]:
+        conversation = {
+            "id": conversation_id,
+            "created_at": _now(),
+            "title": "New Conversation",
+            "messages": []
+        }
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, created_at, updated_at, title, message_count) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (conversation_id, conversation["created_at"], conversation["created_at"], conversation["title"])
+            )
+        return conversation
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        # One read transaction so the three queries see a consistent snapshot
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT id, created_at, title FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            payloads: Dict[int, Dict[str, str]] = {}
+            for position, stage, payload in conn.execute(
+                "SELECT position, stage, payload FROM stage_payloads WHERE conversation_id = ?",
+                (conversation_id,)
+            ):
+                payloads.setdefault(position, {})[stage] = payload
+
+            messages = [
+                self._assemble_message(role, content, payloads.get(position, {}))
+                for position, role, content in conn.execute(
+                    "SELECT position, role, content FROM messages "
+                    "WHERE conversation_id = ? ORDER BY position",
+                    (conversation_id,)
+                )
+            ]
+        finally:
+            conn.execute("COMMIT")
+
+        return {"id": row[0], "created_at": row[1], "title": row[2], "messages": messages}
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        self.save_conversations([conversation])
+
+    def save_conversations(self, conversations: List[Dict[str, Any]]):
+        now = _now()
+        with self._write() as conn:
+            for conversation in conversations:
+                conversation_id = conversation["id"]
+                created_at = conversation["created_at"]
+                messages = conversation.get("messages", [])
+
+                conn.execute(
+                    "INSERT INTO conversations (id, created_at, updated_at, title, message_count) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET created_at = excluded.created_at, "
+                    "updated_at = excluded.updated_at, title = excluded.title, "
+                    "message_count = excluded.message_count, archived_at = NULL",
+                    (conversation_id, created_at, now, conversation.get("title", "New Conversation"), len(messages))
+                )
+                conn.execute("DELETE FROM stage_payloads WHERE conversation_id = ?", (conversation_id,))
+                conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                for position, message in enumerate(messages):
+                    self._insert_message(conn, conversation_id, position, message, created_at)
+
+    def list_conversations(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        # Keyset pagination over the (created_at, id) index
+        direction, comparison = ("DESC", "<") if order == "desc" else ("ASC", ">")
+        sql = "SELECT id, created_at, title, message_count FROM conversations"
+        params: List[Any] = []
+
+        cursor = decode_cursor(before)
+        if cursor:
+            sql += f" WHERE (created_at, id) {comparison} (?, ?)"
+            params.extend(cursor)
+        sql += f" ORDER BY created_at {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [
+            {"id": id, "created_at": created_at, "title": title, "message_count": message_count}
+            for id, created_at, title, message_count in rows
+        ]
+
+    def get_metadata(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT id, created_at, title, message_count FROM conversations WHERE id = ?",
+            (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "created_at": row[1], "title": row[2], "message_count": row[3]}
+
+    def get_messages(
+        self,
+        conversation_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        stages: Optional[Tuple[str, ...]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Read only the requested message rows and payloads (primary key range scans)."""
+        end = offset + limit if limit is not None else -1
+        range_sql = "conversation_id = ? AND position >= ? AND (? < 0 OR position < ?)"
+        range_params = [conversation_id, offset, end, end]
+
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            if conn.execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone() is None:
+                return None
+
+            payloads: Dict[int, Dict[str, str]] = {}
+            if stages is None or stages:
+                sql = f"SELECT position, stage, payload FROM stage_payloads WHERE {range_sql}"
+                params = list(range_params)
+                if stages is not None:
+                    sql += f" AND stage IN ({', '.join('?' * len(stages))})"
+                    params.extend(stages)
+                for position, stage, payload in conn.execute(sql, params):
+                    payloads.setdefault(position, {})[stage] = payload
+
+            return [
+                self._assemble_message(role, content, payloads.get(position, {}))
+                for position, role, content in conn.execute(
+                    f"SELECT position, role, content FROM messages WHERE {range_sql} ORDER BY position",
+                    range_params
+                )
+            ]
+        finally:
+            conn.execute("COMMIT")
+
+    def apply_mutations(self, conversation_id: str, mutations: List[Mutation]) -> List[Any]:
+        """Apply every mutation in one transaction (one commit, one fsync)."""
+        with self._write() as conn:
+            results = []
+            for operation, args in mutations:
+                handler = getattr(self, f"_do_{operation}", None)
+                if handler is None:
+                    raise ValueError(f"Unknown mutation: {operation}")
+                results.append(handler(conn, conversation_id, *args))
+        return results
+
+    def _do_add_user_message(self, conn: sqlite3.Connection, conversation_id: str, content: str) -> int:
+        return self._append_message(conn, conversation_id, {"role": "user", "content": content})
+
+    def _do_add_assistant_message(
+        self,
+        conn: sqlite3.Connection,
+        conversation_id: str,
+        stage1: List[Dict[str, Any]],
+        stage2: List[Dict[str, Any]],
+        stage3: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        message = {
+            "role": "assistant",
+            "stage1": stage1,
+            "stage2": stage2,
+            "stage3": stage3
+        }
+        if metadata:
+            message["metadata"] = metadata
+        return self._append_message(conn, conversation_id, message)
+
+    def _do_attach_late_result(
+        self,
+        conn: sqlite3.Connection,
+        conversation_id: str,
+        message_index: int,
+        stage: str,
+        result: Dict[str, Any]
+    ):
+        if conn.execute(
+            "SELECT 1 FROM messages WHERE conversation_id = ? AND position = ?",
+            (conversation_id, message_index)
+        ).fetchone() is None:
+            raise ValueError(f"Message {message_index} not found in conversation {conversation_id}")
+
+        row = conn.execute(
+            "SELECT payload FROM stage_payloads "
+            "WHERE conversation_id = ? AND position = ? AND stage = 'late_results'",
+            (conversation_id, message_index)
+        ).fetchone()
+        late_results = _decode(row[0]) if row else {}
+        late_results.setdefault(stage, []).append(result)
+
+        conn.execute(
+            "INSERT OR REPLACE INTO stage_payloads (conversation_id, position, stage, payload) "
+            "VALUES (?, ?, 'late_results', ?)",
+            (conversation_id, message_index, _encode(late_results))
+        )
+        # The rewritten payload is text again; let the next archive_cold() pack it
+        conn.execute("UPDATE conversations SET archived_at = NULL WHERE id = ?", (conversation_id,))
+
+    def _do_update_conversation_title(self, conn: sqlite3.Connection, conversation_id: str, title: str):
+        cursor = conn.execute(
+            "UPDATE conversations SET title = ?, updated_at = ? WHERE id = ?",
+            (title, _now(), conversation_id)
+        )
+        if cursor.rowcount == 0:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+    def add_user_message(self, conversation_id: str, content: str):
+        self.apply_mutations(conversation_id, [("add_user_message", (content,))])
+
+    def add_assistant_message(
+        self,
+        conversation_id: str,
+        stage1: List[Dict[str, Any]],
+        stage2: List[Dict[str, Any]],
+        stage3: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        return self.apply_mutations(
+            conversation_id, [("add_assistant_message", (stage1, stage2, stage3, metadata))]
+        )[0]
+
+    def attach_late_result(
+        self,
+        conversation_id: str,
+        message_index: int,
+        stage: str,
+        result: Dict[str, Any]
+    ):
+        self.apply_mutations(conversation_id, [("attach_late_result", (message_index, stage, result))])
+
+    def update_conversation_title(self, conversation_id: str, title: str):
+        self.apply_mutations(conversation_id, [("update_conversation_title", (title,))])
+
+    def archive_cold(self, cutoff: datetime) -> Dict[str, Any]:
+        """
+        Compress the stage payloads of cold conversations in place.
+
+        Payload rows become compressed BLOBs (the column's declared type
+        doesn't restrict SQLite storage); payloads that don't shrink are kept
+        as text. Packed conversations are marked archived, so each is packed
+        once until a write adds payloads again. Freed pages are reused by
+        later writes rather than returned to the file system.
+        """
+        cutoff_at = cutoff.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+        conn = self._connect()
+        candidates = [
+            row[0] for row in conn.execute(
+                "SELECT id FROM conversations WHERE archived_at IS NULL AND updated_at < ?",
+                (cutoff_at,)
+            )
+        ]
+
+        stats = {"conversations": 0, "bytes_before": 0, "bytes_after": 0, "ids": []}
+        for start in range(0, len(candidates), ARCHIVE_BATCH_SIZE):
+            with self._write() as conn:
+                for conversation_id in candidates[start:start + ARCHIVE_BATCH_SIZE]:
+                    # Re-check inside the transaction: it may have been written to since
+                    if conn.execute(
+                        "SELECT 1 FROM conversations WHERE id = ? AND archived_at IS NULL AND updated_at < ?",
+                        (conversation_id, cutoff_at)
+                    ).fetchone() is None:
+                        continue
+
+                    updates = []
+                    for position, stage, payload in conn.execute(
+                        "SELECT position, stage, payload FROM stage_payloads "
+                        "WHERE conversation_id = ? AND typeof(payload) = 'text'",
+                        (conversation_id,)
+                    ).fetchall():
+                        raw = payload.encode("utf-8")
+                        packed = cold_storage.compress(raw)
+                        stats["bytes_before"] += len(raw)
+                        if len(packed) < len(raw):
+                            updates.append((packed, conversation_id, position, stage))
+                            stats["bytes_after"] += len(packed)
+                        else:
+                            stats["bytes_after"] += len(raw)
+
+                    conn.executemany(
+                        "UPDATE stage_payloads SET payload = ? WHERE conversation_id = ? AND position = ? AND stage = ?",
+                        updates
+                    )
+                    conn.execute(
+                        "UPDATE conversations SET archived_at = ? WHERE id = ?", (_now(), conversation_id)
+                    )
+                    stats["conversations"] += 1
+                    stats["ids"].append(conversation_id)
+        return stats
+
+    def conversation_count(self) -> int:
+        """Number of stored conversations."""
+        return self._connect().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
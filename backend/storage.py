@@ -1,24 +1,184 @@
-"""JSON-based storage for conversations."""
+"""Conversation storage, delegating to the configured backend (SQLite, JSON files or event logs).
 
-import json
-import os
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-from pathlib import Path
+Messages written through this module are also added to the search index
+and the model leaderboard.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
 try:
-    from .config import DATA_DIR
+    from .config import (
+        DATA_DIR, STORAGE_BACKEND, SQLITE_PATH, JSON_INDEX_PATH, JSON_STORAGE_PRETTY,
+        LOG_DATA_DIR, LOG_INDEX_PATH, LOG_COMPACT_EVENTS,
+        CONVERSATION_CACHE_MAX_BYTES, CONVERSATION_CACHE_FLUSH_INTERVAL
+    )
+    from .storage_base import StorageBackend, Mutation, encode_cursor, SUMMARY_STAGES
+    from .json_storage import JSONStorage
+    from .sqlite_storage import SQLiteStorage
+    from .log_storage import LogStorage
+    from .conversation_cache import CachedStorage
+    from . import search_index
+    from . import leaderboard
+    from . import cold_storage
 except ImportError:
-    from config import DATA_DIR
+    from config import (
+        DATA_DIR, STORAGE_BACKEND, SQLITE_PATH, JSON_INDEX_PATH, JSON_STORAGE_PRETTY,
+        LOG_DATA_DIR, LOG_INDEX_PATH, LOG_COMPACT_EVENTS,
+        CONVERSATION_CACHE_MAX_BYTES, CONVERSATION_CACHE_FLUSH_INTERVAL
+    )
+    from storage_base import StorageBackend, Mutation, encode_cursor, SUMMARY_STAGES
+    from json_storage import JSONStorage
+    from sqlite_storage import SQLiteStorage
+    from log_storage import LogStorage
+    from conversation_cache import CachedStorage
+    import search_index
+    import leaderboard
+    import cold_storage
+
+_backend: Optional[StorageBackend] = None
+
+
+def create_backend(name: str) -> StorageBackend:
+    """
+    Instantiate a storage backend by name.
 
+    Args:
+        name: "sqlite", "json" or "log"
 
-def ensure_data_dir():
-    """Ensure the data directory exists."""
-    Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
+    Returns:
+        The backend instance
 
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == "sqlite":
+        return SQLiteStorage(SQLITE_PATH)
+    if name == "json":
+        return JSONStorage(DATA_DIR, JSON_INDEX_PATH, JSON_STORAGE_PRETTY)
+    if name == "log":
+        return LogStorage(LOG_DATA_DIR, LOG_INDEX_PATH, LOG_COMPACT_EVENTS)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def get_backend() -> StorageBackend:
+    """Get the configured backend (behind the conversation cache if enabled), creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(STORAGE_BACKEND)
+        if CONVERSATION_CACHE_MAX_BYTES > 0:
+            _backend = CachedStorage(_backend, CONVERSATION_CACHE_MAX_BYTES, CONVERSATION_CACHE_FLUSH_INTERVAL)
+    return _backend
+
+
+def get_cache_stats() -> Optional[Dict[str, Any]]:
+    """Get conversation cache counters, or None if the cache is disabled."""
+    backend = get_backend()
+    return backend.get_stats() if isinstance(backend, CachedStorage) else None
+
+
+def close():
+    """Write back cached changes and close the backend, search index and leaderboard (e.g. on shutdown)."""
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+    search_index.close()
+    leaderboard.close()
+
+
+def search(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Full-text search over stored user messages and answers.
+
+    Args:
+        query: Free text; every word must match
+        limit: Maximum hits to return
+
+    Returns:
+        Ranked hits (see search_index.SearchIndex.search)
+    """
+    return search_index.get_index().search(query, limit)
+
+
+def build_search_index_if_empty() -> bool:
+    """Index existing conversations if the search index is empty (e.g. on first start)."""
+    return search_index.build_if_empty(get_backend())
+
+
+def get_leaderboard(mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get model standings aggregated over every stored council run.
+
+    Args:
+        mode: Council mode, or None for all modes combined
+
+    Returns:
+        Standings (see leaderboard.Leaderboard.standings)
+    """
+    return leaderboard.get_leaderboard().standings(mode)
 
-def get_conversation_path(conversation_id: str) -> str:
-    """Get the file path for a conversation."""
-    return os.path.join(DATA_DIR, f"{conversation_id}.json")
+
+def build_leaderboard_if_empty() -> bool:
+    """Count existing conversations if the leaderboard is empty (e.g. on first start)."""
+    return leaderboard.build_if_empty(get_backend())
+
+
+def archive_cold(older_than_days: float) -> Dict[str, Any]:
+    """
+    Move conversations not modified for older_than_days into compressed cold storage.
+
+    Returns:
+        Per-run savings (see cold_storage.run_tiering)
+    """
+    return cold_storage.run_tiering(get_backend(), older_than_days)
+
+
+def _index_messages(conversation_id: str, mutations: List[Mutation], results: List[Any]):
+    """
+    Add the messages appended by a batch of mutations to the search index and leaderboard.
+
+    Late results (attach_late_result) are not indexed or counted: the
+    leaderboard only counts the rankings a run's aggregate was built from.
+    """
+    messages = []
+    for (operation, args), position in zip(mutations, results):
+        if operation == "add_user_message":
+            messages.append((position, {"role": "user", "content": args[0]}))
+        elif operation == "add_assistant_message":
+            stage1, stage2, stage3, metadata = args
+            messages.append((position, {
+                "role": "assistant",
+                "stage1": stage1,
+                "stage2": stage2,
+                "stage3": stage3,
+                "metadata": metadata,
+            }))
+    if not messages:
+        return
+    try:
+        search_index.get_index().add_messages(conversation_id, messages)
+    except Exception as e:
+        # Search is best effort; the rebuild command can fill any gaps
+        print(f"Failed to index messages of {conversation_id}: {e}")
+    try:
+        leaderboard.get_leaderboard().add_messages(conversation_id, messages)
+    except Exception as e:
+        print(f"Failed to count rankings of {conversation_id}: {e}")
+
+
+def apply_mutations(conversation_id: str, mutations: List[Mutation]) -> List[Any]:
+    """
+    Apply several mutations to one conversation in a single backend write.
+
+    Args:
+        conversation_id: Conversation identifier
+        mutations: (operation, args) tuples, see storage_base.apply_mutation
+
+    Returns:
+        One result per mutation
+    """
+    results = get_backend().apply_mutations(conversation_id, mutations)
+    _index_messages(conversation_id, mutations, results)
+    return results
 
 
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
@@ -31,21 +191,7 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     Returns:
         New conversation dict
     """
-    ensure_data_dir()
-
-    conversation = {
-        "id": conversation_id,
-        "created_at": datetime.utcnow().isoformat(),
-        "title": "New Conversation",
-        "messages": []
-    }
-
-    # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
-
-    return conversation
+    return get_backend().create_conversation(conversation_id)
 
 
 def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
@@ -58,13 +204,41 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Conversation dict or None if not found
     """
-    path = get_conversation_path(conversation_id)
+    return get_backend().get_conversation(conversation_id)
 
-    if not os.path.exists(path):
-        return None
 
-    with open(path, 'r') as f:
-        return json.load(f)
+def get_metadata(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a conversation's metadata without loading its messages.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+
+    Returns:
+        Dict with id, created_at, title and message_count, or None if not found
+    """
+    return get_backend().get_metadata(conversation_id)
+
+
+def get_messages(
+    conversation_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    stages: Optional[Tuple[str, ...]] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get a range of a conversation's messages without loading the rest.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        offset: Index of the first message
+        limit: Maximum messages to return (None for all)
+        stages: Payload keys to include, e.g. SUMMARY_STAGES (None for all)
+
+    Returns:
+        List of messages, or None if the conversation doesn't exist
+    """
+    return get_backend().get_messages(conversation_id, offset, limit, stages)
 
 
 def save_conversation(conversation: Dict[str, Any]):
@@ -74,40 +248,47 @@ def save_conversation(conversation: Dict[str, Any]):
     Args:
         conversation: Conversation dict to save
     """
-    ensure_data_dir()
+    save_conversations([conversation])
 
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
 
+def save_conversations(conversations: List[Dict[str, Any]]):
+    """
+    Save (replace) several conversations in one backend batch.
 
-def list_conversations() -> List[Dict[str, Any]]:
+    Args:
+        conversations: Conversation dicts to save
     """
-    List all conversations (metadata only).
+    get_backend().save_conversations(conversations)
+    try:
+        search_index.get_index().replace_conversations(conversations)
+    except Exception as e:
+        print(f"Failed to index {len(conversations)} saved conversations: {e}")
+    try:
+        # Messages already counted (by position) are skipped
+        board = leaderboard.get_leaderboard()
+        for conversation in conversations:
+            board.add_messages(conversation["id"], list(enumerate(conversation.get("messages", []))))
+    except Exception as e:
+        print(f"Failed to count rankings of {len(conversations)} saved conversations: {e}")
+
+
+def list_conversations(
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    order: str = "desc"
+) -> List[Dict[str, Any]]:
+    """
+    List conversations (metadata only) from the backend's index.
+
+    Args:
+        limit: Maximum conversations to return (None for all)
+        before: Cursor returned with the previous page
+        order: "desc" (newest first) or "asc"
 
     Returns:
         List of conversation metadata dicts
     """
-    ensure_data_dir()
-
-    conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
-
-    # Sort by creation time, newest first
-    conversations.sort(key=lambda x: x["created_at"], reverse=True)
-
-    return conversations
+    return get_backend().list_conversations(limit, before, order)
 
 
 def add_user_message(conversation_id: str, content: str):
@@ -118,24 +299,16 @@ def add_user_message(conversation_id: str, content: str):
         conversation_id: Conversation identifier
         content: User message content
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["messages"].append({
-        "role": "user",
-        "content": content
-    })
-
-    save_conversation(conversation)
+    apply_mutations(conversation_id, [("add_user_message", (content,))])
 
 
 def add_assistant_message(
     conversation_id: str,
     stage1: List[Dict[str, Any]],
     stage2: List[Dict[str, Any]],
-    stage3: Dict[str, Any]
-):
+    stage3: Dict[str, Any],
+    metadata: Optional[Dict[str, Any]] = None
+) -> int:
     """
     Add an assistant message with all 3 stages to a conversation.
 
@@ -144,19 +317,35 @@ def add_assistant_message(
         stage1: List of individual model responses
         stage2: List of model rankings
         stage3: Final synthesized response
+        metadata: Optional run metadata to keep with the message (see council.message_metadata)
+
+    Returns:
+        Index of the new message within the conversation
+    """
+    return apply_mutations(
+        conversation_id, [("add_assistant_message", (stage1, stage2, stage3, metadata))]
+    )[0]
+
+
+def attach_late_result(
+    conversation_id: str,
+    message_index: int,
+    stage: str,
+    result: Dict[str, Any]
+):
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    Attach a result that arrived after its stage advanced on quorum.
 
-    conversation["messages"].append({
-        "role": "assistant",
-        "stage1": stage1,
-        "stage2": stage2,
-        "stage3": stage3
-    })
+    Late results are kept under the message's 'late_results' key so the
+    stage payloads the chairman actually saw stay unchanged.
 
-    save_conversation(conversation)
+    Args:
+        conversation_id: Conversation identifier
+        message_index: Index of the assistant message
+        stage: Stage the result belongs to ("stage1" or "stage2")
+        result: Formatted stage result
+    """
+    get_backend().attach_late_result(conversation_id, message_index, stage, result)
 
 
 def update_conversation_title(conversation_id: str, title: str):
@@ -167,9 +356,4 @@ def update_conversation_title(conversation_id: str, title: str):
         conversation_id: Conversation identifier
         title: New title for the conversation
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["title"] = title
-    save_conversation(conversation)
+    get_backend().update_conversation_title(conversation_id, title)
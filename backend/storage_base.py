@@ -0,0 +1,281 @@
+"""Interface shared by the conversation storage backends."""
+
+import os
+import re
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+# Conversation ids become file names in the file backends, so only uuids and
+# other plain tokens are accepted from outside (imports)
+CONVERSATION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+# Roles a stored message may have
+MESSAGE_ROLES = ("user", "assistant")
+
+
+def is_valid_conversation_id(conversation_id: Any) -> bool:
+    """Check that a conversation id is a plain token that is safe as a file name."""
+    return isinstance(conversation_id, str) and CONVERSATION_ID_PATTERN.fullmatch(conversation_id) is not None
+
+
+def conversation_file_path(data_dir: str, filename: str) -> str:
+    """
+    Join a conversation file name onto the data directory.
+
+    Raises:
+        ValueError: If the resulting path would fall outside data_dir
+    """
+    path = os.path.join(data_dir, filename)
+    root = os.path.abspath(data_dir)
+    if os.path.dirname(os.path.abspath(path)) != root:
+        raise ValueError(f"Invalid conversation file name: {filename!r}")
+    return path
+
+
+def encode_cursor(metadata: Dict[str, Any]) -> str:
+    """Build a listing cursor pointing just past a conversation."""
+    return f"{metadata['created_at']}|{metadata['id']}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Parse a listing cursor into (created_at, id).
+
+    A bare created_at timestamp is accepted too.
+    """
+    if not cursor:
+        return None
+    created_at, _, conversation_id = cursor.partition("|")
+    return created_at, conversation_id
+
+
+# Message keys that every projection keeps; the rest are stage payloads
+MESSAGE_FIELDS = ("role", "content")
+
+# Payloads kept by the "summary" projection: user messages and final answers only
+SUMMARY_STAGES = ("stage3",)
+
+
+def project_message(message: Dict[str, Any], stages: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """
+    Keep only the given stage payloads of a message.
+
+    Args:
+        message: Message dict
+        stages: Payload keys to keep (None keeps everything)
+
+    Returns:
+        The projected message (the message itself when stages is None)
+    """
+    if stages is None:
+        return message
+    return {key: value for key, value in message.items() if key in MESSAGE_FIELDS or key in stages}
+
+
+def slice_messages(
+    messages: List[Dict[str, Any]],
+    offset: int,
+    limit: Optional[int],
+    stages: Optional[Tuple[str, ...]]
+) -> List[Dict[str, Any]]:
+    """Take messages[offset:offset + limit] of an in-memory conversation, projected to stages."""
+    end = None if limit is None else offset + limit
+    return [project_message(message, stages) for message in messages[offset:end]]
+
+
+# A mutation is (operation, args); operations are the StorageBackend method names below
+Mutation = Tuple[str, tuple]
+
+
+def apply_mutation(conversation: Dict[str, Any], mutation: Mutation) -> Any:
+    """
+    Apply a mutation to an in-memory conversation.
+
+    Args:
+        conversation: Conversation dict, modified in place
+        mutation: (operation, args) tuple
+
+    Returns:
+        The operation's result (the new message's index for add_user_message
+        and add_assistant_message)
+
+    Raises:
+        ValueError: For an unknown operation or a message index out of range
+    """
+    operation, args = mutation
+    messages = conversation["messages"]
+
+    if operation == "add_user_message":
+        content, = args
+        messages.append({"role": "user", "content": content})
+        return len(messages) - 1
+    elif operation == "add_assistant_message":
+        stage1, stage2, stage3, metadata = args
+        message = {"role": "assistant", "stage1": stage1, "stage2": stage2, "stage3": stage3}
+        if metadata:
+            message["metadata"] = metadata
+        messages.append(message)
+        return len(messages) - 1
+    elif operation == "attach_late_result":
+        message_index, stage, result = args
+        if not 0 <= message_index < len(messages):
+            raise ValueError(f"Message {message_index} not found in conversation {conversation['id']}")
+        messages[message_index].setdefault("late_results", {}).setdefault(stage, []).append(result)
+    elif operation == "update_conversation_title":
+        title, = args
+        conversation["title"] = title
+    else:
+        raise ValueError(f"Unknown mutation: {operation}")
+    return None
+
+
+def conversation_metadata(conversation: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata (id, created_at, title, message_count) of a conversation dict."""
+    return {
+        "id": conversation["id"],
+        "created_at": conversation["created_at"],
+        "title": conversation.get("title", "New Conversation"),
+        "message_count": len(conversation["messages"])
+    }
+
+
+class StorageBackend:
+    """
+    Persistence for conversations and their messages.
+
+    Conversations are plain dicts:
+        {"id", "created_at", "title", "messages": [...]}
+    User messages are {"role": "user", "content"}; assistant messages are
+    {"role": "assistant", "stage1", "stage2", "stage3"} plus optional extra
+    payloads such as "metadata" (label_to_model, aggregate rankings, mode)
+    and "late_results".
+    """
+
+    name = "base"
+
+    def create_conversation(self, conversation_id: str) -> Dict[str, Any]:
+        """Create and persist an empty conversation."""
+        raise NotImplementedError
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a full conversation, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        """Replace a conversation (metadata and every message) as a whole."""
+        raise NotImplementedError
+
+    def save_conversations(self, conversations: List[Dict[str, Any]]):
+        """Replace several conversations at once (backends may batch this)."""
+        for conversation in conversations:
+            self.save_conversation(conversation)
+
+    def list_conversations(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        """
+        List conversation metadata (id, created_at, title, message_count).
+
+        Served from an index; message bodies are never read.
+
+        Args:
+            limit: Maximum conversations to return (None for all)
+            before: Cursor from encode_cursor; the page starts just past it
+            order: "desc" (newest first) or "asc"
+        """
+        raise NotImplementedError
+
+    def get_metadata(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get one conversation's metadata without loading its messages."""
+        conversation = self.get_conversation(conversation_id)
+        return conversation_metadata(conversation) if conversation else None
+
+    def get_messages(
+        self,
+        conversation_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        stages: Optional[Tuple[str, ...]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get a range of a conversation's messages, optionally projected.
+
+        Backends that can read messages individually override this so only
+        the requested rows and payloads are decoded.
+
+        Args:
+            conversation_id: Conversation identifier
+            offset: Index of the first message
+            limit: Maximum messages to return (None for all)
+            stages: Payload keys to include (None for all, () for none)
+
+        Returns:
+            The messages, or None if the conversation doesn't exist
+        """
+        conversation = self.get_conversation(conversation_id)
+        if conversation is None:
+            return None
+        return slice_messages(conversation["messages"], offset, limit, stages)
+
+    def apply_mutations(self, conversation_id: str, mutations: List[Mutation]) -> List[Any]:
+        """
+        Apply several mutations to one conversation.
+
+        Backends override this to persist the whole batch in a single write.
+
+        Returns:
+            One result per mutation
+        """
+        return [getattr(self, operation)(conversation_id, *args) for operation, args in mutations]
+
+    def add_user_message(self, conversation_id: str, content: str):
+        """Append a user message."""
+        raise NotImplementedError
+
+    def add_assistant_message(
+        self,
+        conversation_id: str,
+        stage1: List[Dict[str, Any]],
+        stage2: List[Dict[str, Any]],
+        stage3: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Append an assistant message (with the run's metadata, if given) and return its index."""
+        raise NotImplementedError
+
+    def attach_late_result(
+        self,
+        conversation_id: str,
+        message_index: int,
+        stage: str,
+        result: Dict[str, Any]
+    ):
+        """Append a late stage result to message['late_results'][stage]."""
+        raise NotImplementedError
+
+    def update_conversation_title(self, conversation_id: str, title: str):
+        """Set a conversation's title."""
+        raise NotImplementedError
+
+    def archive_cold(self, cutoff: datetime) -> Dict[str, Any]:
+        """
+        Repack conversations last modified before cutoff into compressed cold storage.
+
+        Cold conversations still read normally; writing to one makes it hot again.
+
+        Args:
+            cutoff: Timezone-aware UTC datetime
+
+        Returns:
+            Dict with conversations repacked, their "ids", and bytes_before/bytes_after
+
+        Raises:
+            NotImplementedError: If the backend has no cold tier
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any open handles."""
@@ -0,0 +1,79 @@
+"""Local, CPU-only text embeddings for similarity checks (no model download).
+
+Texts are embedded with the hashing trick over word unigrams/bigrams and
+character trigrams, then L2-normalized, so cosine similarity is a dot product
+and whole batches compare with one matrix multiply.
+"""
+
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so formatting differences don't matter."""
+    return " ".join(text.casefold().split())
+
+
+def _features(text: str) -> List[str]:
+    """Extract hashed features: words, word bigrams and character trigrams."""
+    words = _WORD_PATTERN.findall(text)
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+
+    joined = f" {' '.join(words)} "
+    features.extend(f"c:{joined[i:i + 3]}" for i in range(len(joined) - 2))
+    return features
+
+
+def embed_texts(texts: List[str], dim: int = 512) -> np.ndarray:
+    """
+    Embed texts as L2-normalized hashed feature vectors.
+
+    Args:
+        texts: Texts to embed (normalized internally)
+        dim: Embedding dimensionality
+
+    Returns:
+        float32 array of shape (len(texts), dim); all-zero rows for empty texts
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+
+    for row, text in enumerate(texts):
+        features = _features(normalize_text(text))
+        if not features:
+            continue
+
+        # crc32 is stable across processes (unlike hash()); bit 31 picks the sign
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode("utf-8")) for feature in features),
+            dtype=np.uint32,
+            count=len(features)
+        )
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        np.add.at(matrix[row], hashes % dim, signs)
+
+    # Sublinear term frequency, then unit length
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def pairwise_similarity(texts: List[str], dim: int = 512) -> np.ndarray:
+    """
+    Cosine similarity between every pair of texts.
+
+    Args:
+        texts: Texts to compare
+        dim: Embedding dimensionality
+
+    Returns:
+        Symmetric (n, n) similarity matrix
+    """
+    embeddings = embed_texts(texts, dim)
+    return embeddings @ embeddings.T
@@ -3,7 +3,10 @@
 import os
 import re
 from typing import Optional, Dict, Any
-import httpx
+try:
+    from .http_client import get_client
+except ImportError:
+    from http_client import get_client
 
 TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
 TAVILY_SEARCH_URL = "https://api.tavily.com/search"
@@ -56,24 +59,25 @@ async def search_web(query: str, max_results: int = 5) -> Optional[Dict[str, Any
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                TAVILY_SEARCH_URL,
-                json={
-                    "api_key": TAVILY_API_KEY,
-                    "query": query,
-                    "max_results": max_results,
-                    "include_answer": True,
-                    "include_raw_content": False,
-                    "search_depth": "basic"
-                }
-            )
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Tavily search failed: {response.status_code} - {response.text}")
-                return None
+        client = get_client()
+        response = await client.post(
+            TAVILY_SEARCH_URL,
+            json={
+                "api_key": TAVILY_API_KEY,
+                "query": query,
+                "max_results": max_results,
+                "include_answer": True,
+                "include_raw_content": False,
+                "search_depth": "basic"
+            },
+            timeout=30.0
+        )
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(f"Tavily search failed: {response.status_code} - {response.text}")
+            return None
 
     except Exception as e:
         print(f"Tavily search error: {e}")
@@ -110,6 +110,37 @@ function App() {
               })
               break
 
+            case 'stage1_delta':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages]
+                const lastMsg = messages[messages.length - 1]
+                const partial = [...(lastMsg.stage1 || [])]
+                const index = partial.findIndex((r) => r.model === event.model)
+                if (index === -1) {
+                  partial.push({ model: event.model, response: event.delta })
+                } else {
+                  partial[index] = {
+                    ...partial[index],
+                    response: partial[index].response + event.delta,
+                  }
+                }
+                lastMsg.stage1 = partial
+                return { ...prev, messages }
+              })
+              break
+
+            case 'stage1_model_complete':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages]
+                const lastMsg = messages[messages.length - 1]
+                lastMsg.stage1 = [
+                  ...(lastMsg.stage1 || []).filter((r) => r.model !== event.data.model),
+                  event.data,
+                ]
+                return { ...prev, messages }
+              })
+              break
+
             case 'stage1_complete':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages]
@@ -129,6 +160,15 @@ function App() {
               })
               break
 
+            case 'stage2_model_complete':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages]
+                const lastMsg = messages[messages.length - 1]
+                lastMsg.stage2 = [...(lastMsg.stage2 || []), event.data]
+                return { ...prev, messages }
+              })
+              break
+
             case 'stage2_complete':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages]
@@ -149,6 +189,18 @@ function App() {
               })
               break
 
+            case 'stage3_delta':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages]
+                const lastMsg = messages[messages.length - 1]
+                lastMsg.stage3 = {
+                  model: event.model,
+                  response: (lastMsg.stage3?.response || '') + event.delta,
+                }
+                return { ...prev, messages }
+              })
+              break
+
             case 'stage3_complete':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages]
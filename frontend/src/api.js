@@ -2,8 +2,21 @@
  * API client for the LLM Council backend.
  */
 
+import { defaultUrlTransform } from 'react-markdown';
+
 const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8001';
 
+/**
+ * Resolve a backend-relative URL (e.g. a generated image reference) against
+ * the API base. Usable as ReactMarkdown's urlTransform.
+ */
+export function resolveApiUrl(url) {
+  if (typeof url === 'string' && url.startsWith('/api/')) {
+    return `${API_BASE}${url}`;
+  }
+  return defaultUrlTransform(url);
+}
+
 export const api = {
   /**
    * List all conversations.
@@ -46,6 +59,68 @@ export const api = {
     return response.json();
   },
 
+  /**
+   * Get a range of a conversation's messages.
+   * @param {string} conversationId - The conversation ID
+   * @param {Object} options - Optional: { offset, limit, newest, view: 'full' | 'summary' }
+   */
+  async getMessages(conversationId, options = {}) {
+    const params = new URLSearchParams();
+    for (const key of ['offset', 'limit', 'newest', 'view']) {
+      if (options[key] !== undefined) params.set(key, options[key]);
+    }
+    const response = await fetch(
+      `${API_BASE}/api/conversations/${conversationId}/messages?${params}`
+    );
+    if (!response.ok) {
+      throw new Error('Failed to get messages');
+    }
+    return response.json();
+  },
+
+  /**
+   * Get the stage 1 or stage 2 details of one assistant message.
+   * @param {string} conversationId - The conversation ID
+   * @param {number} messageIndex - Index of the assistant message
+   * @param {string} stage - 'stage1' or 'stage2'
+   */
+  async getMessageStage(conversationId, messageIndex, stage) {
+    const response = await fetch(
+      `${API_BASE}/api/conversations/${conversationId}/messages/${messageIndex}/${stage}`
+    );
+    if (!response.ok) {
+      throw new Error(`Failed to get ${stage}`);
+    }
+    return response.json();
+  },
+
+  /**
+   * Full-text search over past messages and answers.
+   * @param {string} query - Words to search for
+   * @param {number} limit - Maximum hits
+   */
+  async search(query, limit = 20) {
+    const params = new URLSearchParams({ q: query, limit });
+    const response = await fetch(`${API_BASE}/api/search?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to search');
+    }
+    return response.json();
+  },
+
+  /**
+   * Get model standings aggregated over all stored council runs.
+   * @param {string} [mode] - Only this council mode ("chat", "code" or "image")
+   */
+  async getLeaderboard(mode) {
+    const params = mode ? `?${new URLSearchParams({ mode })}` : '';
+    const response = await fetch(`${API_BASE}/api/leaderboard${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to get leaderboard');
+    }
+    return response.json();
+  },
+
   /**
    * Send a message in a conversation.
    * @param {string} conversationId - The conversation ID
@@ -105,13 +180,17 @@ export const api = {
 
     const reader = response.body.getReader();
     const decoder = new TextDecoder();
+    let buffer = '';
 
     while (true) {
       const { done, value } = await reader.read();
       if (done) break;
 
-      const chunk = decoder.decode(value);
-      const lines = chunk.split('\n');
+      // Token deltas make events small and frequent, so a read can end
+      // mid-line; keep the trailing partial line for the next chunk.
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
 
       for (const line of lines) {
         if (line.startsWith('data: ')) {
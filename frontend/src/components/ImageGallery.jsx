@@ -0,0 +1,32 @@
+import { resolveApiUrl } from '../api'
+
+/**
+ * Thumbnails for generated images that aren't already shown inline in the text.
+ * Accepts blob references ({ url, thumbnail_url }) and legacy data URLs.
+ */
+export default function ImageGallery({ images, text }) {
+  const items = (images || [])
+    .map((image) => (typeof image === 'string'
+      ? { href: image, src: image }
+      : { href: resolveApiUrl(image.url), src: resolveApiUrl(image.thumbnail_url || image.url), url: image.url }))
+    .filter((item) => !(item.url && text?.includes(item.url)))
+
+  if (items.length === 0) {
+    return null
+  }
+
+  return (
+    <div className="flex flex-wrap gap-3 p-4">
+      {items.map((item) => (
+        <a key={item.src} href={item.href} target="_blank" rel="noreferrer">
+          <img
+            src={item.src}
+            alt="Generated image"
+            loading="lazy"
+            className="w-40 h-40 object-cover rounded-xl border-2 border-border-light shadow-sm"
+          />
+        </a>
+      ))}
+    </div>
+  )
+}
@@ -5,6 +5,8 @@ import { Card, CardContent } from './ui/card'
 import { Tabs, TabsList, TabsTrigger, TabsContent } from './ui/tabs'
 import { Badge } from './ui/badge'
 import { cn } from '@/lib/utils'
+import { resolveApiUrl } from '../api'
+import ImageGallery from './ImageGallery'
 
 export default function Stage1({ responses }) {
   const [activeTab, setActiveTab] = useState(responses?.[0]?.model || '')
@@ -86,8 +88,9 @@ export default function Stage1({ responses }) {
                 <div className="bg-white rounded-2xl border-2 border-border-light shadow-sm p-1">
                   <div className="bg-gradient-to-br from-background-secondary/30 to-background/30 rounded-xl">
                     <div className="markdown-content text-base leading-relaxed">
-                      <ReactMarkdown>{resp.response}</ReactMarkdown>
+                      <ReactMarkdown urlTransform={resolveApiUrl}>{resp.response}</ReactMarkdown>
                     </div>
+                    <ImageGallery images={resp.images} text={resp.response} />
                   </div>
                 </div>
               </TabsContent>
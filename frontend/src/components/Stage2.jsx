@@ -12,7 +12,7 @@ function deAnonymizeText(text, labelToModel) {
   let result = text
   Object.entries(labelToModel).forEach(([label, model]) => {
     const modelShortName = model.split('/')[1] || model
-    result = result.replace(new RegExp(label, 'g'), `**${modelShortName}**`)
+    result = result.replace(new RegExp(`${label}\\b`, 'g'), `**${modelShortName}**`)
   })
   return result
 }
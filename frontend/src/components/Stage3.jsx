@@ -2,6 +2,8 @@ import ReactMarkdown from 'react-markdown'
 import { Crown, Sparkles, Check, GraduationCap } from 'lucide-react'
 import { Card, CardContent } from './ui/card'
 import { cn } from '@/lib/utils'
+import { resolveApiUrl } from '../api'
+import ImageGallery from './ImageGallery'
 
 export default function Stage3({ finalResponse }) {
   if (!finalResponse) {
@@ -72,8 +74,9 @@ export default function Stage3({ finalResponse }) {
           {/* Response Content */}
           <div className="relative z-10">
             <div className="markdown-content text-base leading-relaxed">
-              <ReactMarkdown>{finalResponse.response}</ReactMarkdown>
+              <ReactMarkdown urlTransform={resolveApiUrl}>{finalResponse.response}</ReactMarkdown>
             </div>
+            <ImageGallery images={finalResponse.images} text={finalResponse.response} />
           </div>
 
           {/* Bottom Seal */}
@@ -0,0 +1,73 @@
+"""Latency histograms must keep the slow tail when hedging cancels requests."""
+
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+
+from backend import http_client, latency, openrouter, resilience
+
+MODEL = "test/model"
+
+# Millisecond-scale buckets so the simulation runs in a couple of seconds
+TEST_BOUNDS = [round(0.001 * 1.25 ** i, 6) for i in range(36)]
+
+
+def sample_latency(rng: random.Random) -> float:
+    """Heavy-tailed call latency: median 20ms, p95 around 75ms."""
+    return min(rng.lognormvariate(-3.9, 0.8), 0.5)
+
+
+class HedgingLatencyTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(7)
+        stats_path = os.path.join(tempfile.mkdtemp(), "latency.json")
+        patches = [
+            mock.patch.object(latency, "BUCKET_BOUNDS", TEST_BOUNDS),
+            mock.patch.object(latency, "LATENCY_STATS_PATH", stats_path),
+            mock.patch.object(latency, "_histograms", {}),
+            mock.patch.object(latency, "_loaded", True),
+            mock.patch.object(openrouter, "HEDGE_ENABLED", True),
+            mock.patch.object(openrouter, "HEDGE_BACKUP_MODELS", {}),
+            mock.patch.object(resilience, "_models", {}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        async def handler(request):
+            await asyncio.sleep(sample_latency(self.rng))
+            return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+        client_patch = mock.patch.object(
+            http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        client_patch.start()
+        self.addCleanup(client_patch.stop)
+
+    def test_p95_stable_under_sustained_hedging(self):
+        # Unhedged history gives the model's true latency distribution
+        for _ in range(400):
+            latency.record_latency(MODEL, sample_latency(self.rng))
+        baseline = latency.get_hedge_delay(MODEL)
+
+        async def run_rounds():
+            messages = [{"role": "user", "content": "hi"}]
+            for _ in range(40):
+                await asyncio.gather(*[
+                    openrouter._query_model_hedged(MODEL, messages, 5.0, False) for _ in range(40)
+                ])
+
+        asyncio.run(run_rounds())
+
+        # Losing (cancelled) requests still count, so p95 holds instead of
+        # sliding down a bucket as the hedges win
+        self.assertGreaterEqual(latency.get_hedge_delay(MODEL), baseline)
+
+
+if __name__ == "__main__":
+    unittest.main()